@@ -0,0 +1,367 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+Benchmarks the cost of building symmetry networks outside Maya.
+
+Usage:
+    python benchmarks/bench_symmetry.py --sizes 1 10 100 1000 10000 --output results.json --thresholds benchmarks/thresholds.json
+
+Each scenario builds the networks of a synthetic skeleton of N mirrored joint pairs against the
+recording stand-in of fake_maya, and measures the wall time and the number of Maya commands per
+pair. The results are written as JSON and checked against regression thresholds, so changes that
+add scene round-trips fail the benchmark.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+
+_BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, _BENCHMARK_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(_BENCHMARK_DIR), "src"))
+
+import fake_maya
+
+# The version of the result format, increased whenever the format changes
+RESULT_FORMAT_VERSION = 1
+
+DEFAULT_SIZES = (1, 10, 100, 1000, 10000)
+
+def build_skeleton(cmds, pair_count):
+    """
+    Builds a synthetic skeleton of mirrored joint pairs under a root joint.
+
+    Args:
+        cmds (fake_maya.FakeCmds): The fake scene.
+        pair_count (int): The number of pairs.
+
+    Returns:
+        list: The (source joint, target joint) pairs, in hierarchy order.
+    """
+    root = cmds.add_joint("root")
+    pairs = []
+    # Build chains of 10 joints on each side
+    left_parent = right_parent = root
+    for index in range(pair_count):
+        if index % 10 == 0:
+            left_parent = right_parent = root
+        position = (1.0 + index % 10, float(index // 10), 0.5 * (index % 7))
+        left = cmds.add_joint("L_joint{}".format(index), left_parent, position)
+        right = cmds.add_joint("R_joint{}".format(index), right_parent, (-position[0], position[1], position[2]))
+        left_parent, right_parent = left, right
+        pairs.append((left, right))
+    return pairs
+
+def scenario_single(cjs, cmds, pairs):
+    """
+    Builds each pair with set_symmetry_constraint, as the shelf button does.
+    """
+    for source_joint, target_joint in pairs:
+        cjs.set_symmetry_constraint(source_joint, target_joint, "X")
+
+def scenario_batch_pairs(cjs, cmds, pairs):
+    """
+    Builds all pairs with one create_joint_symmetry_batch call.
+    """
+    cjs.create_joint_symmetry_batch(pairs=pairs, axis="X")
+
+def scenario_batch_root(cjs, cmds, pairs):
+    """
+    Auto-pairs and builds the whole skeleton from its root joint.
+    """
+    cjs.create_joint_symmetry_batch(root_joint="root", axis="X")
+
+def scenario_batch_chunked(cjs, cmds, pairs):
+    """
+    Builds every network in chunks of 100 pairs, reporting the progress on the main progress bar
+    with the viewport refresh suspended.
+    """
+    import symmetry_progress
+    with symmetry_progress.suspend_refresh():
+        cjs.create_joint_symmetry_batch(pairs=pairs, axis="X", chunk_size=100, progress=symmetry_progress.ProgressReporter("Mirroring joint hierarchy"))
+
+def scenario_batch_compact(cjs, cmds, pairs):
+    """
+    Builds all pairs as compact networks with one create_joint_symmetry_batch call.
+    """
+    cjs.create_joint_symmetry_batch(pairs=pairs, axis="X", mode="compact")
+
+def scenario_batch_native(cjs, cmds, pairs):
+    """
+    Builds all pairs as native networks with one create_joint_symmetry_batch call.
+    """
+    cjs.create_joint_symmetry_batch(pairs=pairs, axis="X", mode="native")
+
+def setup_resync(cjs, cmds, pairs, mode="standard"):
+    """
+    Builds the networks, then moves the rest pose of one source joint in a hundred.
+    """
+    cjs.create_joint_symmetry_batch(pairs=pairs, axis="X", mode=mode)
+    for source_joint, _ in pairs[::100]:
+        cmds.nodes[source_joint].attributes["worldPosition"][1] += 1.0
+
+def setup_resync_compact(cjs, cmds, pairs):
+    """
+    Builds compact networks, then moves the rest pose of one source joint in a hundred.
+    """
+    setup_resync(cjs, cmds, pairs, "compact")
+
+def setup_resync_native(cjs, cmds, pairs):
+    """
+    Builds native networks, then moves the rest pose of one source joint in a hundred.
+    """
+    setup_resync(cjs, cmds, pairs, "native")
+
+def scenario_resync(cjs, cmds, pairs):
+    """
+    Resyncs the offsets of every network after a few rest poses changed.
+    """
+    resynced_pairs = cjs.resync_symmetry_networks()
+    if len(resynced_pairs) != len(pairs[::100]):
+        raise RuntimeError("Resynced {} pairs instead of {}.".format(len(resynced_pairs), len(pairs[::100])))
+
+def setup_audit(cjs, cmds, pairs):
+    """
+    Builds the networks, then breaks one in a hundred and leaves stale script job IDs on another.
+    """
+    cjs.create_joint_symmetry_batch(pairs=pairs, axis="X")
+    for _, target_joint in pairs[::100]:
+        # Delete the constraint without tearing the network down, leaving its utility nodes and attributes
+        cmds.delete(target_joint + "_symmetry_constraint")
+    for _, target_joint in pairs[50::100]:
+        cmds.addAttr(target_joint, longName="symmetryConstraintScriptJobIDs", attributeType="long", multi=True)
+        cmds.setAttr(target_joint + ".symmetryConstraintScriptJobIDs[0]", 1)
+
+def scenario_audit(cjs, cmds, pairs):
+    """
+    Audits the scene and repairs the broken networks.
+    """
+    import symmetry_audit
+    symmetry_audit.repair_scene()
+
+def setup_teardown(cjs, cmds, pairs):
+    """
+    Builds the networks.
+    """
+    cjs.create_joint_symmetry_batch(pairs=pairs, axis="X")
+
+def scenario_teardown(cjs, cmds, pairs):
+    """
+    Removes every network of the scene.
+    """
+    import symmetry_audit
+    symmetry_audit.teardown_scene()
+
+def setup_rerun(cjs, cmds, pairs):
+    """
+    Builds the networks, then deletes a utility node of one network in a hundred.
+    """
+    cjs.create_joint_symmetry_batch(pairs=pairs, axis="X")
+    for _, target_joint in pairs[::100]:
+        cmds.delete(target_joint + "_pma_rotate")
+
+def scenario_rerun(cjs, cmds, pairs):
+    """
+    Runs the builder again on the partly rigged skeleton, which only applies the missing operations.
+    """
+    cjs.create_joint_symmetry_batch(pairs=pairs, axis="X")
+
+def setup_analyze(cjs, cmds, pairs):
+    """
+    Builds the networks.
+    """
+    cjs.create_joint_symmetry_batch(pairs=pairs, axis="X")
+
+def scenario_analyze(cjs, cmds, pairs):
+    """
+    Reports the evaluation cost of every network of the scene.
+    """
+    import symmetry_evaluation
+    symmetry_evaluation.analyze_scene()
+
+def scenario_pose_flip(cjs, cmds, pairs):
+    """
+    Flips the pose of the whole skeleton from its root joint, without symmetry networks.
+    """
+    import mirror_joint_pose
+    mirror_joint_pose.mirror_joint_pose(root_joint="root", axis="X", mode="flip")
+
+SCENARIOS = {
+    "single": scenario_single,
+    "batch_pairs": scenario_batch_pairs,
+    "batch_root": scenario_batch_root,
+    "batch_compact": scenario_batch_compact,
+    "batch_chunked": scenario_batch_chunked,
+    "batch_native": scenario_batch_native,
+    "resync": scenario_resync,
+    "resync_compact": scenario_resync,
+    "resync_native": scenario_resync,
+    "audit": scenario_audit,
+    "teardown": scenario_teardown,
+    "rerun": scenario_rerun,
+    "pose_flip": scenario_pose_flip,
+    "analyze": scenario_analyze,
+}
+
+# The scenarios preparing the scene before they are measured
+SCENARIO_SETUPS = {
+    "resync": setup_resync,
+    "resync_compact": setup_resync_compact,
+    "resync_native": setup_resync_native,
+    "audit": setup_audit,
+    "teardown": setup_teardown,
+    "rerun": setup_rerun,
+    "analyze": setup_analyze,
+}
+
+def _import_tool():
+    """
+    Imports the tool against a fresh fake scene.
+    """
+    cmds = fake_maya.install()
+    for module_name in ["create_joint_symmetry", "symmetry_audit", "symmetry_callbacks", "symmetry_index", "symmetry_plan", "symmetry_progress", "symmetry_evaluation", "mirror_joint_pose"]:
+        sys.modules.pop(module_name, None)
+    import create_joint_symmetry as cjs
+    # Imported here so the scenarios using them do not time their import
+    import mirror_joint_pose
+    import symmetry_evaluation
+    return cjs, cmds
+
+def run_scenario(name, pair_count):
+    """
+    Runs a scenario on a fresh fake scene.
+
+    Args:
+        name (str): The scenario name. See SCENARIOS.
+        pair_count (int): The number of pairs.
+
+    Returns:
+        dict: The "pairs", "seconds", "seconds_per_pair", "calls", "calls_per_pair" and
+            "calls_by_command" of the run.
+    """
+    cjs, cmds = _import_tool()
+    pairs = build_skeleton(cmds, pair_count)
+    if name in SCENARIO_SETUPS:
+        SCENARIO_SETUPS[name](cjs, cmds, pairs)
+    cmds.reset_calls()
+
+    # Collect the scenes of the previous runs, so their garbage is not collected during this one
+    gc.collect()
+    start_time = time.time()
+    SCENARIOS[name](cjs, cmds, pairs)
+    seconds = time.time() - start_time
+
+    if cmds.warnings:
+        raise RuntimeError("The {} scenario raised warnings: {}".format(name, cmds.warnings[:5]))
+
+    calls = sum(cmds.calls.values())
+    return {
+        "pairs": pair_count,
+        "seconds": seconds,
+        "seconds_per_pair": seconds / pair_count,
+        "calls": calls,
+        "calls_per_pair": calls / pair_count,
+        "calls_by_command": dict((command, count / pair_count) for command, count in sorted(cmds.calls.items())),
+    }
+
+def run_benchmarks(scenarios, sizes):
+    """
+    Runs scenarios at several sizes.
+
+    Returns:
+        dict: The results in the comparable JSON format.
+    """
+    results = {"version": RESULT_FORMAT_VERSION, "python": sys.version.split()[0], "scenarios": {}}
+    for name in scenarios:
+        results["scenarios"][name] = [run_scenario(name, size) for size in sizes]
+    return results
+
+def check_thresholds(results, thresholds, baseline=None):
+    """
+    Checks results against regression thresholds.
+
+    The thresholds file maps each scenario to its limits, for example:
+        {"single": {"max_calls_per_pair": 40, "max_command_calls_per_pair": {"objExists": 0}, "max_seconds_per_pair": 0.01}}
+    With a baseline, the calls per pair may also not grow by more than "max_calls_growth" (a ratio).
+
+    Args:
+        results (dict): The results returned by run_benchmarks.
+        thresholds (dict): The limits of each scenario.
+        baseline (dict): Previous results to compare with, or None.
+
+    Returns:
+        list: A message for each threshold that was exceeded.
+    """
+    failures = []
+    for name, runs in results["scenarios"].items():
+        limits = thresholds.get(name, {})
+        baseline_runs = dict((run["pairs"], run) for run in (baseline or {}).get("scenarios", {}).get(name, []))
+        for run in runs:
+            label = "{} with {} pairs".format(name, run["pairs"])
+            if "max_calls_per_pair" in limits and run["calls_per_pair"] > limits["max_calls_per_pair"]:
+                failures.append("{}: {:.2f} calls per pair exceed {}".format(label, run["calls_per_pair"], limits["max_calls_per_pair"]))
+            for command, limit in limits.get("max_command_calls_per_pair", {}).items():
+                count = run["calls_by_command"].get(command, 0)
+                if count > limit:
+                    failures.append("{}: {:.2f} {} calls per pair exceed {}".format(label, count, command, limit))
+            if "max_seconds_per_pair" in limits and run["seconds_per_pair"] > limits["max_seconds_per_pair"]:
+                failures.append("{}: {:.6f} seconds per pair exceed {}".format(label, run["seconds_per_pair"], limits["max_seconds_per_pair"]))
+            previous = baseline_runs.get(run["pairs"])
+            growth = thresholds.get("max_calls_growth")
+            if previous is not None and growth is not None and run["calls_per_pair"] > previous["calls_per_pair"] * growth:
+                failures.append("{}: {:.2f} calls per pair grew from {:.2f}".format(label, run["calls_per_pair"], previous["calls_per_pair"]))
+    return failures
+
+def print_results(results):
+    """
+    Prints a table of the results.
+    """
+    print("{:<16} {:>7} {:>12} {:>16} {:>15}".format("scenario", "pairs", "seconds", "seconds/pair", "calls/pair"))
+    for name, runs in sorted(results["scenarios"].items()):
+        for run in runs:
+            print("{:<16} {:>7} {:>12.4f} {:>16.6f} {:>15.2f}".format(name, run["pairs"], run["seconds"], run["seconds_per_pair"], run["calls_per_pair"]))
+
+def main(argv=None):
+    """
+    Runs the benchmark command line.
+
+    Returns:
+        int: The exit code, 1 if a threshold was exceeded.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the joint symmetry builder against a fake maya.cmds.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="The numbers of pairs to benchmark.")
+    parser.add_argument("--scenarios", nargs="+", default=sorted(SCENARIOS), choices=sorted(SCENARIOS), help="The scenarios to run.")
+    parser.add_argument("--output", help="The JSON file to write the results to.")
+    parser.add_argument("--thresholds", default=os.path.join(_BENCHMARK_DIR, "thresholds.json"), help="The JSON file of regression thresholds.")
+    parser.add_argument("--baseline", help="A previous results JSON file to compare with.")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.scenarios, args.sizes)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    thresholds = {}
+    if args.thresholds and os.path.exists(args.thresholds):
+        with open(args.thresholds, "r") as f:
+            thresholds = json.load(f)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+
+    failures = check_thresholds(results, thresholds, baseline)
+    for failure in failures:
+        print("REGRESSION: " + failure)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+Checks the jobs the batch command line creates from a pair manifest.
+
+Usage:
+    python benchmarks/check_batch.py
+
+Manifests are written to a temporary directory, then the command line arguments are parsed and
+the jobs are created as joint_symmetry_batch.main creates them, without running Maya. Exits with 1
+if any check fails.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+_BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(_BENCHMARK_DIR), "src"))
+
+import joint_symmetry_batch
+
+# The manifests, the arguments they are read with, and the axis and mode expected for their jobs.
+# The manifest overrides the arguments, and the arguments fill in the keys it does not contain.
+EXPECTED_JOBS = [
+    ({"pairs": [["L_arm", "R_arm"]]}, ["--axis", "Z"], ("Z", "standard")),
+    ({"pairs": [["L_arm", "R_arm"]]}, ["--mode", "native"], ("X", "native")),
+    ({"axis": "Y", "roots": ["root"]}, ["--axis", "Z", "--mode", "compact"], ("Y", "compact")),
+    ({"axis": "Y", "mode": "compact"}, [], ("Y", "compact")),
+    ({}, [], ("X", "standard")),
+]
+
+def create_jobs(manifest, arguments, directory):
+    """
+    Writes a manifest and creates the jobs of a scene from it and some arguments.
+
+    Returns:
+        list: The SceneJobs.
+    """
+    manifest_path = os.path.join(directory, "pairs.json")
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+    args = joint_symmetry_batch.parse_args(["scene.ma", "--manifest", manifest_path] + arguments)
+    loaded = joint_symmetry_batch.load_manifest(args.manifest)
+    return joint_symmetry_batch.create_jobs(args.scenes, loaded, args.output_dir, args.suffix, args.axis, args.mode, args.backend)
+
+def check_jobs():
+    """
+    Checks the axis, mode, pairs and root joints of the jobs created from each manifest.
+
+    Returns:
+        list: The failure messages.
+    """
+    failures = []
+    directory = tempfile.mkdtemp()
+    try:
+        for manifest, arguments, expected in EXPECTED_JOBS:
+            job = create_jobs(manifest, arguments, directory)[0]
+            if (job.axis, job.mode) != expected:
+                failures.append("{} with {}: axis and mode are {}, expected {}".format(manifest, arguments, (job.axis, job.mode), expected))
+            pairs = [tuple(pair) for pair in manifest["pairs"]] if "pairs" in manifest else None
+            if (job.pairs, job.root_joints) != (pairs, manifest.get("roots")):
+                failures.append("{}: pairs and root joints are {}".format(manifest, (job.pairs, job.root_joints)))
+    finally:
+        shutil.rmtree(directory)
+    return failures
+
+def main():
+    """
+    Runs the checks and prints their failures.
+
+    Returns:
+        int: The exit code.
+    """
+    failures = check_jobs()
+    for failure in failures:
+        print("FAILED: " + failure)
+    if not failures:
+        print("All batch checks passed.")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
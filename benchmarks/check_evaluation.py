@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+Checks the evaluation-cost analyzer against stubbed graphs.
+
+Usage:
+    python benchmarks/check_evaluation.py
+
+The networks of each mode are built against the recording stand-in of fake_maya, then their
+connections are copied into a symmetry_evaluation.StaticGraph, and the counts, depth and serial
+constructs reported for each pair are compared with the expected ones. A hand-written graph checks
+the constructs the builder never creates. Exits with 1 if any check fails.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import sys
+
+import bench_symmetry
+
+# The nodes, connections, depth and serial constructs expected for a pair of each mode. The
+# standard network reads the offsets and parent inverse matrix of its target joint, the compact
+# network its offset matrix and parent inverse matrix, so both form a cycle through it.
+EXPECTED_PAIRS = {
+    "standard": {"nodes": 4, "connections": 19, "depth": 3, "constructs": ["cycle"]},
+    "compact": {"nodes": 1, "connections": 4, "depth": 2, "constructs": ["cycle"]},
+    "native": {"nodes": 1, "connections": 3, "depth": 2, "constructs": []},
+}
+
+def check_mode(mode):
+    """
+    Builds a pair in a network mode and checks its report on a stubbed copy of the scene.
+
+    Returns:
+        list: The failure messages.
+    """
+    cjs, cmds = bench_symmetry._import_tool()
+    import symmetry_evaluation
+
+    pairs = bench_symmetry.build_skeleton(cmds, 1)
+    cjs.create_joint_symmetry_batch(pairs=pairs, axis="X", mode=mode)
+
+    # Copy the scene into a stubbed graph, then analyze the network from the stub only
+    source_joint, target_joint = pairs[0]
+    nodes = [target_joint + suffix for suffix in cjs.NETWORK_NODE_SUFFIXES if target_joint + suffix in cmds.nodes]
+    graph = symmetry_evaluation.StaticGraph(
+        [(source, destination) for destination, source in cmds.connections.items()],
+        dict((name, node.node_type) for name, node in cmds.nodes.items()),
+    )
+    report = symmetry_evaluation.analyze_networks([(source_joint, target_joint, mode, nodes)], graph)[0]
+
+    expected = EXPECTED_PAIRS[mode]
+    reported = {
+        "nodes": report.nodes,
+        "connections": report.connections,
+        "depth": report.depth,
+        "constructs": [construct.kind for construct in report.constructs],
+    }
+    return ["{}: {} is {}, expected {}".format(mode, key, reported[key], value) for key, value in sorted(expected.items()) if reported[key] != value]
+
+def check_constructs():
+    """
+    Checks the expressions and legacy script jobs found on a hand-written graph.
+
+    Returns:
+        list: The failure messages.
+    """
+    bench_symmetry._import_tool()
+    import symmetry_evaluation
+
+    graph = symmetry_evaluation.StaticGraph(
+        [
+            ("L_arm.worldMatrix[0]", "R_arm_symmetry_native_matrix.matrixIn[2]"),
+            ("spine.worldInverseMatrix[0]", "R_arm_symmetry_native_matrix.matrixIn[4]"),
+            ("R_arm_symmetry_native_matrix.matrixSum", "R_arm.offsetParentMatrix"),
+            ("R_arm_symmetry_native_matrix.message", "R_arm.symmetryNetworkNodes[5]"),
+            ("arm_expression.output[0]", "R_arm.visibility"),
+        ],
+        {"L_arm": "joint", "spine": "joint", "arm_expression": "expression"},
+        ["R_arm.symmetryConstraintScriptJobIDs"],
+    )
+    report = symmetry_evaluation.analyze_networks([("L_arm", "R_arm", "native", ["R_arm_symmetry_native_matrix"])], graph, ["R_arm"])[0]
+
+    failures = []
+    constructs = [(construct.kind, construct.node) for construct in report.constructs]
+    if constructs != [("expression", "arm_expression"), ("script_job", "R_arm")]:
+        failures.append("constructs: {} found, expected the expression and the script job".format(constructs))
+    if (report.nodes, report.connections, report.depth, report.callbacks) != (1, 3, 2, True):
+        failures.append("constructs: counted {}".format(report))
+    return failures
+
+def main():
+    """
+    Runs the checks and prints their failures.
+
+    Returns:
+        int: The exit code.
+    """
+    failures = []
+    for mode in sorted(EXPECTED_PAIRS):
+        failures += check_mode(mode)
+    failures += check_constructs()
+    for failure in failures:
+        print("FAILED: " + failure)
+    if not failures:
+        print("All evaluation checks passed.")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
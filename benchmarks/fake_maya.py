@@ -0,0 +1,509 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+An in-memory stand-in for the parts of Maya used by the joint symmetry tool.
+
+`install()` registers fake `maya`, `maya.cmds`, `maya.utils` and `maya.api.OpenMaya` modules in
+sys.modules, so the tool can be imported and run outside Maya. The fake `maya.cmds` simulates a
+scene of nodes, dynamic attributes and connections, and records every command it receives.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import sys
+import types
+from collections import Counter, OrderedDict, defaultdict
+
+IDENTITY_MATRIX = [
+    1.0, 0.0, 0.0, 0.0,
+    0.0, 1.0, 0.0, 0.0,
+    0.0, 0.0, 1.0, 0.0,
+    0.0, 0.0, 0.0, 1.0,
+]
+
+def _recorded(function):
+    """
+    Records the calls to a fake command.
+    """
+    name = function.__name__
+
+    def wrapper(self, *args, **kwargs):
+        self.calls[name] += 1
+        if self.phase_calls is not None:
+            self.phase_calls[name] += 1
+        return function(self, *args, **kwargs)
+    wrapper.__name__ = name
+    wrapper.__doc__ = function.__doc__
+    return wrapper
+
+class FakeNode(object):
+    """
+    A node of the fake scene.
+
+    Attributes:
+        name (str): The node name.
+        node_type (str): The node type.
+        parent (str): The name of the DAG parent, or None.
+        attributes (dict): The values of the attributes that were set, keyed by attribute name.
+        dynamic_attributes (list): The names of the dynamic attributes, in creation order.
+    """
+    def __init__(self, name, node_type, parent=None):
+        self.name = name
+        self.node_type = node_type
+        self.parent = parent
+        self.attributes = {}
+        self.dynamic_attributes = []
+
+class FakeCmds(object):
+    """
+    A recording stand-in for maya.cmds.
+
+    Attributes:
+        nodes (dict): The nodes of the scene, keyed by name, in creation order.
+        connections (dict): The source plug of each connected destination plug.
+        selection (list): The selected nodes.
+        calls (Counter): The number of calls to each command.
+        phase_calls (Counter): An extra counter receiving the calls, or None.
+        warnings (list): The messages passed to warning.
+    """
+    def __init__(self):
+        self.nodes = {}
+        self._node_order = OrderedDict()
+        self._children = defaultdict(list)
+        self.connections = {}
+        self._destinations = defaultdict(set)
+        self._node_connections = defaultdict(set)
+        self.selection = []
+        self.calls = Counter()
+        self.phase_calls = None
+        self.warnings = []
+        self._next_script_job = 1
+        self._script_jobs = set()
+
+    def reset_calls(self):
+        """
+        Clears the recorded calls.
+        """
+        self.calls = Counter()
+
+    # Scene building helpers. These are not Maya commands, so they are not recorded.
+
+    def add_joint(self, name, parent=None, translation=(0.0, 0.0, 0.0)):
+        """
+        Adds a joint to the scene at a world position.
+        """
+        node = FakeNode(name, "joint", parent)
+        node.attributes["worldPosition"] = list(translation)
+        self._add_node(node)
+        return name
+
+    def _add_node(self, node):
+        self.nodes[node.name] = node
+        self._node_order[node.name] = None
+        self._children[node.parent].append(node.name)
+
+    def _world_matrix(self, node_name):
+        matrix = list(IDENTITY_MATRIX)
+        matrix[12:15] = self.nodes[node_name].attributes.get("worldPosition", [0.0, 0.0, 0.0])
+        return matrix
+
+    def _long_name(self, node_name):
+        names = []
+        while node_name is not None:
+            names.append(node_name)
+            node_name = self.nodes[node_name].parent
+        return "|" + "|".join(reversed(names))
+
+    def _split_plug(self, plug):
+        node, _, attribute = plug.partition(".")
+        return node, attribute
+
+    def _attribute_exists(self, node_name, attribute):
+        node = self.nodes.get(node_name)
+        if node is None:
+            return False
+        base = attribute.split("[")[0]
+        return base in node.dynamic_attributes or base in node.attributes
+
+    # Commands
+
+    @_recorded
+    def ls(self, *args, **kwargs):
+        if kwargs.get("selection"):
+            names = list(self.selection)
+        elif args:
+            names = args[0] if isinstance(args[0], (list, tuple)) else list(args)
+            if any("." in name for name in names):
+                return self._list_plugs(names)
+            names = [name for name in names if name in self.nodes]
+        else:
+            names = list(self._node_order)
+        node_types = kwargs.get("type")
+        if node_types is not None:
+            if not isinstance(node_types, (list, tuple)):
+                node_types = [node_types]
+            names = [name for name in names if self.nodes[name].node_type in node_types]
+        if kwargs.get("long"):
+            names = [self._long_name(name) for name in names]
+        if kwargs.get("showType"):
+            names = [item for name in names for item in (name, self.nodes[name].node_type)]
+        return names
+
+    def _list_plugs(self, plugs):
+        # Plugs of a "*" node pattern match every node with the attribute
+        found = []
+        for plug in plugs:
+            node, attribute = self._split_plug(plug)
+            names = self._node_order if node == "*" else [node]
+            found.extend(name + "." + attribute for name in names if self._attribute_exists(name, attribute))
+        return found
+
+    @_recorded
+    def objectType(self, node):
+        return self.nodes[node].node_type
+
+    @_recorded
+    def objExists(self, name):
+        node, attribute = self._split_plug(name)
+        if attribute:
+            return self._attribute_exists(node, attribute)
+        return node in self.nodes
+
+    @_recorded
+    def listRelatives(self, node, **kwargs):
+        if kwargs.get("parent"):
+            parent = self.nodes[node].parent
+            return [parent] if parent is not None else None
+        children = list(self._children[node])
+        if kwargs.get("allDescendents"):
+            descendants = []
+            stack = list(children)
+            while stack:
+                child = stack.pop()
+                descendants.append(child)
+                stack.extend(self._children[child])
+            children = list(reversed(descendants))
+        node_type = kwargs.get("type")
+        if node_type is not None:
+            children = [name for name in children if self.nodes[name].node_type == node_type]
+        return children or None
+
+    @_recorded
+    def listAttr(self, node, **kwargs):
+        return list(self.nodes[node].dynamic_attributes) or None
+
+    @_recorded
+    def addAttr(self, node, **kwargs):
+        long_name = kwargs["longName"]
+        if long_name in self.nodes[node].dynamic_attributes:
+            raise RuntimeError("Found conflicting attribute name {}.{}".format(node, long_name))
+        self.nodes[node].dynamic_attributes.append(long_name)
+        if "defaultValue" in kwargs:
+            self.nodes[node].attributes[long_name] = kwargs["defaultValue"]
+
+    @_recorded
+    def deleteAttr(self, plug):
+        node, attribute = self._split_plug(plug)
+        dynamic_attributes = self.nodes[node].dynamic_attributes
+        if attribute not in dynamic_attributes:
+            raise RuntimeError("No attribute {}".format(plug))
+        # Children of a compound attribute are named after it
+        self.nodes[node].dynamic_attributes = [name for name in dynamic_attributes if not name.startswith(attribute)]
+        for name in [name for name in self.nodes[node].attributes if name.startswith(attribute)]:
+            del self.nodes[node].attributes[name]
+        for destination in [destination for destination in self._node_connections[node] if destination.startswith(plug) or self.connections[destination].startswith(plug)]:
+            self._disconnect(destination)
+
+    @_recorded
+    def createNode(self, node_type, name=None, parent=None, **kwargs):
+        name = name or node_type + "1"
+        base, index = name, 1
+        while name in self.nodes:
+            name = "{}{}".format(base, index)
+            index += 1
+        self._add_node(FakeNode(name, node_type, parent))
+        return name
+
+    @_recorded
+    def delete(self, *nodes):
+        for node in nodes:
+            if node not in self.nodes:
+                raise ValueError("No object matches name: {}".format(node))
+            for child in list(self._children.get(node, [])):
+                self.delete(child)
+            self._children.pop(node, None)
+            self._children[self.nodes[node].parent].remove(node)
+            del self.nodes[node]
+            del self._node_order[node]
+            for destination in list(self._node_connections.pop(node, ())):
+                if destination in self.connections:
+                    self._disconnect(destination)
+
+    @_recorded
+    def setAttr(self, plug, *values, **kwargs):
+        node, attribute = self._split_plug(plug)
+        if node not in self.nodes:
+            raise RuntimeError("No object matches name: {}".format(plug))
+        self.nodes[node].attributes[attribute] = list(values) if len(values) > 1 else values[0]
+
+    @_recorded
+    def getAttr(self, plug, **kwargs):
+        node, attribute = self._split_plug(plug)
+        if node not in self.nodes:
+            raise ValueError("No object matches name: {}".format(plug))
+        if attribute == "worldMatrix[0]":
+            return self._world_matrix(node)
+        if attribute == "parentMatrix[0]":
+            parent = self.nodes[node].parent
+            return self._world_matrix(parent) if parent is not None else list(IDENTITY_MATRIX)
+        if attribute in ("jointOrient", "translate", "rotate", "offsetTranslate", "offsetRotate"):
+            return [tuple(self.nodes[node].attributes.get(attribute, (0.0, 0.0, 0.0)))]
+        if attribute in ("scale", "offsetScale"):
+            return [tuple(self.nodes[node].attributes.get(attribute, (1.0, 1.0, 1.0)))]
+        if kwargs.get("multiIndices"):
+            return [int(name.split("[")[1][:-1]) for name in self.nodes[node].attributes if name.startswith(attribute + "[")]
+        return self.nodes[node].attributes.get(attribute, 0)
+
+    @_recorded
+    def connectAttr(self, source, destination, **kwargs):
+        for plug in (source, destination):
+            node, attribute = self._split_plug(plug)
+            if node not in self.nodes:
+                raise RuntimeError("No object matches name: {}".format(plug))
+        if destination in self.connections and not kwargs.get("force"):
+            raise RuntimeError("{} is already connected.".format(destination))
+        if destination in self.connections:
+            self._disconnect(destination)
+        self.connections[destination] = source
+        self._destinations[source].add(destination)
+        for plug in (source, destination):
+            self._node_connections[self._split_plug(plug)[0]].add(destination)
+
+    @_recorded
+    def disconnectAttr(self, source, destination):
+        if self.connections.get(destination) == source:
+            self._disconnect(destination)
+
+    @_recorded
+    def listConnections(self, plug, **kwargs):
+        if isinstance(plug, (list, tuple)):
+            # Query several plugs at once, as the real command does
+            found = []
+            for each_plug in plug:
+                found.extend(self._find_connections(each_plug, kwargs))
+            return self._format_connections(found, kwargs)
+        return self._format_connections(self._find_connections(plug, kwargs), kwargs)
+
+    def _find_connections(self, plug, kwargs):
+        node, attribute = self._split_plug(plug)
+        source = kwargs.get("source", True)
+        destination = kwargs.get("destination", True)
+        found = []
+        if attribute:
+            # Look a single plug up in the indices instead of scanning every connection
+            if source and plug in self.connections:
+                found.append((plug, self.connections[plug]))
+            if destination:
+                found.extend((plug, destination_plug) for destination_plug in sorted(self._destinations.get(plug, ())))
+            return found
+        # Only visit the connections of the node
+        for destination_plug in sorted(self._node_connections.get(node, ())):
+            source_plug = self.connections[destination_plug]
+            if source and self._plug_matches(destination_plug, node, attribute):
+                found.append((destination_plug, source_plug))
+            if destination and self._plug_matches(source_plug, node, attribute):
+                found.append((source_plug, destination_plug))
+        return found
+
+    def _format_connections(self, found, kwargs):
+        if kwargs.get("connections"):
+            result = []
+            for own, other in found:
+                result.extend([own, other if kwargs.get("plugs") else other.split(".")[0]])
+            return result or None
+        if kwargs.get("plugs"):
+            return [other for _, other in found] or None
+        return [other.split(".")[0] for _, other in found] or None
+
+    def _disconnect(self, destination):
+        source = self.connections.pop(destination)
+        self._destinations[source].discard(destination)
+        for plug in (source, destination):
+            self._node_connections[self._split_plug(plug)[0]].discard(destination)
+
+    def _plug_matches(self, plug, node, attribute):
+        plug_node, plug_attribute = self._split_plug(plug)
+        return plug_node == node and (not attribute or plug_attribute == attribute)
+
+    @_recorded
+    def xform(self, node, **kwargs):
+        if kwargs.get("query"):
+            if kwargs.get("matrix"):
+                return self._world_matrix(node)
+            if kwargs.get("translation"):
+                return list(self.nodes[node].attributes.get("worldPosition", [0.0, 0.0, 0.0]))
+            return [0.0, 0.0, 0.0]
+        if "matrix" in kwargs:
+            self.nodes[node].attributes["worldPosition"] = list(kwargs["matrix"][12:15])
+
+    @_recorded
+    def scriptJob(self, **kwargs):
+        if "exists" in kwargs:
+            return kwargs["exists"] in self._script_jobs
+        if "kill" in kwargs:
+            self._script_jobs.discard(kwargs["kill"])
+            return None
+        job_id = self._next_script_job
+        self._next_script_job += 1
+        self._script_jobs.add(job_id)
+        return job_id
+
+    @_recorded
+    def undoInfo(self, **kwargs):
+        return None
+
+    @_recorded
+    def refresh(self, **kwargs):
+        return None
+
+    @_recorded
+    def about(self, **kwargs):
+        return False
+
+    @_recorded
+    def progressBar(self, name, **kwargs):
+        return False
+
+    @_recorded
+    def playbackOptions(self, **kwargs):
+        return 1.0 if kwargs.get("minTime") else 24.0
+
+    @_recorded
+    def warning(self, message):
+        self.warnings.append(message)
+
+class _FakeMObject(object):
+    """
+    A stand-in for MObject, wrapping a node name.
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __eq__(self, other):
+        return isinstance(other, _FakeMObject) and other.name == self.name
+
+    def __ne__(self, other):
+        return not self == other
+
+def _create_open_maya(cmds):
+    """
+    Creates a minimal stand-in for maya.api.OpenMaya bound to a fake scene.
+    """
+    open_maya = types.ModuleType(str("maya.api.OpenMaya"))
+    hash_codes = {}
+
+    class MSelectionList(object):
+        def __init__(self):
+            self._names = []
+
+        def add(self, name):
+            if name.split(".")[0] not in cmds.nodes:
+                raise RuntimeError("No object matches name: {}".format(name))
+            self._names.append(name)
+
+        def getDependNode(self, index):
+            return _FakeMObject(self._names[index])
+
+    class MObjectHandle(object):
+        def __init__(self, mobject):
+            self._mobject = mobject
+
+        def hashCode(self):
+            return hash_codes.setdefault(self._mobject.name, len(hash_codes) + 1)
+
+        def isValid(self):
+            return self._mobject.name in cmds.nodes
+
+        def object(self):
+            return self._mobject
+
+    class MFnDependencyNode(object):
+        def __init__(self, mobject):
+            self._mobject = mobject
+
+        def name(self):
+            return self._mobject.name
+
+    class _Message(object):
+        callbacks = []
+
+        @classmethod
+        def addCallback(cls, *args):
+            cls.callbacks.append(args)
+            return len(cls.callbacks)
+
+        @classmethod
+        def addNodeRemovedCallback(cls, *args):
+            return cls.addCallback(*args)
+
+        @classmethod
+        def removeCallbacks(cls, callback_ids):
+            return None
+
+    class MSceneMessage(_Message):
+        kBeforeNew = 0
+        kBeforeOpen = 1
+        kAfterOpen = 2
+        kMayaExiting = 3
+        kBeforeSave = 4
+        kAfterImport = 5
+        kAfterCreateReference = 6
+        kAfterLoadReference = 7
+        kAfterUnloadReference = 8
+        kAfterRemoveReference = 9
+
+    class MEventMessage(_Message):
+        @classmethod
+        def addEventCallback(cls, *args):
+            return cls.addCallback(*args)
+
+    open_maya.MSelectionList = MSelectionList
+    open_maya.MObjectHandle = MObjectHandle
+    open_maya.MFnDependencyNode = MFnDependencyNode
+    open_maya.MDGMessage = _Message
+    open_maya.MMessage = _Message
+    open_maya.MSceneMessage = MSceneMessage
+    open_maya.MEventMessage = MEventMessage
+    return open_maya
+
+def install():
+    """
+    Registers the fake Maya modules in sys.modules.
+
+    Returns:
+        FakeCmds: The fake maya.cmds.
+    """
+    cmds = FakeCmds()
+
+    maya = types.ModuleType(str("maya"))
+    maya_utils = types.ModuleType(str("maya.utils"))
+    maya_utils.executeDeferred = lambda function, *args: function(*args)
+    maya_mel = types.ModuleType(str("maya.mel"))
+    maya_mel.eval = lambda command: "MainProgressBar"
+    maya_api = types.ModuleType(str("maya.api"))
+    open_maya = _create_open_maya(cmds)
+
+    maya.cmds = cmds
+    maya.utils = maya_utils
+    maya.mel = maya_mel
+    maya.api = maya_api
+    maya_api.OpenMaya = open_maya
+
+    sys.modules["maya"] = maya
+    sys.modules["maya.cmds"] = cmds
+    sys.modules["maya.utils"] = maya_utils
+    sys.modules["maya.mel"] = maya_mel
+    sys.modules["maya.api"] = maya_api
+    sys.modules["maya.api.OpenMaya"] = open_maya
+    return cmds
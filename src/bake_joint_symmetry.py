@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import time
+
+import maya.api.OpenMaya as om
+import maya.cmds as cmds
+
+import create_joint_symmetry as cjs
+import symmetry_math
+
+# The type of the anim curve keying each channel
+_CURVE_TYPES = {"translate": "animCurveTL", "rotate": "animCurveTA", "scale": "animCurveTU"}
+
+def bake_joint_symmetry(target_joints=None, start_frame=None, end_frame=None):
+    """
+    Bakes the symmetry networks of the scene to keys and removes the networks.
+
+    The world matrices of the source joints and of the target parents are read with OpenMaya in one
+    evaluation pass per frame for every network, the channels of each target joint are computed for all frames at once with the
+    math of symmetry_math, then the networks are deleted and the keys are written with one setAttr
+    call per channel.
+
+    Args:
+        target_joints (list): The target joints to bake. Defaults to every symmetry network in the scene.
+        start_frame (int): The first frame to bake. Defaults to the start of the playback range.
+        end_frame (int): The last frame to bake. Defaults to the end of the playback range.
+
+    Returns:
+        dict: The number of "pairs", "frames" and "keys" baked, the "seconds" it took and the
+            resulting "frames_per_second".
+
+    Raises:
+        ValueError: If the frame range is empty.
+
+    Notes:
+        The networks are deleted and the keys written with maya.cmds, so a bake run inside an undo
+        chunk, as execute does, is undone in one step.
+    """
+    networks = cjs.list_symmetry_networks()
+    if target_joints is not None:
+        networks = [network for network in networks if network.target_joint in target_joints]
+
+    if start_frame is None:
+        start_frame = cmds.playbackOptions(query=True, minTime=True)
+    if end_frame is None:
+        end_frame = cmds.playbackOptions(query=True, maxTime=True)
+    frames = list(range(int(start_frame), int(end_frame) + 1))
+    # Check the range before anything is computed or deleted
+    if not frames:
+        raise ValueError("The frame range {} to {} is empty.".format(start_frame, end_frame))
+
+    start_time = time.time()
+
+    # Compute the channels of every target joint for the whole range while the networks still exist
+    world_matrices = _read_world_matrices(networks, frames)
+    baked_channels = []
+    for network, (source_matrices, parent_matrices) in zip(networks, world_matrices):
+        baked_channels.append((network.target_joint, _compute_target_channels(network, source_matrices, parent_matrices)))
+
+    # Remove the networks so the channels of the target joints can be keyed
+    for network in networks:
+        cjs.delete_symmetry_network(network.target_joint)
+
+    keys = 0
+    for target_joint, transforms in baked_channels:
+        keys += _write_keys(target_joint, frames, transforms)
+
+    seconds = time.time() - start_time
+    frames_per_second = len(frames) / seconds if seconds > 0.0 else float("inf")
+
+    report = {
+        "pairs": len(networks),
+        "frames": len(frames),
+        "keys": keys,
+        "seconds": seconds,
+        "frames_per_second": frames_per_second,
+    }
+    print("Baked {pairs} joint pairs over {frames} frames: {keys} keys in {seconds:.3f} seconds ({frames_per_second:.1f} frames/sec).".format(**report))
+    return report
+
+def _read_world_matrices(networks, frames):
+    """
+    Reads the world matrices of the source joints and of the target parents of networks over a
+    frame range, in one evaluation pass per frame for every network.
+
+    Args:
+        networks (list): The create_joint_symmetry.SymmetryNetworks.
+        frames (list): The frames.
+
+    Returns:
+        list: The (source world matrices, target parent matrices) of each network, each one a list
+            holding the flat matrix of every frame.
+    """
+    # Find the plugs of every network once
+    plugs = [(_find_plug(network.source_joint + ".worldMatrix[0]"), _find_plug(network.target_joint + ".parentMatrix[0]")) for network in networks]
+    matrices = [([], []) for _ in networks]
+
+    time_unit = om.MTime.uiUnit()
+    for frame in frames:
+        # Evaluate every plug at the frame, then restore the context of the scene
+        previous_context = om.MDGContext(om.MTime(frame, time_unit)).makeCurrent()
+        try:
+            for (source_plug, parent_plug), (source_matrices, parent_matrices) in zip(plugs, matrices):
+                source_matrices.append(_matrix_values(source_plug))
+                parent_matrices.append(_matrix_values(parent_plug))
+        finally:
+            previous_context.makeCurrent()
+    return matrices
+
+def _find_plug(name):
+    """
+    Returns the MPlug of a plug name.
+    """
+    selection = om.MSelectionList()
+    selection.add(name)
+    return selection.getPlug(0)
+
+def _matrix_values(plug):
+    """
+    Returns the value of a matrix plug in the current context as a flat list, as getAttr does.
+    """
+    matrix = om.MFnMatrixData(plug.asMObject()).matrix()
+    return [matrix[i] for i in range(16)]
+
+def _compute_target_channels(network, source_matrices, parent_matrices):
+    """
+    Computes the channels a symmetry network drives its target joint to over a frame range.
+
+    Args:
+        network (create_joint_symmetry.SymmetryNetwork): The network.
+        source_matrices (list): The world matrix of the source joint at each frame.
+        parent_matrices (list): The parent matrix of the target joint at each frame.
+
+    Returns:
+        list: The symmetry_math.Transform of the target joint at each frame.
+    """
+    source_joint = network.source_joint
+    target_joint = network.target_joint
+    frame_count = len(source_matrices)
+
+    # The standard network drives the rotate order of the target joint to the one of its source
+    rotate_order = symmetry_math.ROTATE_ORDERS[cmds.getAttr(target_joint + ".rotateOrder")]
+
+    if network.mode in cjs.MATRIX_MODES:
+        # The compact and native networks drive the world matrix to offset matrix * mirrored source
+        offset_matrix = cmds.getAttr(target_joint + ".symmetryOffsetMatrix")
+        world_matrices = [symmetry_math.multiply_matrices(offset_matrix, mirrored) for mirrored in symmetry_math.mirror_matrices(source_matrices, network.axis)]
+        transforms = [symmetry_math.local_transform(world, parent, None, rotate_order) for world, parent in zip(world_matrices, parent_matrices)]
+    else:
+        # The standard network drives the channels to the constraint channels plus the offsets
+        joint_orient = list(cmds.getAttr(source_joint + ".jointOrient")[0])
+        offset = symmetry_math.Transform(
+            list(cmds.getAttr(target_joint + ".offsetTranslate")[0]),
+            list(cmds.getAttr(target_joint + ".offsetRotate")[0]),
+            list(cmds.getAttr(target_joint + ".offsetScale")[0]),
+        )
+        constrained = symmetry_math.compute_constraint_transforms(
+            source_matrices, parent_matrices, network.axis, [joint_orient] * frame_count, [rotate_order] * frame_count)
+        transforms = symmetry_math.apply_offsets(constrained, [offset] * frame_count)
+
+    # Keep the euler curves continuous from frame to frame
+    for i in range(1, frame_count):
+        rotate = symmetry_math.closest_euler(transforms[i].rotate, transforms[i - 1].rotate, rotate_order)
+        transforms[i] = symmetry_math.Transform(transforms[i].translate, rotate, transforms[i].scale)
+
+    return transforms
+
+def _write_keys(target_joint, frames, transforms):
+    """
+    Writes the keys of a target joint with one undoable setAttr call per channel.
+
+    Args:
+        target_joint (str): The target joint.
+        frames (list): The frames.
+        transforms (list): The symmetry_math.Transform of the target joint at each frame.
+
+    Returns:
+        int: The number of keys written.
+    """
+    ui_angle_unit = om.MAngle.uiUnit()
+
+    keys = 0
+    for channel in ["translate", "rotate", "scale"]:
+        for axis_index, axis_name in enumerate(["X", "Y", "Z"]):
+            values = [getattr(transform, channel)[axis_index] for transform in transforms]
+            # setAttr takes the values in UI units, and the rotations are computed in degrees
+            if channel == "rotate":
+                values = [om.MAngle(value, om.MAngle.kDegrees).asUnits(ui_angle_unit) for value in values]
+
+            # Set every key of the curve at once, then connect it to the channel
+            plug = "{}.{}{}".format(target_joint, channel, axis_name)
+            curve = cmds.createNode(_CURVE_TYPES[channel], name="{}_{}{}".format(target_joint, channel, axis_name))
+            time_values = [item for frame, value in zip(frames, values) for item in (frame, value)]
+            cmds.setAttr("{}.keyTimeValue[0:{}]".format(curve, len(frames) - 1), *time_values)
+            cmds.connectAttr(curve + ".output", plug)
+            keys += len(frames)
+    return keys
+
+def execute(start_frame=None, end_frame=None):
+    """
+    Executes the bake of every symmetry network in the scene in a single undo chunk
+
+    Args:
+        start_frame: The first frame to bake. Defaults to the start of the playback range
+        end_frame: The last frame to bake. Defaults to the end of the playback range
+    """
+    try:
+        # Open an undo chunk
+        cmds.undoInfo(openChunk=True)
+        bake_joint_symmetry(start_frame=start_frame, end_frame=end_frame)
+    except Exception as e:
+        # Print the error message
+        cmds.warning("An error occurred: {}".format(str(e)))
+    finally:
+        # Close the undo chunk
+        cmds.undoInfo(closeChunk=True)
+
+if __name__ == '__main__':
+    # Execute the script
+    execute()
@@ -3,14 +3,30 @@
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import os
+import sys
+from collections import Counter, OrderedDict, namedtuple
+
 import maya.cmds as cmds
 
-def create_joint_symmetry(axis="X"):
+import joint_pairing
+import symmetry_callbacks
+import symmetry_index
+import symmetry_math
+import symmetry_plan
+import symmetry_profiler
+import symmetry_progress
+
+# The profiler timing the phases of the builder. Disabled unless JOINT_SYMMETRY_PROFILE is set.
+_profiler = symmetry_profiler.get_profiler()
+
+def create_joint_symmetry(axis="X", mode="standard"):
     """
     Sets up a symmetry constraint between two selected joints in Maya.
 
     Args:
         axis (str): The axis of symmetry. Can be "X", "Y", or "Z".
+        mode (str): The network mode. See NETWORK_MODES.
 
     Returns:
         None
@@ -35,12 +51,307 @@ def create_joint_symmetry(axis="X"):
 
     # Set up the symmetry constraint between the selected joints
     try:
-        set_symmetry_constraint(selected_joints[0], selected_joints[1], axis)
+        set_symmetry_constraint(selected_joints[0], selected_joints[1], axis, mode)
     except Exception as e:
         # Print the error message
         cmds.warning("An error occurred: {}".format(str(e)))
 
-def set_symmetry_constraint(source_joint, target_joint, axis="X"):
+# The network modes. "standard" drives the target joint through a symmetryConstraint and three
+# utility nodes, "compact" drives it through a single multMatrix on its offsetParentMatrix.
+# "native" builds the compact network without any Python callback or connection back from the
+# target joint, so it evaluates in parallel. See _plan_native_symmetry_network.
+NETWORK_MODES = ("standard", "compact", "native")
+
+# The network modes driving the target joint through an offset matrix
+MATRIX_MODES = ("compact", "native")
+
+# The suffixes of the nodes added for the symmetry network of a target joint
+NETWORK_NODE_SUFFIXES = symmetry_index.NETWORK_NODE_SUFFIXES
+
+# The dynamic attributes added to the target joint of a symmetry network
+NETWORK_ATTRIBUTES = ("offsetTranslate", "offsetRotate", "offsetScale", "symmetryOffsetMatrix", "symmetryRestMatrix", "symmetryRestHash",
+                      symmetry_index.SOURCE_ATTRIBUTE, symmetry_index.NODES_ATTRIBUTE, "symmetryConstraintScriptJobIDs")
+
+class SymmetryNetwork(namedtuple("SymmetryNetwork", ["source_joint", "target_joint", "axis", "mode"])):
+    """
+    A symmetry network found in the scene. See list_symmetry_networks.
+    """
+    __slots__ = ()
+
+class RestState(namedtuple("RestState", ["offset", "rest_matrix", "rest_hash"])):
+    """
+    The offset of a pair and the rest pose it was solved from. See compute_rest_states.
+
+    Attributes:
+        offset: The offset of the pair, a symmetry_math.Transform in the standard mode or an offset
+            matrix in the compact and native modes.
+        rest_matrix (list): The world matrix of the target joint at rest.
+        rest_hash (str): A hash of the rest matrices and channels the offset was solved from.
+    """
+    __slots__ = ()
+
+# Name tokens used to find the counterpart of a joint when mirroring a whole hierarchy.
+# Each entry is a (source token, target token) pair.
+DEFAULT_SIDE_TOKENS = joint_pairing.DEFAULT_SIDE_TOKENS
+
+# The distance within which a joint matches the mirrored position of another joint
+DEFAULT_PAIRING_TOLERANCE = 0.01
+
+# The backends building the networks. "cmds" issues one maya.cmds command per node, attribute and
+# connection, "api" builds the whole batch with OpenMaya modifiers in the undoable jointSymmetry command.
+BACKENDS = ("cmds", "api")
+
+# The number of pairs execute_batch builds between two checks for cancellation
+DEFAULT_CHUNK_SIZE = 100
+
+# The plugin defining the jointSymmetry command, next to this module
+_COMMAND_PLUGIN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "joint_symmetry_cmd.py")
+
+def create_joint_symmetry_batch(root_joint=None, pairs=None, axis="X", side_tokens=DEFAULT_SIDE_TOKENS, mode="standard", tolerance=DEFAULT_PAIRING_TOLERANCE, profile=False, backend="cmds", rest_states=None, chunk_size=None, progress=None):
+    """
+    Sets up symmetry constraints for a whole skeleton in one pass.
+
+    The "cmds" backend plans the operations of every pair first and only applies the ones missing
+    from the scene, so running it again on a partly rigged skeleton completes the broken networks.
+    See plan_joint_symmetry_batch.
+
+    Args:
+        root_joint (str): The root joint of the hierarchy to mirror. The joints under it are paired
+            with auto_pair_joints.
+        pairs (list): A list of (source joint, target joint) tuples. Used instead of root_joint if given.
+        axis (str): The axis of symmetry. Can be "X", "Y", or "Z".
+        side_tokens (tuple): The (source token, target token) pairs used to match joints by name.
+        mode (str): The network mode. See NETWORK_MODES.
+        tolerance (float): The distance within which a joint matches the mirrored position of another joint.
+        profile (bool): Whether to profile this batch, on top of the JOINT_SYMMETRY_PROFILE
+            environment variable. The measurements are read with get_profile_report.
+        backend (str): The backend building the networks. See BACKENDS.
+        rest_states (dict): The RestState to build each pair with, keyed by (source joint, target
+            joint) tuple, for example to restore saved offsets. The pairs without one are solved
+            from the current pose. The "api" backend always solves every pair from the current pose.
+        chunk_size (int): The number of pairs the "cmds" backend builds at a time, checking for
+            cancellation between chunks. Defaults to every pair at once. The "api" backend always
+            builds the whole batch in one command.
+        progress (symmetry_progress.ProgressReporter): Reports the built pairs and tells whether
+            the build was cancelled, or None.
+
+    Returns:
+        list: The (source joint, target joint) tuples that were constrained.
+
+    Raises:
+        symmetry_progress.BuildCancelled: If the build was cancelled between two chunks. The pairs
+            of the earlier chunks are built, so run the batch in an undo chunk and undo it to roll
+            it back, as execute_batch does.
+    """
+    # Profile only this batch if asked to, and aggregate across batches otherwise
+    enabled = _profiler.enabled
+    if profile and not enabled:
+        _profiler.reset()
+        _profiler.enabled = True
+    try:
+        with _profiler.session([sys.modules[__name__], symmetry_index, symmetry_plan]):
+            constrained_pairs = _create_joint_symmetry_batch(root_joint, pairs, axis, side_tokens, mode, tolerance, backend, rest_states, chunk_size, progress)
+            _profiler.count_pairs(len(constrained_pairs))
+    finally:
+        _profiler.enabled = enabled
+    return constrained_pairs
+
+def _create_joint_symmetry_batch(root_joint, pairs, axis, side_tokens, mode, tolerance, backend, rest_states, chunk_size, progress):
+    """
+    Sets up symmetry constraints for a whole skeleton in one pass. See create_joint_symmetry_batch.
+    """
+    pairs = _resolve_pairs(root_joint, pairs, axis, side_tokens, tolerance)
+    if not pairs:
+        return []
+
+    if backend == "api":
+        # Build the whole batch in a single undoable command
+        with _profiler.phase("api_command"):
+            load_command_plugin()
+            target_joints = set(cmds.jointSymmetry(source=[pair[0] for pair in pairs], target=[pair[1] for pair in pairs], axis=axis, mode=mode) or [])
+        return [pair for pair in pairs if pair[1] in target_joints]
+
+    return _build_networks(plan_joint_symmetry(pairs, axis, mode, rest_states), chunk_size, progress)
+
+def plan_joint_symmetry_batch(root_joint=None, pairs=None, axis="X", side_tokens=DEFAULT_SIDE_TOKENS, mode="standard", tolerance=DEFAULT_PAIRING_TOLERANCE, rest_states=None):
+    """
+    Plans the operations create_joint_symmetry_batch would apply, without changing the scene.
+
+    Args:
+        See create_joint_symmetry_batch.
+
+    Returns:
+        symmetry_plan.OperationPlan: The operations missing from the scene. Print it as a dry run
+            with its format method.
+    """
+    return plan_joint_symmetry(_resolve_pairs(root_joint, pairs, axis, side_tokens, tolerance), axis, mode, rest_states)
+
+def _resolve_pairs(root_joint, pairs, axis, side_tokens, tolerance):
+    """
+    Pairs the joints of a batch and keeps the pairs whose joints exist, in hierarchy order.
+    """
+    with _profiler.phase("pairing"):
+        if pairs is None:
+            if root_joint is None:
+                cmds.warning("Please specify a root joint or a list of joint pairs.")
+                return []
+            pairs = auto_pair_joints(root_joint, axis=axis, tolerance=tolerance, side_tokens=side_tokens).pairs
+        else:
+            pairs = sort_pairs_by_hierarchy([tuple(pair) for pair in pairs])
+
+    with _profiler.phase("existence_checks"):
+        # Skip the pairs whose joints do not exist, checking every joint in one query
+        existing_joints = set(cmds.ls([joint for pair in pairs for joint in pair], type="joint") or [])
+        for pair in pairs:
+            if not all(joint in existing_joints for joint in pair):
+                cmds.warning("Skipping {} and {}: both must be existing joints.".format(pair[0], pair[1]))
+        pairs = [pair for pair in pairs if all(joint in existing_joints for joint in pair)]
+
+    if not pairs:
+        cmds.warning("No joint pairs were found to set up symmetry constraints.")
+    return pairs
+
+def auto_pair_joints(root_joint, axis="X", tolerance=DEFAULT_PAIRING_TOLERANCE, side_tokens=DEFAULT_SIDE_TOKENS, source_side=1):
+    """
+    Pairs the joints under a root joint with their mirrored counterparts by world position.
+
+    Args:
+        root_joint (str): The root joint of the hierarchy.
+        axis (str): The axis of symmetry. Can be "X", "Y", or "Z".
+        tolerance (float): The distance within which a joint matches the mirrored position of another joint.
+        side_tokens (tuple): The (source token, target token) pairs used to break ties and to pair
+            joints whose positions do not match.
+        source_side (int): 1 if the source joints are on the positive side of the axis, -1 otherwise.
+
+    Returns:
+        joint_pairing.PairingResult: The pairs in hierarchy order and the joints that could not be paired.
+    """
+    joints = list_joints_in_hierarchy(root_joint)
+    positions = [cmds.xform(joint, query=True, translation=True, worldSpace=True) for joint in joints]
+    result = joint_pairing.auto_pair(joints, positions, axis=axis, tolerance=tolerance, side_tokens=side_tokens, source_side=source_side)
+
+    # Report the joints that need attention
+    for joint in result.unmatched:
+        cmds.warning("No mirrored joint was found for {}.".format(joint))
+    for joint, candidates in result.ambiguous:
+        cmds.warning("{} matches more than one joint: {}".format(joint, ", ".join(candidates)))
+
+    return result
+
+def list_joints_in_hierarchy(root_joint):
+    """
+    Lists the joints of a hierarchy in hierarchy order.
+
+    Args:
+        root_joint (str): The root joint of the hierarchy.
+
+    Returns:
+        list: The root joint followed by its descendant joints, parents before children.
+    """
+    # listRelatives returns the deepest descendants first, so reverse it to get parents first
+    descendants = cmds.listRelatives(root_joint, allDescendents=True, type="joint") or []
+    return [root_joint] + list(reversed(descendants))
+
+def sort_pairs_by_hierarchy(pairs):
+    """
+    Sorts joint pairs so that parents are processed before their children.
+
+    Args:
+        pairs (list): A list of (source joint, target joint) tuples.
+
+    Returns:
+        list: The sorted list of pairs.
+    """
+    # The depth of a joint is the number of "|" separators in its long name, queried for all targets at once
+    long_names = cmds.ls([target_joint for _, target_joint in pairs], long=True) or []
+    depths = dict((long_name.split("|")[-1], long_name.count("|")) for long_name in long_names)
+    return sorted(pairs, key=lambda pair: depths.get(pair[1].split("|")[-1], 0))
+
+def compute_rest_states(pairs, axis="X", mode="standard"):
+    """
+    Computes the offsets of a batch of pairs from their current pose, with the rest pose they are
+    solved from.
+
+    Args:
+        pairs (list): A list of (source joint, target joint) tuples.
+        axis (str): The axis of symmetry. Can be "X", "Y", or "Z".
+        mode (str): The network mode. See NETWORK_MODES.
+
+    Returns:
+        list: A RestState for each pair.
+    """
+    return _solve_rest_states(_read_rest_inputs(pairs, mode), axis, mode)
+
+def _read_rest_inputs(pairs, mode, rest_matrices=None):
+    """
+    Reads the matrices and channels the offsets of a batch of pairs depend on, each plug once.
+
+    Args:
+        pairs (list): A list of (source joint, target joint) tuples.
+        mode (str): The network mode. The offset matrices only depend on the world matrices.
+        rest_matrices (list): The rest world matrices of the target joints. Read from the current
+            pose if not given.
+
+    Returns:
+        list: A (source world matrix, target rest matrix, target parent matrix, source joint
+            orient, source rotate order) tuple for each pair. The last three are None in the
+            compact and native modes.
+    """
+    plug_values = {}
+
+    def read(plug):
+        if plug not in plug_values:
+            plug_values[plug] = cmds.getAttr(plug)
+        return plug_values[plug]
+
+    source_matrices = [read(source_joint + ".worldMatrix[0]") for source_joint, _ in pairs]
+    if rest_matrices is None:
+        rest_matrices = [read(target_joint + ".worldMatrix[0]") for _, target_joint in pairs]
+    if mode in MATRIX_MODES:
+        return [(source_matrix, rest_matrix, None, None, None) for source_matrix, rest_matrix in zip(source_matrices, rest_matrices)]
+
+    parent_matrices = [read(target_joint + ".parentMatrix[0]") for _, target_joint in pairs]
+    joint_orients = [list(read(source_joint + ".jointOrient")[0]) for source_joint, _ in pairs]
+    rotate_orders = [symmetry_math.ROTATE_ORDERS[read(source_joint + ".rotateOrder")] for source_joint, _ in pairs]
+    return list(zip(source_matrices, rest_matrices, parent_matrices, joint_orients, rotate_orders))
+
+def _rest_hash(rest_inputs):
+    """
+    Hashes the rest inputs of a pair read by _read_rest_inputs.
+    """
+    source_matrix, rest_matrix, parent_matrix, joint_orient, rotate_order = rest_inputs
+    values = list(source_matrix) + list(rest_matrix)
+    if parent_matrix is not None:
+        values += list(parent_matrix) + list(joint_orient) + [symmetry_math.ROTATE_ORDERS.index(rotate_order)]
+    return symmetry_math.hash_values(values)
+
+def _solve_rest_states(rest_inputs, axis, mode):
+    """
+    Solves the offsets of a batch of pairs from the rest inputs read by _read_rest_inputs.
+
+    Returns:
+        list: A RestState for each pair.
+    """
+    source_matrices = [inputs[0] for inputs in rest_inputs]
+    rest_matrices = [inputs[1] for inputs in rest_inputs]
+    if mode in MATRIX_MODES:
+        offsets = symmetry_math.compute_offset_matrices(source_matrices, rest_matrices, axis)
+    else:
+        parent_matrices = [inputs[2] for inputs in rest_inputs]
+        joint_orients = [inputs[3] for inputs in rest_inputs]
+        rotate_orders = [inputs[4] for inputs in rest_inputs]
+        offsets = symmetry_math.compute_offsets(source_matrices, rest_matrices, parent_matrices, axis, joint_orients, rotate_orders)
+    return [RestState(offset, list(inputs[1]), _rest_hash(inputs)) for offset, inputs in zip(offsets, rest_inputs)]
+
+def load_command_plugin():
+    """
+    Loads the plugin defining the undoable jointSymmetry command used by the "api" backend.
+    """
+    plugin_name = os.path.splitext(os.path.basename(_COMMAND_PLUGIN_PATH))[0]
+    if not cmds.pluginInfo(plugin_name, query=True, loaded=True):
+        cmds.loadPlugin(_COMMAND_PLUGIN_PATH, quiet=True)
+
+def set_symmetry_constraint(source_joint, target_joint, axis="X", mode="standard"):
     """
     Creates a symmetry constraint between the source and target joints.
 
@@ -48,194 +359,866 @@ def set_symmetry_constraint(source_joint, target_joint, axis="X"):
         source_joint (str): The source joint.
         target_joint (str): The target joint.
         axis (str): The axis of symmetry. Can be "X", "Y", or "Z".
+        mode (str): The network mode. See NETWORK_MODES.
 
     Returns:
         None
 
-    Raises:
-        RuntimeError: If the source joint already has a symmetry constraint.
-        RuntimeError: If the target joint already has a symmetry constraint.
-
     Notes:
         The source joint is the joint that will drive the target joint.
         The target joint is the joint that will be driven by the source joint.
 
         The axis of symmetry is the axis that the target joint will be mirrored across.
         For example, if the axis of symmetry is "X", the target joint will be mirrored across the X axis.
+
+        The "compact" mode gives the same rest pose with one node and four connections per pair.
+        While the source joint moves, its offset is applied in the local space of the mirrored
+        source instead of being added to the euler channels, so both modes only move identically
+        when the offsets are zero. The "native" mode moves like the compact mode, without cleanup
+        callbacks: its nodes are left behind when one of its joints is deleted, until the scene is
+        audited.
+
+        A pair whose network already exists in the same mode is completed instead of skipped: only
+        the nodes, attributes and connections missing from the scene are added, and the stored
+        offsets are kept.
     """
-    # Check if the source joint already has a symmetry constraint
-    if cmds.objExists(source_joint + "_symmetry_constraint"):
-        cmds.warning("The source joint already has a symmetry constraint. Please delete it before running this script.")
-        return
+    with _profiler.session([sys.modules[__name__], symmetry_index, symmetry_plan]):
+        constrained_pairs = _build_networks(plan_joint_symmetry([(source_joint, target_joint)], axis, mode))
+        _profiler.count_pairs(len(constrained_pairs))
 
-    # Check if the target joint already has a symmetry constraint
-    if cmds.objExists(target_joint + "_symmetry_constraint"):
-        cmds.warning("The target joint already has a symmetry constraint. Please delete it before running this script.")
-        return
+def plan_joint_symmetry(pairs, axis="X", mode="standard", rest_states=None):
+    """
+    Plans the operations building the symmetry networks of a batch of pairs, without changing the scene.
+
+    Every node, attribute, value and connection of every pair is planned first, then the plan is
+    diffed against the scene, so it only holds the operations that are missing. The pairs whose
+    network already exists in the same mode are planned again with the offsets stored on their
+    target joint, so a partly built network is completed. The pairs whose joints belong to another
+    network are skipped with a warning.
+
+    Args:
+        pairs (list): A list of (source joint, target joint) tuples, in hierarchy order.
+        axis (str): The axis of symmetry. Can be "X", "Y", or "Z".
+        mode (str): The network mode. See NETWORK_MODES.
+        rest_states (dict): The RestState to build each pair with, keyed by (source joint, target
+            joint) tuple. The new pairs without one are solved from the current pose.
+
+    Returns:
+        symmetry_plan.OperationPlan: The missing operations. Its owners map each planned target
+            joint to its (source joint, network nodes) tuple, the nodes keyed by their suffix.
+    """
+    with _profiler.phase("existence_checks"):
+        index = symmetry_index.get_index()
+        index.ensure_built()
+
+        # Skip the pairs whose joints belong to another network, or to an earlier pair of the batch
+        claimed_joints = set()
+        planned_pairs = []
+        for pair in pairs:
+            for joint in pair:
+                network = index.find(joint)
+                if joint in claimed_joints or (network is not None and not _is_network_of(network, pair, mode)):
+                    cmds.warning("{} already has a symmetry constraint. Please delete it before running this script.".format(joint))
+                    break
+            else:
+                claimed_joints.update(pair)
+                planned_pairs.append(pair)
+
+        # The existing networks keep the offsets and rest pose stored on their target joint, if
+        # none of their attributes were deleted
+        existing_targets = [pair[1] for pair in planned_pairs if index.get(pair[1]) is not None]
+        stored_attributes = (["symmetryOffsetMatrix"] if mode in MATRIX_MODES else ["offsetTranslate", "offsetRotate", "offsetScale"]) + ["symmetryRestMatrix", "symmetryRestHash"]
+        stored_plugs = []
+        if existing_targets:
+            stored_plugs = cmds.ls([target_joint + "." + attribute for target_joint in existing_targets for attribute in stored_attributes]) or []
+        stored_counts = Counter(plug.partition(".")[0] for plug in stored_plugs)
+        stored_targets = set(target_joint for target_joint, count in stored_counts.items() if count == len(stored_attributes))
+
+    with _profiler.phase("offset_solve"):
+        # Solve the offsets of the new pairs at once, before any network changes the pose
+        rest_states = dict(rest_states or {})
+        solved_pairs = [pair for pair in planned_pairs if pair not in rest_states and pair[1] not in stored_targets]
+        rest_states.update(zip(solved_pairs, compute_rest_states(solved_pairs, axis, mode)))
 
-    # Check if the offset attributes already exist on the target joint
-    # If they do, delete them
-    if cmds.objExists(target_joint + ".offsetTranslate"):
-        cmds.deleteAttr(target_joint + ".offsetTranslate")
-    if cmds.objExists(target_joint + ".offsetRotate"):
-        cmds.deleteAttr(target_joint + ".offsetRotate")
-    if cmds.objExists(target_joint + ".offsetScale"):
-        cmds.deleteAttr(target_joint + ".offsetScale")
+    with _profiler.phase("plan"):
+        # The native networks read the parents of their target joints, found with one query
+        parent_joints = {}
+        if mode == "native" and planned_pairs:
+            for long_name in cmds.ls([target_joint for _, target_joint in planned_pairs], long=True) or []:
+                names = long_name.split("|")
+                parent_joints[names[-1]] = names[-2] if len(names) > 2 else None
+
+        plan = symmetry_plan.OperationPlan()
+        plan_network = _plan_compact_symmetry_network if mode == "compact" else _plan_symmetry_network
+        for source_joint, target_joint in planned_pairs:
+            # Reuse the nodes still linked to the target joint, even if they were renamed
+            network = index.entry(target_joint)
+            existing_nodes = network.nodes() if network is not None else {}
+            rest_state = rest_states.get((source_joint, target_joint))
+            if mode == "native":
+                _plan_native_symmetry_network(plan, source_joint, target_joint, axis, rest_state, existing_nodes, parent_joints.get(target_joint.split("|")[-1]))
+            else:
+                plan_network(plan, source_joint, target_joint, axis, rest_state, existing_nodes)
+
+    with _profiler.phase("diff"):
+        return plan.diff()
+
+def _is_network_of(network, pair, mode):
+    """
+    Checks whether an indexed network is the network of a pair in a mode.
+    """
+    source_joint, target_joint = [joint.split("|")[-1] for joint in pair]
+    return network.source_joint == source_joint and network.target_joint == target_joint and network.mode == mode
+
+def _build_networks(plan, chunk_size=None, progress=None):
+    """
+    Executes a plan of symmetry networks, then indexes the networks and registers their cleanup callbacks.
+
+    Args:
+        plan (symmetry_plan.OperationPlan): The plan returned by plan_joint_symmetry.
+        chunk_size (int): The number of networks to build at a time. Defaults to every network at once.
+        progress (symmetry_progress.ProgressReporter): Reports the built networks and tells
+            whether the build was cancelled, or None.
+
+    Returns:
+        list: The (source joint, target joint) tuples whose networks were built or completed.
+
+    Raises:
+        symmetry_progress.BuildCancelled: If the build was cancelled between two chunks.
+    """
+    chunks = plan.split(chunk_size) if chunk_size else [plan]
+    if progress is None:
+        return [pair for chunk in chunks for pair in _build_network_chunk(chunk)]
+
+    constrained_pairs = []
+    progress.start(len(plan.owners))
+    try:
+        for chunk in chunks:
+            if progress.is_cancelled():
+                raise symmetry_progress.BuildCancelled(constrained_pairs)
+            constrained_pairs += _build_network_chunk(chunk)
+            progress.advance(len(chunk.owners))
+    finally:
+        progress.end()
+    return constrained_pairs
+
+def _build_network_chunk(plan):
+    """
+    Executes a chunk of a plan of symmetry networks. See _build_networks.
+    """
+    failures = plan.execute()
+
+    index = symmetry_index.get_index()
+    constrained_pairs = []
+    with _profiler.phase("register_callbacks"):
+        for target_joint, (source_joint, nodes) in plan.owners.items():
+            if target_joint in failures:
+                # Report the failing pair, the rest of the hierarchy was built
+                cmds.warning("Failed to set up symmetry between {} and {}: {}".format(source_joint, target_joint, str(failures[target_joint])))
+                continue
+
+            # Index the network with the names its nodes were created with
+            nodes = dict((suffix, plan.resolve(node)) for suffix, node in nodes.items())
+            index.add(source_joint, target_joint, nodes)
+
+            # Delete the added elements when the network or one of its joints is deleted. The
+            # native networks keep Python out of the graph, and are cleaned up by the audit instead.
+            if "_symmetry_native_matrix" not in nodes:
+                driver = [nodes[suffix] for suffix in symmetry_index.DRIVER_SUFFIXES if suffix in nodes][0]
+                _register_cleanup_callbacks(source_joint, target_joint, driver)
+            constrained_pairs.append((source_joint, target_joint))
+
+    return constrained_pairs
+
+def _plan_symmetry_network(plan, source_joint, target_joint, axis, rest_state, existing_nodes):
+    """
+    Plans the symmetry constraint network for one pair of joints.
+
+    Args:
+        plan (symmetry_plan.OperationPlan): The plan to add the operations to.
+        source_joint (str): The source joint.
+        target_joint (str): The target joint.
+        axis (str): The axis of symmetry. Can be "X", "Y", or "Z".
+        rest_state (RestState): The offsets of the pair, or None to keep the offsets stored on the
+            target joint.
+        existing_nodes (dict): The nodes still linked to the target joint, keyed by their suffix.
+    """
+    nodes = _plan_network_nodes(plan, source_joint, target_joint, NETWORK_NODE_SUFFIXES[:4], existing_nodes)
+    sym_node, pma_node_trans, pma_node_rot, pma_node_scale = [nodes[suffix] for suffix in NETWORK_NODE_SUFFIXES[:4]]
 
     # Add the offset attributes to the target joint
-    cmds.addAttr(target_joint, longName="offsetTranslate", attributeType="double3", keyable=True)
-    cmds.addAttr(target_joint, longName="offsetTranslateX", attributeType="double", defaultValue=0.0, keyable=True, parent="offsetTranslate")
-    cmds.addAttr(target_joint, longName="offsetTranslateY", attributeType="double", defaultValue=0.0, keyable=True, parent="offsetTranslate")
-    cmds.addAttr(target_joint, longName="offsetTranslateZ", attributeType="double", defaultValue=0.0, keyable=True, parent="offsetTranslate")
-    cmds.addAttr(target_joint, longName="offsetRotate", attributeType="double3", keyable=True)
-    cmds.addAttr(target_joint, longName="offsetRotateX", attributeType="double", defaultValue=0.0, keyable=True, parent="offsetRotate")
-    cmds.addAttr(target_joint, longName="offsetRotateY", attributeType="double", defaultValue=0.0, keyable=True, parent="offsetRotate")
-    cmds.addAttr(target_joint, longName="offsetRotateZ", attributeType="double", defaultValue=0.0, keyable=True, parent="offsetRotate")
-    cmds.addAttr(target_joint, longName="offsetScale", attributeType="double3", keyable=True)
-    cmds.addAttr(target_joint, longName="offsetScaleX", attributeType="double", defaultValue=1.0, keyable=True, parent="offsetScale")
-    cmds.addAttr(target_joint, longName="offsetScaleY", attributeType="double", defaultValue=1.0, keyable=True, parent="offsetScale")
-    cmds.addAttr(target_joint, longName="offsetScaleZ", attributeType="double", defaultValue=1.0, keyable=True, parent="offsetScale")
-
-    # Create a name for the symmetry constraint node
-    symmetry_constraint_name = target_joint + "_symmetry_constraint"
-
-    # Create the symmetry constraint and parent it to the target joint
-    sym_node = cmds.createNode("symmetryConstraint", name=symmetry_constraint_name, parent=target_joint)
-
-    # Set the axis attribute of the symmetry constraint
-    cmds.setAttr(sym_node + ".{}Axis".format(axis.lower()), 1)
-
-    # Set the other axis attributes to 0
+    for attribute, default_value in [("offsetTranslate", 0.0), ("offsetRotate", 0.0), ("offsetScale", 1.0)]:
+        plan.add_attr(target_joint, target_joint, attribute, attributeType="double3", keyable=True)
+        for axis_name in ["X", "Y", "Z"]:
+            plan.add_attr(target_joint, target_joint, attribute + axis_name, attributeType="double", defaultValue=default_value, keyable=True, parent=attribute)
+
+    # Add the attributes storing the rest pose the offsets are solved from and the network links
+    _plan_rest_attributes(plan, target_joint)
+    _plan_link_attributes(plan, target_joint)
+
+    # Create the symmetry constraint under the target joint and the utility nodes offsetting it
+    plan.create_node(target_joint, sym_node, "symmetryConstraint", parent=target_joint)
+    plan.create_node(target_joint, pma_node_trans, "plusMinusAverage")
+    plan.create_node(target_joint, pma_node_rot, "plusMinusAverage")
+    plan.create_node(target_joint, pma_node_scale, "multiplyDivide")
+
+    # Set the axis attribute of the symmetry constraint, and the other axis attributes to 0
     for axis_name in ["X", "Y", "Z"]:
-        if axis_name != axis:
-            cmds.setAttr(sym_node + ".{}Axis".format(axis_name.lower()), 0)
-
-    # Check if plus minus average nodes already exist on the target joint
-    # If they do, delete them
-    if cmds.objExists(target_joint + "_pma_translate"):
-        cmds.delete(target_joint + "_pma_translate")
-    if cmds.objExists(target_joint + "_pma_rotate"):
-        cmds.delete(target_joint + "_pma_rotate")
-    if cmds.objExists(target_joint + "_pma_scale"):
-        cmds.delete(target_joint + "_pma_scale")
-
-    # Create a plus minus average node to offset the target joint
-    pma_node_trans = cmds.createNode("plusMinusAverage", name=target_joint + "_pma_translate")
-    pma_node_rot = cmds.createNode("plusMinusAverage", name=target_joint + "_pma_rotate")
-    pma_node_scale = cmds.createNode("multiplyDivide", name=target_joint + "_pma_scale")
+        plan.set_attr(target_joint, sym_node + ".{}Axis".format(axis_name.lower()), 1 if axis_name == axis else 0)
+
+    # Set the offset values and the rest pose on the target joint
+    if rest_state is not None:
+        _plan_offsets(plan, target_joint, rest_state.offset, "standard")
+        _plan_rest_state(plan, target_joint, rest_state)
 
     # Connect the attributes between the source and target joints
-    cmds.connectAttr(source_joint + ".translate", sym_node + ".targetTranslate")
-    cmds.connectAttr(source_joint + ".rotate", sym_node + ".targetRotate")
-    cmds.connectAttr(source_joint + ".scale", sym_node + ".targetScale")
-    cmds.connectAttr(source_joint + ".parentMatrix[0]", sym_node + ".targetParentMatrix")
-    cmds.connectAttr(source_joint + ".worldMatrix[0]", sym_node + ".targetWorldMatrix")
-    cmds.connectAttr(source_joint + ".rotateOrder", sym_node + ".targetRotateOrder")
-    cmds.connectAttr(source_joint + ".jointOrient", sym_node + ".targetJointOrient")
-
-    # Get the offset values between the source and target joints
-    mat_source = cmds.xform(source_joint, query=True, matrix=True, worldSpace=True)
-    constrained_trans = cmds.getAttr(sym_node + ".constraintTranslate")[0]
-    mat_target = cmds.xform(target_joint, query=True, matrix=True, worldSpace=True)
-    offset_translate = [mat_target[12] - constrained_trans[0], mat_target[13] - constrained_trans[1], mat_target[14] - constrained_trans[2]]
-    # Convert the matrices to euler rotations and calculate the offset
-    euler_source = cmds.xform(source_joint, query=True, rotation=True, worldSpace=True)
-    euler_target = cmds.xform(target_joint, query=True, rotation=True, worldSpace=True)
-    offset_rotate = [euler_target[i] - euler_source[i] for i in range(3)]
-    offset_scale = [mat_target[0] / mat_source[0], mat_target[5] / mat_source[5], mat_target[10] / mat_source[10]]
-
-    # Set the offset values on the target joint
-    cmds.setAttr(target_joint + ".offsetTranslate", offset_translate[0], offset_translate[1], offset_translate[2], type="double3")
-    cmds.setAttr(target_joint + ".offsetRotate", offset_rotate[0], offset_rotate[1], offset_rotate[2], type="double3")
-    cmds.setAttr(target_joint + ".offsetScale", offset_scale[0], offset_scale[1], offset_scale[2], type="double3")
-
-    cmds.connectAttr(sym_node + ".constraintTranslate", pma_node_trans + ".input3D[0]")
-    cmds.connectAttr(sym_node + ".constraintRotate", pma_node_rot + ".input3D[0]")
-    cmds.connectAttr(sym_node + ".constraintScale", pma_node_scale + ".input1")
-    cmds.connectAttr(sym_node + ".constraintRotateOrder", target_joint + ".rotateOrder")
-    cmds.connectAttr(sym_node + ".targetJointOrient", target_joint + ".jointOrient")
-    cmds.connectAttr(target_joint + ".parentInverseMatrix[0]", sym_node + ".constraintInverseParentWorldMatrix")
-    cmds.connectAttr(target_joint + ".offsetTranslate", pma_node_trans + ".input3D[1]")
-    cmds.connectAttr(target_joint + ".offsetRotate", pma_node_rot + ".input3D[1]")
-    cmds.connectAttr(target_joint + ".offsetScale", pma_node_scale + ".input2")
-    cmds.connectAttr(pma_node_trans + ".output3D", target_joint + ".translate")
-    cmds.connectAttr(pma_node_rot + ".output3D", target_joint + ".rotate")
-    cmds.connectAttr(pma_node_scale + ".output", target_joint + ".scale")
-
-    def delete_added_elements():
-        """
-        Deletes the added elements on the target joint
-        """
-        # Delete the added attributes on the target joint if they exist
-        if cmds.objExists(target_joint + ".offsetTranslate"):
-            cmds.deleteAttr(target_joint + ".offsetTranslate")
-        if cmds.objExists(target_joint + ".offsetRotate"):
-            cmds.deleteAttr(target_joint + ".offsetRotate")
-        if cmds.objExists(target_joint + ".offsetScale"):
-            cmds.deleteAttr(target_joint + ".offsetScale")
-
-        # Delete the added plus minus average nodes on the target joint if they exist
-        if cmds.objExists(target_joint + "_pma_translate"):
-            cmds.delete(target_joint + "_pma_translate")
-        if cmds.objExists(target_joint + "_pma_rotate"):
-            cmds.delete(target_joint + "_pma_rotate")
-        if cmds.objExists(target_joint + "_pma_scale"):
-            cmds.delete(target_joint + "_pma_scale")
-
-        # Delete the symmetry constraint node if it exists
-        if cmds.objExists(sym_node):
-            cmds.delete(sym_node)
-
-        # Delete the added attribute for the script job IDs on the target joint if it exists
-        if cmds.objExists(target_joint + ".symmetryConstraintScriptJobIDs"):
-            cmds.deleteAttr(target_joint + ".symmetryConstraintScriptJobIDs")
-
-        for job_id in job_id_list:
-            # Delete the script job
+    plan.connect(target_joint, source_joint + ".translate", sym_node + ".targetTranslate")
+    plan.connect(target_joint, source_joint + ".rotate", sym_node + ".targetRotate")
+    plan.connect(target_joint, source_joint + ".scale", sym_node + ".targetScale")
+    plan.connect(target_joint, source_joint + ".parentMatrix[0]", sym_node + ".targetParentMatrix")
+    plan.connect(target_joint, source_joint + ".worldMatrix[0]", sym_node + ".targetWorldMatrix")
+    plan.connect(target_joint, source_joint + ".rotateOrder", sym_node + ".targetRotateOrder")
+    plan.connect(target_joint, source_joint + ".jointOrient", sym_node + ".targetJointOrient")
+    plan.connect(target_joint, sym_node + ".constraintTranslate", pma_node_trans + ".input3D[0]")
+    plan.connect(target_joint, sym_node + ".constraintRotate", pma_node_rot + ".input3D[0]")
+    plan.connect(target_joint, sym_node + ".constraintScale", pma_node_scale + ".input1")
+    plan.connect(target_joint, sym_node + ".constraintRotateOrder", target_joint + ".rotateOrder")
+    plan.connect(target_joint, sym_node + ".targetJointOrient", target_joint + ".jointOrient")
+    plan.connect(target_joint, target_joint + ".parentInverseMatrix[0]", sym_node + ".constraintInverseParentWorldMatrix")
+    plan.connect(target_joint, target_joint + ".offsetTranslate", pma_node_trans + ".input3D[1]")
+    plan.connect(target_joint, target_joint + ".offsetRotate", pma_node_rot + ".input3D[1]")
+    plan.connect(target_joint, target_joint + ".offsetScale", pma_node_scale + ".input2")
+    plan.connect(target_joint, pma_node_trans + ".output3D", target_joint + ".translate")
+    plan.connect(target_joint, pma_node_rot + ".output3D", target_joint + ".rotate")
+    plan.connect(target_joint, pma_node_scale + ".output", target_joint + ".scale")
+
+    # Link the network to the target joint
+    _plan_links(plan, source_joint, target_joint, nodes)
+
+def _plan_compact_symmetry_network(plan, source_joint, target_joint, axis, rest_state, existing_nodes):
+    """
+    Plans the compact, matrix based symmetry network for one pair of joints.
+
+    The target joint is driven through its offsetParentMatrix by a single multMatrix node computing
+    symmetryOffsetMatrix * mirror * source world matrix * mirror * target parent inverse matrix.
+    The local channels of the target joint are reset, so its whole pose lives in the offset matrix.
+
+    Args:
+        plan (symmetry_plan.OperationPlan): The plan to add the operations to.
+        source_joint (str): The source joint.
+        target_joint (str): The target joint.
+        axis (str): The axis of symmetry. Can be "X", "Y", or "Z".
+        rest_state (RestState): The offset matrix of the pair, or None to keep the offset matrix
+            stored on the target joint.
+        existing_nodes (dict): The nodes still linked to the target joint, keyed by their suffix.
+    """
+    nodes = _plan_network_nodes(plan, source_joint, target_joint, ["_symmetry_mult_matrix"], existing_nodes)
+    mult_node = nodes["_symmetry_mult_matrix"]
+
+    # Add the offset matrix attribute to the target joint
+    plan.add_attr(target_joint, target_joint, "symmetryOffsetMatrix", attributeType="matrix")
+    _plan_rest_attributes(plan, target_joint)
+    _plan_link_attributes(plan, target_joint)
+
+    if rest_state is not None:
+        _plan_offsets(plan, target_joint, rest_state.offset, "compact")
+        _plan_rest_state(plan, target_joint, rest_state)
+
+        # Reset the local channels of the target joint, the offset matrix holds its pose
+        plan.set_attr(target_joint, target_joint + ".translate", 0.0, 0.0, 0.0, type="double3")
+        plan.set_attr(target_joint, target_joint + ".rotate", 0.0, 0.0, 0.0, type="double3")
+        plan.set_attr(target_joint, target_joint + ".jointOrient", 0.0, 0.0, 0.0, type="double3")
+        plan.set_attr(target_joint, target_joint + ".scale", 1.0, 1.0, 1.0, type="double3")
+
+    # Create the mult matrix node and set the constant mirror matrices
+    mirror = symmetry_math.mirror_matrix(axis)
+    plan.create_node(target_joint, mult_node, "multMatrix")
+    plan.set_attr(target_joint, mult_node + ".matrixIn[1]", *mirror, type="matrix")
+    plan.set_attr(target_joint, mult_node + ".matrixIn[3]", *mirror, type="matrix")
+
+    # Connect the matrices
+    plan.connect(target_joint, target_joint + ".symmetryOffsetMatrix", mult_node + ".matrixIn[0]")
+    plan.connect(target_joint, source_joint + ".worldMatrix[0]", mult_node + ".matrixIn[2]")
+    plan.connect(target_joint, target_joint + ".parentInverseMatrix[0]", mult_node + ".matrixIn[4]")
+    plan.connect(target_joint, mult_node + ".matrixSum", target_joint + ".offsetParentMatrix")
+
+    # Link the network to the target joint
+    _plan_links(plan, source_joint, target_joint, nodes)
+
+def _plan_native_symmetry_network(plan, source_joint, target_joint, axis, rest_state, existing_nodes, parent_joint):
+    """
+    Plans the native symmetry network for one pair of joints, built for parallel evaluation.
+
+    The target joint is driven through its offsetParentMatrix by a single multMatrix node, like in
+    the compact mode, but no node of the network reads the target joint: the offset matrix is set on
+    the node instead of being connected from the target joint, and the inverse world matrix of the
+    parent replaces the parent inverse matrix of the target joint. The network then has no cycle
+    through the target joint at the node level, and no cleanup callback is registered for it, so
+    the evaluation manager can schedule it in parallel and cache it. The target joint still stores
+    the offset matrix and the rest pose, for resyncing and saving the network.
+
+    Args:
+        plan (symmetry_plan.OperationPlan): The plan to add the operations to.
+        source_joint (str): The source joint.
+        target_joint (str): The target joint.
+        axis (str): The axis of symmetry. Can be "X", "Y", or "Z".
+        rest_state (RestState): The offset matrix of the pair, or None to keep the offset matrix
+            stored on the target joint.
+        existing_nodes (dict): The nodes still linked to the target joint, keyed by their suffix.
+        parent_joint (str): The parent of the target joint, or None if it has no parent.
+
+    Notes:
+        The network reads the parent the target joint had when it was built. Build it again after
+        reparenting the target joint.
+    """
+    nodes = _plan_network_nodes(plan, source_joint, target_joint, ["_symmetry_native_matrix"], existing_nodes)
+    mult_node = nodes["_symmetry_native_matrix"]
+
+    # Add the offset matrix attribute to the target joint, only to store the offset
+    plan.add_attr(target_joint, target_joint, "symmetryOffsetMatrix", attributeType="matrix")
+    _plan_rest_attributes(plan, target_joint)
+    _plan_link_attributes(plan, target_joint)
+
+    # Create the mult matrix node and set the constant mirror matrices
+    mirror = symmetry_math.mirror_matrix(axis)
+    plan.create_node(target_joint, mult_node, "multMatrix")
+    plan.set_attr(target_joint, mult_node + ".matrixIn[1]", *mirror, type="matrix")
+    plan.set_attr(target_joint, mult_node + ".matrixIn[3]", *mirror, type="matrix")
+
+    if rest_state is not None:
+        _plan_offsets(plan, target_joint, rest_state.offset, "native", mult_node)
+        _plan_rest_state(plan, target_joint, rest_state)
+
+        # Reset the local channels of the target joint, the offset matrix holds its pose
+        plan.set_attr(target_joint, target_joint + ".translate", 0.0, 0.0, 0.0, type="double3")
+        plan.set_attr(target_joint, target_joint + ".rotate", 0.0, 0.0, 0.0, type="double3")
+        plan.set_attr(target_joint, target_joint + ".jointOrient", 0.0, 0.0, 0.0, type="double3")
+        plan.set_attr(target_joint, target_joint + ".scale", 1.0, 1.0, 1.0, type="double3")
+    else:
+        # Set the offset matrix stored on the target joint, in case the node is created again
+        plan.set_attr(target_joint, mult_node + ".matrixIn[0]", *cmds.getAttr(target_joint + ".symmetryOffsetMatrix"), type="matrix")
+
+    # Connect the matrices. A joint without a parent needs no parent inverse matrix.
+    plan.connect(target_joint, source_joint + ".worldMatrix[0]", mult_node + ".matrixIn[2]")
+    if parent_joint is not None:
+        plan.connect(target_joint, parent_joint + ".worldInverseMatrix[0]", mult_node + ".matrixIn[4]")
+    plan.connect(target_joint, mult_node + ".matrixSum", target_joint + ".offsetParentMatrix")
+
+    # Link the network to the target joint
+    _plan_links(plan, source_joint, target_joint, nodes)
+
+def _plan_network_nodes(plan, source_joint, target_joint, suffixes, existing_nodes):
+    """
+    Names the nodes of the network of a target joint and registers the network as an owner of the plan.
+
+    The nodes still linked to the target joint keep their names, and the linked nodes of the other
+    network mode are deleted.
+
+    Returns:
+        dict: The name of each node, keyed by its suffix.
+    """
+    nodes = dict((suffix, existing_nodes.get(suffix, target_joint + suffix)) for suffix in suffixes)
+    for suffix, node in existing_nodes.items():
+        if suffix not in nodes:
+            plan.delete_node(target_joint, node)
+    plan.owners[target_joint] = (source_joint, nodes)
+    return nodes
+
+def _plan_offsets(plan, target_joint, offset, mode, driver=None):
+    """
+    Plans the offset attributes of the network of a target joint.
+
+    Args:
+        plan (symmetry_plan.OperationPlan): The plan to add the operations to.
+        target_joint (str): The target joint.
+        offset: A symmetry_math.Transform in the standard mode or an offset matrix in the compact
+            and native modes.
+        mode (str): The network mode. See NETWORK_MODES.
+        driver (str): The node driving the target joint. The native mode also sets the offset
+            matrix on it.
+    """
+    if mode in MATRIX_MODES:
+        plan.set_attr(target_joint, target_joint + ".symmetryOffsetMatrix", *offset, type="matrix")
+        if mode == "native":
+            plan.set_attr(target_joint, driver + ".matrixIn[0]", *offset, type="matrix")
+        return
+    plan.set_attr(target_joint, target_joint + ".offsetTranslate", offset.translate[0], offset.translate[1], offset.translate[2], type="double3")
+    plan.set_attr(target_joint, target_joint + ".offsetRotate", offset.rotate[0], offset.rotate[1], offset.rotate[2], type="double3")
+    plan.set_attr(target_joint, target_joint + ".offsetScale", offset.scale[0], offset.scale[1], offset.scale[2], type="double3")
+
+def _plan_rest_attributes(plan, target_joint):
+    """
+    Plans the attributes storing the rest pose of a network on its target joint.
+    """
+    plan.add_attr(target_joint, target_joint, "symmetryRestMatrix", attributeType="matrix")
+    plan.add_attr(target_joint, target_joint, "symmetryRestHash", dataType="string")
+
+def _plan_link_attributes(plan, target_joint):
+    """
+    Plans the message attributes linking a network to its target joint.
+    """
+    plan.add_attr(target_joint, target_joint, symmetry_index.SOURCE_ATTRIBUTE, attributeType="message")
+    plan.add_attr(target_joint, target_joint, symmetry_index.NODES_ATTRIBUTE, attributeType="message", multi=True)
+
+def _plan_links(plan, source_joint, target_joint, nodes):
+    """
+    Plans the connections of the source joint and the nodes of a network to the link attributes of
+    its target joint.
+
+    Args:
+        plan (symmetry_plan.OperationPlan): The plan to add the operations to.
+        source_joint (str): The source joint.
+        target_joint (str): The target joint.
+        nodes (dict): The name of each network node, keyed by its suffix. See NETWORK_NODE_SUFFIXES.
+    """
+    plan.connect(target_joint, source_joint + ".message", target_joint + "." + symmetry_index.SOURCE_ATTRIBUTE)
+    for suffix, node in sorted(nodes.items(), key=lambda item: NETWORK_NODE_SUFFIXES.index(item[0])):
+        plan.connect(target_joint, node + ".message", "{}.{}[{}]".format(target_joint, symmetry_index.NODES_ATTRIBUTE, NETWORK_NODE_SUFFIXES.index(suffix)))
+
+def _plan_rest_state(plan, target_joint, rest_state):
+    """
+    Plans the rest pose a network was solved from on its target joint.
+    """
+    plan.set_attr(target_joint, target_joint + ".symmetryRestMatrix", *rest_state.rest_matrix, type="matrix")
+    plan.set_attr(target_joint, target_joint + ".symmetryRestHash", rest_state.rest_hash, type="string")
+
+def _register_cleanup_callbacks(source_joint, target_joint, network_node):
+    """
+    Registers a symmetry network so it is deleted once it is no longer valid.
+
+    Args:
+        source_joint (str): The source joint.
+        target_joint (str): The target joint.
+        network_node (str): The node driving the target joint.
+    """
+    # Delete the network when its driving node or one of its joints is deleted
+    symmetry_callbacks.get_registry().register(target_joint, [network_node, target_joint, source_joint], delete_symmetry_network)
+
+def relink_symmetry_networks(networks=None):
+    """
+    Registers the cleanup callbacks of symmetry networks that already exist, for example after the
+    scene they were saved in is opened again.
+
+    Args:
+        networks (list): The SymmetryNetworks to relink. Defaults to every network in the scene.
+
+    Returns:
+        list: The SymmetryNetworks that were relinked.
+    """
+    if networks is None:
+        networks = list_symmetry_networks()
+    index = symmetry_index.get_index()
+    relinked_networks = []
+    for network in networks:
+        indexed_network = index.get(network.target_joint)
+        # The native networks are never watched
+        if indexed_network is not None and indexed_network.mode != "native":
+            _register_cleanup_callbacks(network.source_joint, network.target_joint, indexed_network.driver)
+            relinked_networks.append(network)
+    return relinked_networks
+
+def link_symmetry_networks(target_joints):
+    """
+    Links the symmetry networks built by older versions of the tool to their target joints with
+    message connections, so they are no longer found by the names of their nodes.
+
+    Args:
+        target_joints (list): The target joints of the networks.
+
+    Returns:
+        list: The target joints whose networks were linked.
+    """
+    index = symmetry_index.get_index()
+    plan = symmetry_plan.OperationPlan()
+    for target_joint in target_joints:
+        network = index.get(target_joint)
+        if network is None or network.linked:
+            continue
+        nodes = network.nodes()
+        plan.owners[target_joint] = (network.source_joint, nodes)
+        _plan_link_attributes(plan, target_joint)
+        _plan_links(plan, network.source_joint, target_joint, nodes)
+    return [target_joint for _, target_joint in _build_networks(plan.diff())]
+
+def delete_symmetry_network(target_joint):
+    """
+    Deletes the symmetry network driving a target joint, in either network mode.
+
+    Args:
+        target_joint (str): The target joint.
+    """
+    # The network no longer needs to be watched or indexed
+    symmetry_callbacks.get_registry().unregister(target_joint)
+    networks = symmetry_index.get_index().remove(target_joint)
+
+    # The target joint is gone when its deletion tore the network down
+    _delete_networks(networks, [target_joint] if cmds.objExists(target_joint) else [])
+
+def delete_symmetry_networks(target_joints=None):
+    """
+    Deletes the symmetry networks of many target joints at once, in either network mode.
+
+    The attributes of every target joint are found with one query and the nodes of every network
+    are deleted with one command.
+
+    Args:
+        target_joints (list): The target joints. Defaults to every network in the scene.
+
+    Returns:
+        list: The target joints whose networks were deleted.
+    """
+    index = symmetry_index.get_index()
+    if target_joints is None:
+        target_joints = [network.target_joint for network in index.networks()]
+    else:
+        target_joints = [target_joint for target_joint in target_joints if index.get(target_joint) is not None]
+
+    # The networks no longer need to be watched or indexed
+    networks = []
+    for target_joint in target_joints:
+        symmetry_callbacks.get_registry().unregister(target_joint)
+        networks += index.remove(target_joint)
+
+    _delete_networks(networks, target_joints)
+    return target_joints
+
+def _delete_networks(networks, target_joints):
+    """
+    Deletes the nodes of symmetry networks and the added attributes of their target joints.
+
+    Args:
+        networks (list): The symmetry_index.IndexedNetworks whose nodes to delete.
+        target_joints (list): The existing target joints whose added attributes to delete.
+    """
+    # Find the added attributes of every target joint in one query
+    plugs = []
+    if target_joints:
+        plugs = cmds.ls([target_joint + "." + attribute for target_joint in target_joints for attribute in NETWORK_ATTRIBUTES]) or []
+
+    # Read the script job IDs left by older versions of the tool before their attribute is deleted
+    job_id_list = []
+    for plug in plugs:
+        if plug.endswith(".symmetryConstraintScriptJobIDs"):
+            indices = cmds.getAttr(plug, multiIndices=True) or []
+            job_id_list += [cmds.getAttr("{}[{}]".format(plug, i)) for i in indices]
+
+    # Read the pose of the compact and native networks, to bake it back into the local channels of their target joints
+    existing_joints = set(target_joints)
+    world_matrices = []
+    nodes = []
+    for network in networks:
+        network_nodes = network.nodes()
+        nodes += list(network_nodes.values())
+        if network.mode in MATRIX_MODES and network.target_handle.isValid() and network.target_joint in existing_joints:
+            world_matrices.append((network.target_joint, cmds.xform(network.target_joint, query=True, matrix=True, worldSpace=True)))
+
+    # Delete the added nodes of every network at once
+    if nodes:
+        cmds.delete(*nodes)
+    for target_joint, world_matrix in world_matrices:
+        cmds.setAttr(target_joint + ".offsetParentMatrix", *symmetry_math.IDENTITY_MATRIX, type="matrix")
+        cmds.xform(target_joint, matrix=world_matrix, worldSpace=True)
+
+    # Delete the added attributes on the target joints
+    for plug in plugs:
+        cmds.deleteAttr(plug)
+
+    for job_id in job_id_list:
+        # Delete the script job
+        if cmds.scriptJob(exists=job_id):
             cmds.scriptJob(kill=job_id, force=True)
 
-    # Create a list to store the script job IDs
-    job_id_list = [] # type: List[int]
+def list_symmetry_networks():
+    """
+    Lists the symmetry networks in the scene.
+
+    Returns:
+        list: A SymmetryNetwork for each network, in hierarchy order of the target joints.
+    """
+    networks = []
+    for network in symmetry_index.get_index().networks():
+        node = network.driver
+        if network.mode in MATRIX_MODES:
+            # The mirror matrix has -1 on the diagonal entry of the axis
+            mirror = cmds.getAttr(node + ".matrixIn[1]")
+            axis = "XYZ"[[mirror[0], mirror[5], mirror[10]].index(min(mirror[0], mirror[5], mirror[10]))]
+        else:
+            axis = "X"
+            for axis_name in ["X", "Y", "Z"]:
+                if cmds.getAttr(node + ".{}Axis".format(axis_name.lower())):
+                    axis = axis_name
+                    break
+        networks.append(SymmetryNetwork(network.source_joint, network.target_joint, axis, network.mode))
+
+    networks_by_pair = dict(((network.source_joint, network.target_joint), network) for network in networks)
+    return [networks_by_pair[pair] for pair in sort_pairs_by_hierarchy(list(networks_by_pair))]
+
+def resync_symmetry_networks(target_joints=None):
+    """
+    Updates the offsets of the symmetry networks whose rest pose changed, without rebuilding them.
+
+    Each network stores the rest world matrix of its target joint and a hash of the matrices and
+    channels its offsets were solved from. A network is dirty when the hash of the current values no
+    longer matches, for example after the source joint or the parent of the target joint was moved
+    at rest. Only the offsets of the dirty networks are solved and set, so the target joints return
+    to their rest pose while the nodes and connections of every network are left untouched.
+
+    Args:
+        target_joints (list): The target joints of the networks to resync. Defaults to every
+            network in the scene.
+
+    Returns:
+        list: The (source joint, target joint) tuples whose offsets were updated.
+
+    Notes:
+        Run it at the rest pose: a source joint that is posed away from its rest makes its network
+        dirty, and the resync would offset the pose away.
+    """
+    networks = list_symmetry_networks()
+    if target_joints is not None:
+        target_joints = set(target_joints)
+        networks = [network for network in networks if network.target_joint in target_joints]
+
+    # Group the networks by axis and mode, so each group is solved in one call
+    groups = OrderedDict()
+    for network in networks:
+        if not cmds.objExists(network.target_joint + ".symmetryRestHash"):
+            cmds.warning("{} has no rest pose to resync from. Please rebuild its symmetry network.".format(network.target_joint))
+            continue
+        groups.setdefault((network.axis, network.mode), []).append(network)
+
+    network_index = symmetry_index.get_index()
+    plan = symmetry_plan.OperationPlan()
+    resynced_pairs = []
+    for (axis, mode), group in groups.items():
+        pairs = [(network.source_joint, network.target_joint) for network in group]
+        rest_matrices = [cmds.getAttr(target_joint + ".symmetryRestMatrix") for _, target_joint in pairs]
+        rest_hashes = [cmds.getAttr(target_joint + ".symmetryRestHash") for _, target_joint in pairs]
 
-    # Create a script job to delete the pma nodes when the symmetry constraint node is deleted
-    job_id_list.append(cmds.scriptJob(nodeDeleted=[sym_node, delete_added_elements], runOnce=True, killWithScene=True))
+        # Only solve the pairs whose rest inputs changed
+        rest_inputs = _read_rest_inputs(pairs, mode, rest_matrices)
+        dirty = [index for index, inputs in enumerate(rest_inputs) if _rest_hash(inputs) != rest_hashes[index]]
+        rest_states = _solve_rest_states([rest_inputs[index] for index in dirty], axis, mode)
 
-    # Create a script job to delete the pma nodes when the target joint is deleted
-    job_id_list.append(cmds.scriptJob(nodeDeleted=[target_joint, delete_added_elements], runOnce=True, killWithScene=True))
+        for index, rest_state in zip(dirty, rest_states):
+            target_joint = pairs[index][1]
+            driver = network_index.get(target_joint).driver if mode == "native" else None
+            _plan_offsets(plan, target_joint, rest_state.offset, mode, driver)
+            plan.set_attr(target_joint, target_joint + ".symmetryRestHash", rest_state.rest_hash, type="string")
+            resynced_pairs.append(pairs[index])
 
-    # Create a script job to delete the pma nodes when the source joint is deleted
-    job_id_list.append(cmds.scriptJob(nodeDeleted=[source_joint, delete_added_elements], runOnce=True, killWithScene=True))
+    # Only the values of the dirty networks change, so they are set without diffing the plan
+    failures = plan.execute()
+    for pair in resynced_pairs:
+        if pair[1] in failures:
+            cmds.warning("Failed to resync {}: {}".format(pair[1], str(failures[pair[1]])))
+    return [pair for pair in resynced_pairs if pair[1] not in failures]
 
-    # Create a script job to delete the pma nodes when scene opens
-    job_id_list.append(cmds.scriptJob(event=["SceneOpened", delete_added_elements], runOnce=True, killWithScene=True))
+def get_symmetry_network_stats(target_joint):
+    """
+    Counts the nodes, connections and dynamic attributes of the symmetry network of a target joint.
+
+    Args:
+        target_joint (str): The target joint.
+
+    Returns:
+        dict: The network "mode" ("standard", "compact", "native" or None if there is no network) and the
+            number of "nodes", "connections" and "dynamic_attributes" of the network.
+    """
+    network = symmetry_index.get_index().entry(target_joint)
+    nodes = list(network.nodes().values()) if network is not None else []
+    mode = network.mode if nodes else None
+
+    # Collect every connection touching a network node, each one only once
+    connections = set()
+    for node in nodes:
+        incoming = cmds.listConnections(node, source=True, destination=False, connections=True, plugs=True) or []
+        connections.update(zip(incoming[1::2], incoming[0::2]))
+        outgoing = cmds.listConnections(node, source=False, destination=True, connections=True, plugs=True) or []
+        connections.update(zip(outgoing[0::2], outgoing[1::2]))
+
+    user_attributes = set(cmds.listAttr(target_joint, userDefined=True) or [])
+    dynamic_attributes = [attribute for attribute in user_attributes if attribute.startswith("offset") or attribute.startswith("symmetry")]
+
+    return {
+        "mode": mode,
+        "nodes": len(nodes),
+        "connections": len(connections),
+        "dynamic_attributes": len(dynamic_attributes),
+    }
+
+def report_symmetry_network_stats(target_joints):
+    """
+    Prints the node, connection and dynamic attribute counts of the symmetry networks of target joints.
 
-    # Create a script job to delete the pma nodes when Maya is closed
-    job_id_list.append(cmds.scriptJob(event=["quitApplication", delete_added_elements], runOnce=True, killWithScene=True))
+    Args:
+        target_joints (list): The target joints.
 
-    # Check if the attribute already exists on the target joint
-    # If it does, delete it
-    if cmds.objExists(target_joint + ".symmetryConstraintScriptJobIDs"):
-        cmds.deleteAttr(target_joint + ".symmetryConstraintScriptJobIDs")
+    Returns:
+        dict: The stats of each target joint, keyed by the joint name.
+    """
+    stats = dict((target_joint, get_symmetry_network_stats(target_joint)) for target_joint in target_joints)
+    print("{:<40} {:<10} {:>6} {:>12} {:>11}".format("target", "mode", "nodes", "connections", "attributes"))
+    for target_joint in target_joints:
+        joint_stats = stats[target_joint]
+        print("{:<40} {:<10} {:>6} {:>12} {:>11}".format(
+            target_joint, joint_stats["mode"], joint_stats["nodes"], joint_stats["connections"], joint_stats["dynamic_attributes"]))
+    return stats
 
-    # Create new attributes on the target joint to store the script job IDs
-    cmds.addAttr(target_joint, longName="symmetryConstraintScriptJobIDs", attributeType="long", multi=True)
+def get_profile_report():
+    """
+    Returns the measurements of the profiled symmetry builds.
 
-    # Set the script job IDs on the target joint
-    for i, job_id in enumerate(job_id_list):
-        cmds.setAttr(target_joint + ".symmetryConstraintScriptJobIDs[" + str(i) + "]", job_id)
+    Returns:
+        dict: The number of "pairs", the total "seconds" and "calls", and the "phases", a list of
+            dicts with the "name", "seconds", "count", "calls", "calls_by_command" and
+            "seconds_per_pair" of each phase. See symmetry_profiler.SymmetryProfiler.report.
+    """
+    return _profiler.report()
 
-def execute(axis="X"):
+def execute(axis="X", mode="standard"):
     """
     Executes the script
 
     Args:
         axis: The axis to mirror the joint on
+        mode: The network mode, "standard", "compact" or "native"
     """
     try:
         # Open an undo chunk
         cmds.undoInfo(openChunk=True)
         # Create the joint symmetry
-        create_joint_symmetry(axis=axis)
+        create_joint_symmetry(axis=axis, mode=mode)
+    except Exception as e:
+        # Print the error message
+        cmds.warning("An error occurred: {}".format(str(e)))
+    finally:
+        # Close the undo chunk
+        cmds.undoInfo(closeChunk=True)
+
+def execute_batch(axis="X", root_joint=None, pairs=None, mode="standard", profile=False, backend="cmds", dry_run=False, chunk_size=DEFAULT_CHUNK_SIZE, progress=None, suspend_refresh=False):
+    """
+    Executes the batch mirroring of a whole skeleton in a single undo chunk, which is undone if the
+    build is cancelled
+
+    Args:
+        axis: The axis to mirror the joints on
+        root_joint: The root joint of the hierarchy. Defaults to the first selected joint
+        pairs: A list of (source joint, target joint) tuples to use instead of the hierarchy
+        mode: The network mode, "standard", "compact" or "native"
+        profile: Whether to profile the batch and print the time and Maya commands of each phase
+        backend: The backend building the networks, "cmds" or "api". The "api" backend is undone as
+            a single command, so it needs no undo chunk
+        dry_run: Whether to only print the operations missing from the scene, without changing it
+        chunk_size: The number of pairs to build between two checks for cancellation
+        progress: The symmetry_progress.ProgressReporter of the build. Defaults to the main progress
+            bar of Maya, which is cancelled with Esc
+        suspend_refresh: Whether to suspend the refresh of the viewports during the build
+    """
+    use_undo_chunk = backend != "api"
+    cancelled_pairs = None
+    try:
+        # Open an undo chunk
+        if use_undo_chunk:
+            cmds.undoInfo(openChunk=True)
+        if root_joint is None and pairs is None:
+            # Use the selected joint as the root of the hierarchy
+            selected_joints = cmds.ls(selection=True, type="joint")
+            if not selected_joints:
+                cmds.warning("Please select the root joint of the hierarchy to mirror.")
+                return
+            root_joint = selected_joints[0]
+        if dry_run:
+            # Print the missing operations of the whole hierarchy
+            plan = plan_joint_symmetry_batch(root_joint=root_joint, pairs=pairs, axis=axis, mode=mode)
+            if len(plan):
+                print(plan.format())
+            print("Planned {} operations for {} joint pairs.".format(len(plan), len(plan.owners)))
+            return
+        # Create the joint symmetry for the whole hierarchy, one chunk of pairs at a time
+        if progress is None:
+            progress = symmetry_progress.ProgressReporter("Mirroring joint hierarchy")
+        with symmetry_progress.suspend_refresh(suspend_refresh):
+            constrained_pairs = create_joint_symmetry_batch(root_joint=root_joint, pairs=pairs, axis=axis, mode=mode, profile=profile, backend=backend,
+                                                            chunk_size=chunk_size, progress=progress)
+        print("Set up symmetry constraints for {} joint pairs.".format(len(constrained_pairs)))
+        if profile or _profiler.enabled:
+            print(_profiler.format_report())
+    except symmetry_progress.BuildCancelled as e:
+        cancelled_pairs = e.pairs
+    except Exception as e:
+        # Print the error message
+        cmds.warning("An error occurred: {}".format(str(e)))
+    finally:
+        # Close the undo chunk
+        if use_undo_chunk:
+            cmds.undoInfo(closeChunk=True)
+
+    # Roll the cancelled build back as a whole
+    if cancelled_pairs is not None:
+        _roll_back_batch(cancelled_pairs)
+        print("Cancelled the mirroring and rolled back {} joint pairs.".format(len(cancelled_pairs)))
+
+def _roll_back_batch(constrained_pairs):
+    """
+    Undoes the undo chunk of a cancelled batch.
+
+    The networks of the batch are unregistered first, so undoing the creation of their nodes does
+    not tear them down again. The networks the batch completed existed before it, so they are
+    indexed and registered again once the chunk is undone.
+
+    Args:
+        constrained_pairs (list): The (source joint, target joint) tuples built before the batch
+            was cancelled.
+    """
+    registry = symmetry_callbacks.get_registry()
+    for _, target_joint in constrained_pairs:
+        registry.unregister(target_joint)
+    cmds.undo()
+    symmetry_index.get_index().invalidate()
+    relink_symmetry_networks()
+
+def execute_resync(target_joints=None):
+    """
+    Executes the resync of the symmetry network offsets in a single undo chunk
+
+    Args:
+        target_joints: The target joints of the networks to resync. Defaults to the selected joints,
+            or to every network in the scene if no joint is selected
+    """
+    try:
+        # Open an undo chunk
+        cmds.undoInfo(openChunk=True)
+        if target_joints is None:
+            target_joints = cmds.ls(selection=True, type="joint") or None
+        # Resync the offsets of the dirty networks
+        resynced_pairs = resync_symmetry_networks(target_joints)
+        print("Resynced the offsets of {} joint pairs.".format(len(resynced_pairs)))
+    except Exception as e:
+        # Print the error message
+        cmds.warning("An error occurred: {}".format(str(e)))
+    finally:
+        # Close the undo chunk
+        cmds.undoInfo(closeChunk=True)
+
+def execute_delete(target_joints=None):
+    """
+    Executes the deletion of symmetry networks in a single undo chunk
+
+    Args:
+        target_joints: The target joints of the networks to delete. Defaults to the selected joints
+    """
+    try:
+        # Open an undo chunk
+        cmds.undoInfo(openChunk=True)
+        if target_joints is None:
+            target_joints = cmds.ls(selection=True, type="joint")
+        if not target_joints:
+            cmds.warning("Please select the target joints of the symmetry networks to delete.")
+            return
+        # Delete the networks at once
+        deleted_joints = delete_symmetry_networks(target_joints)
+        print("Deleted the symmetry networks of {} joint pairs.".format(len(deleted_joints)))
     except Exception as e:
         # Print the error message
         cmds.warning("An error occurred: {}".format(str(e)))
@@ -9,7 +9,13 @@ from maya.app.general.mayaMixin import MayaQWidgetBaseMixin
 from PySide2 import QtCore, QtWidgets
 
 import create_joint_symmetry as cjs
-reload(cjs)
+import mirror_joint_pose
+import symmetry_audit
+import symmetry_evaluation
+import symmetry_manifest
+import symmetry_profiler
+import symmetry_pair_browser
+import symmetry_progress
 
 class JointSymmetryUI(MayaQWidgetBaseMixin, QtWidgets.QWidget):
     def __init__(self):
@@ -19,16 +25,39 @@ class JointSymmetryUI(MayaQWidgetBaseMixin, QtWidgets.QWidget):
         Attributes:
             axis_label (QtWidgets.QLabel): A label for the axis of symmetry.
             axis_combo (QtWidgets.QComboBox): A combo box for the axis of symmetry.
+            mode_label (QtWidgets.QLabel): A label for the network mode.
+            mode_combo (QtWidgets.QComboBox): A combo box for the network mode.
+            backend_label (QtWidgets.QLabel): A label for the backend building the networks of a whole hierarchy.
+            backend_combo (QtWidgets.QComboBox): A combo box for the backend building the networks of a whole hierarchy.
             symmetry_button (QtWidgets.QPushButton): A button to set up the symmetry constraint.
+            batch_button (QtWidgets.QPushButton): A button to set up the symmetry constraints of a whole hierarchy.
+            resync_button (QtWidgets.QPushButton): A button to resync the offsets of the symmetry networks.
+            audit_button (QtWidgets.QPushButton): A button to audit and repair the symmetry networks of the scene.
+            analyze_button (QtWidgets.QPushButton): A button to report the evaluation cost of the symmetry networks of the scene.
+            profile_checkbox (QtWidgets.QCheckBox): A check box to profile the mirroring of a whole hierarchy.
+            suspend_refresh_checkbox (QtWidgets.QCheckBox): A check box to suspend the viewport refresh while a whole hierarchy is mirrored.
+            progress_bar (QtWidgets.QProgressBar): A progress bar for the mirroring of a whole hierarchy.
+            cancel_button (QtWidgets.QPushButton): A button to cancel the mirroring of a whole hierarchy.
+            pair_browser (symmetry_pair_browser.SymmetryPairBrowser): A browser of the symmetry pairs of the scene.
+            mirror_pose_button (QtWidgets.QPushButton): A button to mirror the pose of a rig.
+            flip_pose_button (QtWidgets.QPushButton): A button to flip the pose of a rig.
+            selected_side_checkbox (QtWidgets.QCheckBox): A check box to only mirror the pose of the selected joints.
             axis_layout (QtWidgets.QHBoxLayout): A layout for the axis of symmetry.
+            mode_layout (QtWidgets.QHBoxLayout): A layout for the network mode.
+            backend_layout (QtWidgets.QHBoxLayout): A layout for the backend.
             button_layout (QtWidgets.QHBoxLayout): A layout for the button.
+            pose_layout (QtWidgets.QHBoxLayout): A layout for the pose buttons.
+            progress_layout (QtWidgets.QHBoxLayout): A layout for the progress bar.
             main_layout (QtWidgets.QVBoxLayout): A main layout for the window.
         """
         super(self.__class__, self).__init__()
 
+        # The progress of the running mirroring, if any
+        self._progress = None
+
         # Set the window title and size
         self.setWindowTitle("Joint Symmetry")
-        self.resize(300, 120)
+        self.resize(480, 600)
 
         # Create a label for the axis of symmetry
         self.axis_label = QtWidgets.QLabel("Axis of Symmetry:")
@@ -39,23 +68,114 @@ class JointSymmetryUI(MayaQWidgetBaseMixin, QtWidgets.QWidget):
         self.axis_combo.addItems(["X", "Y", "Z"])
         self.axis_combo.setCurrentIndex(0)
 
+        # Create a label for the network mode
+        self.mode_label = QtWidgets.QLabel("Network Mode:")
+        self.mode_label.setAlignment(QtCore.Qt.AlignCenter)
+
+        # Create a combo box for the network mode
+        self.mode_combo = QtWidgets.QComboBox()
+        self.mode_combo.addItems(list(cjs.NETWORK_MODES))
+        self.mode_combo.setCurrentIndex(0)
+
+        # Create a label for the backend
+        self.backend_label = QtWidgets.QLabel("Hierarchy Backend:")
+        self.backend_label.setAlignment(QtCore.Qt.AlignCenter)
+
+        # Create a combo box for the backend
+        self.backend_combo = QtWidgets.QComboBox()
+        self.backend_combo.addItems(list(cjs.BACKENDS))
+        self.backend_combo.setCurrentIndex(0)
+
         # Create a button to set up the symmetry constraint
         self.symmetry_button = QtWidgets.QPushButton("Set Up Symmetry Constraint")
         self.symmetry_button.clicked.connect(self.create_joint_symmetry)
 
+        # Create a button to set up the symmetry constraints of the selected hierarchy
+        self.batch_button = QtWidgets.QPushButton("Mirror Selected Hierarchy")
+        self.batch_button.clicked.connect(self.create_joint_symmetry_batch)
+
+        # Create a button to resync the offsets of the selected or of every symmetry network
+        self.resync_button = QtWidgets.QPushButton("Resync Offsets")
+        self.resync_button.clicked.connect(self.resync_joint_symmetry)
+
+        # Create a button to audit and repair the symmetry networks of the scene
+        self.audit_button = QtWidgets.QPushButton("Audit Scene")
+        self.audit_button.clicked.connect(self.audit_joint_symmetry)
+
+        # Create a button to report the evaluation cost of the symmetry networks of the scene
+        self.analyze_button = QtWidgets.QPushButton("Analyze Evaluation")
+        self.analyze_button.clicked.connect(self.analyze_joint_symmetry)
+
+        # Create a check box to profile the mirroring of the selected hierarchy
+        self.profile_checkbox = QtWidgets.QCheckBox("Profile Hierarchy Mirroring")
+
+        # Create a check box to suspend the viewport refresh while the selected hierarchy is mirrored
+        self.suspend_refresh_checkbox = QtWidgets.QCheckBox("Suspend Viewport Refresh")
+
+        # Create a progress bar and a button to cancel the mirroring of the selected hierarchy
+        self.progress_bar = QtWidgets.QProgressBar()
+        self.progress_bar.setValue(0)
+        self.cancel_button = QtWidgets.QPushButton("Cancel")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_joint_symmetry_batch)
+
+        # Create a browser of the symmetry pairs of the scene
+        self.pair_browser = symmetry_pair_browser.SymmetryPairBrowser()
+
+        # Create buttons to mirror and flip the pose of the rig of the selected joint
+        self.mirror_pose_button = QtWidgets.QPushButton("Mirror Pose")
+        self.mirror_pose_button.clicked.connect(self.mirror_pose)
+        self.flip_pose_button = QtWidgets.QPushButton("Flip Pose")
+        self.flip_pose_button.clicked.connect(self.flip_pose)
+
+        # Create a check box to only mirror the pose of the selected joints
+        self.selected_side_checkbox = QtWidgets.QCheckBox("Selected Joints Only")
+
         # Create a layout for the axis of symmetry
         self.axis_layout = QtWidgets.QHBoxLayout()
         self.axis_layout.addWidget(self.axis_label)
         self.axis_layout.addWidget(self.axis_combo)
 
+        # Create a layout for the network mode
+        self.mode_layout = QtWidgets.QHBoxLayout()
+        self.mode_layout.addWidget(self.mode_label)
+        self.mode_layout.addWidget(self.mode_combo)
+
+        # Create a layout for the backend
+        self.backend_layout = QtWidgets.QHBoxLayout()
+        self.backend_layout.addWidget(self.backend_label)
+        self.backend_layout.addWidget(self.backend_combo)
+
         # Create a layout for the button
         self.button_layout = QtWidgets.QHBoxLayout()
         self.button_layout.addWidget(self.symmetry_button)
+        self.button_layout.addWidget(self.batch_button)
+        self.button_layout.addWidget(self.resync_button)
+        self.button_layout.addWidget(self.audit_button)
+        self.button_layout.addWidget(self.analyze_button)
+
+        # Create a layout for the pose buttons
+        self.pose_layout = QtWidgets.QHBoxLayout()
+        self.pose_layout.addWidget(self.selected_side_checkbox)
+        self.pose_layout.addWidget(self.mirror_pose_button)
+        self.pose_layout.addWidget(self.flip_pose_button)
+
+        # Create a layout for the progress bar
+        self.progress_layout = QtWidgets.QHBoxLayout()
+        self.progress_layout.addWidget(self.progress_bar)
+        self.progress_layout.addWidget(self.cancel_button)
 
         # Create a main layout for the window
         self.main_layout = QtWidgets.QVBoxLayout()
         self.main_layout.addLayout(self.axis_layout)
+        self.main_layout.addLayout(self.mode_layout)
+        self.main_layout.addLayout(self.backend_layout)
+        self.main_layout.addWidget(self.profile_checkbox)
+        self.main_layout.addWidget(self.suspend_refresh_checkbox)
         self.main_layout.addLayout(self.button_layout)
+        self.main_layout.addLayout(self.progress_layout)
+        self.main_layout.addLayout(self.pose_layout)
+        self.main_layout.addWidget(self.pair_browser)
 
         # Set the main layout for the window
         self.setLayout(self.main_layout)
@@ -65,20 +185,142 @@ class JointSymmetryUI(MayaQWidgetBaseMixin, QtWidgets.QWidget):
         Creates a joint symmetry constraint on the selected joints.
         """
         axis = self.axis_combo.currentText()
-        cjs.execute(axis=axis)
+        mode = self.mode_combo.currentText()
+        cjs.execute(axis=axis, mode=mode)
+        self.pair_browser.refresh()
+
+    def create_joint_symmetry_batch(self):
+        """
+        Creates joint symmetry constraints for the hierarchy under the selected root joint.
+        """
+        axis = self.axis_combo.currentText()
+        mode = self.mode_combo.currentText()
+        backend = self.backend_combo.currentText()
+        profile = self.profile_checkbox.isChecked()
+        suspend_refresh = self.suspend_refresh_checkbox.isChecked()
+
+        # Report the progress in the window and let the mirroring be cancelled between chunks
+        self._progress = symmetry_progress.ProgressReporter("Mirroring joint hierarchy", callback=self.update_progress)
+
+        # The pending events are handled during the mirroring, so only Cancel is left enabled to
+        # keep the other actions out of its undo chunk
+        disabled_widgets = [widget for widget in self.children() if isinstance(widget, QtWidgets.QWidget)
+                            and widget.isEnabled() and widget not in (self.cancel_button, self.progress_bar)]
+        for widget in disabled_widgets:
+            widget.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        try:
+            cjs.execute_batch(axis=axis, mode=mode, profile=profile, backend=backend, progress=self._progress, suspend_refresh=suspend_refresh)
+        finally:
+            self._progress = None
+            for widget in disabled_widgets:
+                widget.setEnabled(True)
+            self.cancel_button.setEnabled(False)
+            self.pair_browser.refresh()
+
+        # Show the time and Maya commands of each phase
+        if profile:
+            self.show_profile_report()
+
+    def update_progress(self, done, total):
+        """
+        Shows the progress of the mirroring and handles the pending events, so it can be cancelled.
+        """
+        self.progress_bar.setMaximum(max(total, 1))
+        self.progress_bar.setValue(done)
+        QtWidgets.QApplication.processEvents()
+
+    def cancel_joint_symmetry_batch(self):
+        """
+        Cancels the running mirroring once its current chunk is built. The mirroring is then undone.
+        """
+        if self._progress is not None:
+            self._progress.cancel()
+
+    def resync_joint_symmetry(self):
+        """
+        Resyncs the offsets of the symmetry networks of the selected target joints, or of every
+        network if no joint is selected.
+        """
+        cjs.execute_resync()
+        self.pair_browser.refresh()
+
+    def audit_joint_symmetry(self):
+        """
+        Audits the symmetry networks of the scene, and repairs them once the planned actions are confirmed.
+        """
+        report = symmetry_audit.audit_scene()
+        actions = symmetry_audit.repair_scene(report, dry_run=True)
+        text = symmetry_audit.format_report(report)
+        if not actions:
+            QtWidgets.QMessageBox.information(self, "Joint Symmetry Audit", "<pre>{}</pre>".format(text))
+            return
+
+        # Show the dry run and ask before changing the scene
+        text += "\n\nRepair the scene with these actions?\n" + symmetry_audit.format_actions(actions)
+        answer = QtWidgets.QMessageBox.question(self, "Joint Symmetry Audit", "<pre>{}</pre>".format(text))
+        if answer == QtWidgets.QMessageBox.Yes:
+            symmetry_audit.execute(repair=True)
+            self.pair_browser.refresh()
+
+    def analyze_joint_symmetry(self):
+        """
+        Prints the evaluation cost of the symmetry networks of the scene to the Script Editor.
+        """
+        symmetry_evaluation.execute()
+
+    def mirror_pose(self):
+        """
+        Mirrors the pose of the rig of the selected joint, or of the selected joints only.
+        """
+        axis = self.axis_combo.currentText()
+        mirror_joint_pose.execute(axis=axis, mode="mirror", selected_side=self.selected_side_checkbox.isChecked())
+
+    def flip_pose(self):
+        """
+        Flips the pose of the rig of the selected joint, or of the selected joints only.
+        """
+        axis = self.axis_combo.currentText()
+        mirror_joint_pose.execute(axis=axis, mode="flip", selected_side=self.selected_side_checkbox.isChecked())
+
+    def show_profile_report(self):
+        """
+        Shows the measurements of the last profiled mirroring in a dialog.
+        """
+        dialog = QtWidgets.QMessageBox(self)
+        dialog.setWindowTitle("Joint Symmetry Profile")
+        dialog.setText("<pre>{}</pre>".format(symmetry_profiler.get_profiler().format_report()))
+        dialog.exec_()
+
+# Keep the window across launches and module reloads, so the shelf button only shows it again
+if "_window" not in globals():
+    _window = None
 
 def execute():
     """
-    Executes the joint symmetry UI.
+    Executes the joint symmetry UI, showing the window again if it was already created.
     """
+    global _window
     try:
-        # Check if the window already exists
-        if cmds.window("joint_symmetry_window", exists=True):
-            cmds.deleteUI("joint_symmetry_window")
+        # Keep the manifest of saved scenes up to date and restore it when they are opened.
+        # The first time, relink the networks of the scene that was opened before.
+        if symmetry_manifest.install():
+            symmetry_manifest.restore_scene_networks(rebuild_missing=False)
+
+        # Create the window the first time, or again if Maya deleted it
+        if _window is not None:
+            try:
+                _window.isVisible()
+            except RuntimeError:
+                _window = None
+        if _window is None:
+            _window = JointSymmetryUI()
 
-        # Create the window
-        window = JointSymmetryUI()
-        window.show()
+        # List the pairs of the current scene and show the window
+        _window.pair_browser.refresh()
+        _window.show()
+        _window.raise_()
+        _window.activateWindow()
     except Exception as e:
         # Print the error message
         cmds.warning("An error occurred: {}".format(str(e)))
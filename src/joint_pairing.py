@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+Automatic left/right joint pairing.
+
+The matching works on plain joint names and world positions, so it can run and be benchmarked
+without Maya. Each joint on the source side is mirrored across the axis of symmetry and matched to
+the joints found around the mirrored position with a KD-tree, which keeps the whole pairing at
+O(n log n). Name tokens such as `L_`/`R_` break ties and pair the joints whose positions do not
+match.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from collections import namedtuple
+
+# Name tokens used to find the counterpart of a joint. Each entry is a (source token, target token) pair.
+DEFAULT_SIDE_TOKENS = (("L_", "R_"), ("_L", "_R"), ("_l", "_r"), ("Left", "Right"), ("left", "right"))
+
+class PairingResult(namedtuple("PairingResult", ["pairs", "centers", "unmatched", "ambiguous"])):
+    """
+    The result of auto_pair.
+
+    Attributes:
+        pairs (list): The (source joint, target joint) tuples, in the order of the input joints.
+        centers (list): The joints lying on the plane of symmetry.
+        unmatched (list): The joints off the plane of symmetry without a counterpart.
+        ambiguous (list): (joint, candidate joints) tuples for the joints with more than one counterpart
+            within the tolerance that the names could not resolve.
+    """
+    __slots__ = ()
+
+class KDTree(object):
+    """
+    A static 3D KD-tree for radius queries.
+
+    Attributes:
+        points (list): The indexed points.
+    """
+    def __init__(self, points):
+        self.points = [tuple(point) for point in points]
+        # Each node is a (point index, split axis, left node, right node) tuple
+        self._root = self._build(list(range(len(self.points))), 0)
+
+    def _build(self, indices, depth):
+        """
+        Builds the subtree of a list of point indices.
+        """
+        if not indices:
+            return None
+        axis = depth % 3
+        indices.sort(key=lambda index: self.points[index][axis])
+        median = len(indices) // 2
+        return (
+            indices[median],
+            axis,
+            self._build(indices[:median], depth + 1),
+            self._build(indices[median + 1:], depth + 1),
+        )
+
+    def query_radius(self, point, radius):
+        """
+        Finds the points within a radius of a point.
+
+        Args:
+            point (tuple): The query point.
+            radius (float): The search radius.
+
+        Returns:
+            list: The indices of the points within the radius, closest first.
+        """
+        squared_radius = radius * radius
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            index, axis, left, right = node
+            candidate = self.points[index]
+            squared_distance = sum((candidate[i] - point[i]) ** 2 for i in range(3))
+            if squared_distance <= squared_radius:
+                found.append((squared_distance, index))
+            difference = point[axis] - candidate[axis]
+            # Always visit the side of the query point, and the other side only if the sphere crosses the split plane
+            near, far = (left, right) if difference < 0 else (right, left)
+            stack.append(near)
+            if difference * difference <= squared_radius:
+                stack.append(far)
+        return [index for _, index in sorted(found)]
+
+def mirrored_names(joint, side_tokens=DEFAULT_SIDE_TOKENS):
+    """
+    Returns the names the counterpart of a joint could have, swapping its side tokens both ways.
+
+    Args:
+        joint (str): The joint name.
+        side_tokens (tuple): The (source token, target token) pairs.
+
+    Returns:
+        list: The candidate names, empty if the name has no side token.
+    """
+    names = []
+    for source_token, target_token in side_tokens:
+        for token, other_token in ((source_token, target_token), (target_token, source_token)):
+            if joint.startswith(token):
+                names.append(other_token + joint[len(token):])
+            if joint.endswith(token):
+                names.append(joint[:-len(token)] + other_token)
+    # Remove the duplicates, keeping the order
+    return [name for index, name in enumerate(names) if name not in names[:index]]
+
+def auto_pair(joints, positions, axis="X", tolerance=0.01, side_tokens=DEFAULT_SIDE_TOKENS, source_side=1):
+    """
+    Pairs joints with their mirrored counterparts.
+
+    Args:
+        joints (list): The joint names.
+        positions (list): The world position of each joint.
+        axis (str): The axis of symmetry. Can be "X", "Y", or "Z".
+        tolerance (float): The distance within which a joint matches a mirrored position, and
+            within which a joint is considered to lie on the plane of symmetry.
+        side_tokens (tuple): The (source token, target token) pairs used to break ties and to pair
+            joints whose positions do not match. Pass an empty tuple to match by position only.
+        source_side (int): 1 if the source joints are on the positive side of the axis, -1 if they
+            are on the negative side.
+
+    Returns:
+        PairingResult: The pairs and the joints that could not be paired.
+    """
+    axis_index = "XYZ".index(axis.upper())
+    joint_indices = dict((joint, index) for index, joint in enumerate(joints))
+    tree = KDTree(positions)
+
+    pairs = []
+    centers = []
+    ambiguous = []
+    paired = set()
+    for index, joint in enumerate(joints):
+        side = positions[index][axis_index] * source_side
+        if abs(positions[index][axis_index]) <= tolerance:
+            centers.append(joint)
+            continue
+        if side < 0.0:
+            # Target side joints are matched from their source
+            continue
+
+        mirrored = list(positions[index])
+        mirrored[axis_index] = -mirrored[axis_index]
+        candidates = [joints[candidate] for candidate in tree.query_radius(mirrored, tolerance) if candidate != index]
+        names = [name for name in mirrored_names(joint, side_tokens) if name in joint_indices]
+
+        if len(candidates) > 1:
+            # Let the names decide between joints at the same position
+            named_candidates = [candidate for candidate in candidates if candidate in names]
+            if len(named_candidates) != 1:
+                ambiguous.append((joint, candidates))
+                continue
+            candidates = named_candidates
+        if not candidates:
+            # Fall back to the names when the positions do not match
+            candidates = [name for name in names if positions[joint_indices[name]][axis_index] * source_side < 0.0]
+            if len(candidates) != 1:
+                continue
+
+        target = candidates[0]
+        if target in paired:
+            ambiguous.append((joint, [target]))
+            continue
+        paired.add(joint)
+        paired.add(target)
+        pairs.append((joint, target))
+
+    # A joint that was already paired cannot also be ambiguous
+    excluded = paired | set(centers) | set(joint for joint, _ in ambiguous)
+    unmatched = [joint for joint in joints if joint not in excluded]
+
+    return PairingResult(pairs, centers, unmatched, ambiguous)
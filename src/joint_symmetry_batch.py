@@ -0,0 +1,365 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+Headless batch processing of scene files with mayapy.
+
+Usage:
+    mayapy joint_symmetry_batch.py scene_a.ma scene_b.mb --manifest pairs.json --workers 4 --summary summary.json
+
+Each scene is opened in a worker process, its symmetry networks are built from the pair manifest
+(or by auto-pairing every root joint if no manifest is given), and the result is saved. The
+scheduling and reporting in this module do not import Maya, so they can run against a stub
+processor or a stub `maya.cmds`.
+
+The manifest is a JSON file such as:
+    {"axis": "X", "mode": "standard", "pairs": [["L_arm", "R_arm"]], "roots": ["root"]}
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from collections import namedtuple
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+class SceneJob(namedtuple("SceneJob", ["scene_path", "output_path", "axis", "mode", "pairs", "root_joints", "backend"])):
+    """
+    A scene to process.
+
+    Attributes:
+        scene_path (str): The scene file to open.
+        output_path (str): The file to save the result to.
+        axis (str): The axis of symmetry. Can be "X", "Y", or "Z".
+        mode (str): The network mode, "standard", "compact" or "native".
+        pairs (list): The (source joint, target joint) pairs to constrain, or None.
+        root_joints (list): The root joints to auto-pair, or None to auto-pair every root joint.
+        backend (str): The backend building the networks, "cmds" or "api".
+    """
+    __slots__ = ()
+
+# The number of seconds between two checks of the running jobs
+_POLL_INTERVAL = 0.1
+
+# The queue a worker reports the jobs it starts to, set when the worker starts
+_started_jobs = None
+
+# The file types Maya saves each scene extension as
+_SCENE_FILE_TYPES = {".ma": "mayaAscii", ".mb": "mayaBinary"}
+
+def load_manifest(manifest_path):
+    """
+    Loads a pair manifest.
+
+    Args:
+        manifest_path (str): The JSON manifest file.
+
+    Returns:
+        dict: The "axis", "mode", "pairs" and "root_joints" of the manifest, only for the keys the
+            manifest contains.
+    """
+    with open(manifest_path, "r") as f:
+        manifest = json.load(f)
+
+    # Only copy the keys of the manifest, so the arguments of create_jobs fill in the others
+    loaded = dict((key, manifest[key]) for key in ("axis", "mode") if key in manifest)
+    if "pairs" in manifest:
+        loaded["pairs"] = [tuple(pair) for pair in manifest["pairs"]]
+    if "roots" in manifest:
+        loaded["root_joints"] = manifest["roots"]
+    return loaded
+
+def create_jobs(scene_paths, manifest=None, output_dir=None, suffix="_symmetry", axis="X", mode="standard", backend="cmds"):
+    """
+    Creates the jobs of a list of scenes.
+
+    Args:
+        scene_paths (list): The scene files.
+        manifest (dict): A manifest loaded by load_manifest. Its axis and mode override the arguments.
+        output_dir (str): The directory to save the results to. Defaults to the directory of each scene.
+        suffix (str): The suffix added to the name of each saved scene.
+        axis (str): The axis of symmetry if the manifest has none.
+        mode (str): The network mode if the manifest has none.
+        backend (str): The backend building the networks, "cmds" or "api".
+
+    Returns:
+        list: A SceneJob for each scene.
+    """
+    manifest = manifest or {}
+    jobs = []
+    for scene_path in scene_paths:
+        name, extension = os.path.splitext(os.path.basename(scene_path))
+        directory = output_dir or os.path.dirname(scene_path)
+        jobs.append(SceneJob(
+            scene_path=scene_path,
+            output_path=os.path.join(directory, name + suffix + extension),
+            axis=manifest.get("axis", axis),
+            mode=manifest.get("mode", mode),
+            pairs=manifest.get("pairs"),
+            root_joints=manifest.get("root_joints"),
+            backend=backend,
+        ))
+    return jobs
+
+def process_scene(job):
+    """
+    Opens a scene, builds its symmetry networks and saves it.
+
+    Args:
+        job (SceneJob): The scene to process.
+
+    Returns:
+        dict: The result of the job. See run_job.
+    """
+    # Maya is only imported in the worker, once maya.standalone is initialized
+    import maya.cmds as cmds
+    import create_joint_symmetry as cjs
+    import symmetry_manifest
+
+    cmds.file(job.scene_path, open=True, force=True)
+
+    constrained_pairs = []
+    if job.pairs is not None:
+        constrained_pairs = cjs.create_joint_symmetry_batch(pairs=job.pairs, axis=job.axis, mode=job.mode, backend=job.backend)
+    else:
+        root_joints = job.root_joints
+        if root_joints is None:
+            # Auto-pair every joint hierarchy of the scene
+            root_joints = [joint for joint in cmds.ls(type="joint") or [] if not cmds.listRelatives(joint, parent=True, type="joint")]
+        for root_joint in root_joints:
+            constrained_pairs += cjs.create_joint_symmetry_batch(root_joint=root_joint, axis=job.axis, mode=job.mode, backend=job.backend)
+
+    # Save the manifest with the scene, so its networks are restored when it is opened
+    symmetry_manifest.write_scene_manifest()
+
+    extension = os.path.splitext(job.output_path)[1].lower()
+    cmds.file(rename=job.output_path)
+    cmds.file(save=True, force=True, type=_SCENE_FILE_TYPES.get(extension, "mayaAscii"))
+
+    return {"pairs": len(constrained_pairs)}
+
+def run_job(job, processor=process_scene):
+    """
+    Runs a job, timing it and isolating its failure.
+
+    Args:
+        job (SceneJob): The scene to process.
+        processor (callable): Processes the job and returns a dict of extra results.
+
+    Returns:
+        dict: The "scene", "output", "status" ("succeeded" or "failed"), "seconds" and "error" of
+            the job, plus the results of the processor.
+    """
+    start_time = time.time()
+    result = {"scene": job.scene_path, "output": job.output_path, "status": "succeeded", "error": None}
+    try:
+        result.update(processor(job) or {})
+    except Exception:
+        result["status"] = "failed"
+        result["error"] = traceback.format_exc()
+    result["seconds"] = time.time() - start_time
+    return result
+
+def _initialize_worker():
+    """
+    Initializes Maya in a worker process.
+    """
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+
+def run_farm(jobs, workers=1, processor=process_scene, initializer=_initialize_worker, timeout=None, max_jobs_per_worker=None):
+    """
+    Runs jobs across a pool of worker processes.
+
+    Args:
+        jobs (list): The SceneJobs to run.
+        workers (int): The number of worker processes. With 1 worker, the jobs run in this process.
+        processor (callable): Processes a job. Must be picklable when workers > 1.
+        initializer (callable): Called once in each worker before it processes jobs, or None.
+        timeout (float): The number of seconds a job may run, from when a worker starts it, before
+            it is reported as failed, or None. Only used with several workers.
+        max_jobs_per_worker (int): The number of jobs after which a worker is replaced, or None.
+
+    Returns:
+        dict: The summary of the run. See summarize.
+
+    Notes:
+        A pool cannot stop one of its workers, so the pool of a job that timed out is terminated
+        and replaced, and the other jobs it was running are run again from the start.
+    """
+    start_time = time.time()
+    if workers <= 1:
+        if initializer is not None:
+            initializer()
+        results = [run_job(job, processor) for job in jobs]
+    else:
+        results = [None] * len(jobs)
+        remaining = list(range(len(jobs)))
+        while remaining:
+            remaining = _run_pool(jobs, remaining, results, workers, processor, initializer, timeout, max_jobs_per_worker)
+    return summarize(results, workers, time.time() - start_time)
+
+def _run_pool(jobs, indices, results, workers, processor, initializer, timeout, max_jobs_per_worker):
+    """
+    Runs jobs in a new pool until they are done or one of them times out.
+
+    Args:
+        jobs (list): The SceneJobs.
+        indices (list): The indices of the jobs to run.
+        results (list): The result of each job, filled in as the jobs end.
+        See run_farm for the other arguments.
+
+    Returns:
+        list: The indices of the jobs left to run in a new pool, once the pool was terminated
+            because of a timeout.
+    """
+    started_jobs = multiprocessing.Queue()
+    pool = multiprocessing.Pool(workers, initializer=_start_worker, initargs=(initializer, started_jobs), maxtasksperchild=max_jobs_per_worker)
+    try:
+        pending = dict((index, pool.apply_async(_run_started_job, (index, jobs[index], processor))) for index in indices)
+        start_times = {}
+        while pending:
+            # Read the start times the workers reported
+            while True:
+                try:
+                    index, start_time = started_jobs.get_nowait()
+                except queue.Empty:
+                    break
+                start_times[index] = start_time
+
+            timed_out = []
+            for index, async_result in sorted(pending.items()):
+                if async_result.ready():
+                    results[index] = _collect_result(jobs[index], async_result)
+                    del pending[index]
+                elif timeout is not None and index in start_times and time.time() - start_times[index] > timeout:
+                    timed_out.append(index)
+
+            if timed_out:
+                for index in timed_out:
+                    results[index] = _failed_result(jobs[index], "The job timed out after {} seconds.".format(timeout), timeout)
+                    del pending[index]
+                return sorted(pending)
+            if pending:
+                time.sleep(_POLL_INTERVAL)
+        return []
+    finally:
+        pool.terminate()
+        pool.join()
+
+def _start_worker(initializer, started_jobs):
+    """
+    Keeps the queue the worker reports the jobs it starts to, then initializes the worker.
+    """
+    global _started_jobs
+    _started_jobs = started_jobs
+    if initializer is not None:
+        initializer()
+
+def _run_started_job(index, job, processor):
+    """
+    Reports the start of a job to the farm, then runs it. See run_job.
+    """
+    _started_jobs.put((index, time.time()))
+    return run_job(job, processor)
+
+def _collect_result(job, async_result):
+    """
+    Returns the result of a job that ended.
+    """
+    try:
+        return async_result.get()
+    except Exception:
+        # The worker itself failed, for example because the job could not be pickled
+        return _failed_result(job, traceback.format_exc(), None)
+
+def _failed_result(job, error, seconds):
+    """
+    Returns the result of a job that did not report back.
+    """
+    return {"scene": job.scene_path, "output": job.output_path, "status": "failed", "error": error, "seconds": seconds}
+
+def summarize(results, workers, seconds):
+    """
+    Summarizes the results of a run.
+
+    Args:
+        results (list): The results returned by run_job.
+        workers (int): The number of worker processes.
+        seconds (float): The wall time of the run.
+
+    Returns:
+        dict: The "scenes" results, the number of "succeeded" and "failed" scenes, the "workers"
+            and the total "seconds".
+    """
+    return {
+        "scenes": results,
+        "succeeded": sum(1 for result in results if result["status"] == "succeeded"),
+        "failed": sum(1 for result in results if result["status"] != "succeeded"),
+        "workers": workers,
+        "seconds": seconds,
+    }
+
+def write_summary(summary, summary_path):
+    """
+    Writes a summary as JSON.
+
+    Args:
+        summary (dict): The summary returned by run_farm.
+        summary_path (str): The JSON file to write.
+    """
+    with open(summary_path, "w") as f:
+        json.dump(summary, f, indent=2, sort_keys=True)
+
+def parse_args(argv=None):
+    """
+    Parses the command line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Build joint symmetry networks in scene files with mayapy.")
+    parser.add_argument("scenes", nargs="+", help="The scene files to process.")
+    parser.add_argument("--manifest", help="A JSON pair manifest. Every root joint is auto-paired if omitted.")
+    parser.add_argument("--axis", default="X", choices=["X", "Y", "Z"], help="The axis of symmetry if the manifest has none.")
+    parser.add_argument("--mode", default="standard", choices=["standard", "compact", "native"], help="The network mode if the manifest has none.")
+    parser.add_argument("--backend", default="cmds", choices=["cmds", "api"], help="The backend building the networks.")
+    parser.add_argument("--output-dir", help="The directory to save the results to. Defaults to the directory of each scene.")
+    parser.add_argument("--suffix", default="_symmetry", help="The suffix added to the name of each saved scene.")
+    parser.add_argument("--workers", type=int, default=1, help="The number of worker processes.")
+    parser.add_argument("--timeout", type=float, help="The number of seconds after which a scene is reported as failed.")
+    parser.add_argument("--summary", help="The JSON file to write the summary to. Printed if omitted.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """
+    Runs the command line entry point.
+
+    Returns:
+        int: The exit code, 1 if any scene failed.
+    """
+    args = parse_args(argv)
+    manifest = load_manifest(args.manifest) if args.manifest else None
+    jobs = create_jobs(args.scenes, manifest, args.output_dir, args.suffix, args.axis, args.mode, args.backend)
+    summary = run_farm(jobs, workers=args.workers, timeout=args.timeout)
+
+    for result in summary["scenes"]:
+        seconds = "-" if result["seconds"] is None else "{:.2f}s".format(result["seconds"])
+        print("{:<10} {} ({})".format(result["status"], result["scene"], seconds))
+    print("{} succeeded, {} failed in {:.1f} seconds with {} workers.".format(summary["succeeded"], summary["failed"], summary["seconds"], summary["workers"]))
+
+    if args.summary:
+        write_summary(summary, args.summary)
+    else:
+        print(json.dumps(summary, indent=2, sort_keys=True))
+
+    return 1 if summary["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
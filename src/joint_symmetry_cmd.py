@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+The undoable jointSymmetry command, which builds the symmetry networks of a batch of pairs with
+OpenMaya modifiers.
+
+Load it with:
+    cmds.loadPlugin("/path/to/src/joint_symmetry_cmd.py")
+
+Usage:
+    cmds.jointSymmetry(source=["L_arm", "L_hand"], target=["R_arm", "R_hand"], axis="X", mode="standard")
+
+The whole batch is a single entry in the undo queue, and the command returns the target joints of
+the networks it built, named as they were given.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import maya.api.OpenMaya as om
+
+import create_joint_symmetry as cjs
+import symmetry_callbacks
+import symmetry_index
+import symmetry_modifier
+
+COMMAND_NAME = "jointSymmetry"
+
+_SOURCE_FLAG = ("-s", "-source")
+_TARGET_FLAG = ("-t", "-target")
+_AXIS_FLAG = ("-ax", "-axis")
+_MODE_FLAG = ("-m", "-mode")
+
+def maya_useNewAPI():
+    """
+    Tells Maya the plugin uses the Python API 2.0.
+    """
+    pass
+
+class JointSymmetryCommand(om.MPxCommand):
+    """
+    Builds the symmetry networks of a batch of pairs in a single undoable command.
+    """
+    def __init__(self):
+        super(JointSymmetryCommand, self).__init__()
+        self._builder = None
+        self._mode = None
+
+    @staticmethod
+    def creator():
+        return JointSymmetryCommand()
+
+    @staticmethod
+    def create_syntax():
+        """
+        Returns the syntax of the command.
+        """
+        syntax = om.MSyntax()
+        syntax.addFlag(_SOURCE_FLAG[0], _SOURCE_FLAG[1], om.MSyntax.kString)
+        syntax.makeFlagMultiUse(_SOURCE_FLAG[0])
+        syntax.addFlag(_TARGET_FLAG[0], _TARGET_FLAG[1], om.MSyntax.kString)
+        syntax.makeFlagMultiUse(_TARGET_FLAG[0])
+        syntax.addFlag(_AXIS_FLAG[0], _AXIS_FLAG[1], om.MSyntax.kString)
+        syntax.addFlag(_MODE_FLAG[0], _MODE_FLAG[1], om.MSyntax.kString)
+        return syntax
+
+    def isUndoable(self):
+        return True
+
+    def doIt(self, args):
+        """
+        Reads the pairs and solves their offsets, then builds the networks.
+        """
+        database = om.MArgDatabase(self.syntax(), args)
+        source_joints = [database.getFlagArgumentList(_SOURCE_FLAG[0], i).asString(0) for i in range(database.numberOfFlagUses(_SOURCE_FLAG[0]))]
+        target_joints = [database.getFlagArgumentList(_TARGET_FLAG[0], i).asString(0) for i in range(database.numberOfFlagUses(_TARGET_FLAG[0]))]
+        axis = database.flagArgumentString(_AXIS_FLAG[0], 0).upper() if database.isFlagSet(_AXIS_FLAG[0]) else "X"
+        mode = database.flagArgumentString(_MODE_FLAG[0], 0) if database.isFlagSet(_MODE_FLAG[0]) else "standard"
+
+        # Check the arguments
+        if len(source_joints) != len(target_joints):
+            raise ValueError("The number of source joints ({}) and target joints ({}) differ.".format(len(source_joints), len(target_joints)))
+        if axis not in ["X", "Y", "Z"]:
+            raise ValueError("The axis must be X, Y or Z, not {}.".format(axis))
+        if mode not in cjs.NETWORK_MODES:
+            raise ValueError("The mode must be one of {}, not {}.".format(", ".join(cjs.NETWORK_MODES), mode))
+
+        # Solve the offsets of all pairs at once, before any network changes the pose
+        pairs = list(zip(source_joints, target_joints))
+        rest_states = cjs.compute_rest_states(pairs, axis, mode)
+
+        self._mode = mode
+        self._builder = symmetry_modifier.SymmetryModifierBuilder(pairs, rest_states, axis, mode)
+        self.redoIt()
+
+    def redoIt(self):
+        """
+        Builds the networks and registers their cleanup callbacks.
+        """
+        self._builder.doIt()
+        # The index is rebuilt from the message links of the new networks on its next query
+        symmetry_index.get_index().invalidate()
+        networks = self._builder.networks()
+        for source_joint, target_joint, network_node in networks:
+            # The native networks are never watched
+            if self._mode == "native":
+                continue
+            symmetry_callbacks.get_registry().register(target_joint, [network_node, target_joint, source_joint], cjs.delete_symmetry_network)
+        # Return the target joints as the caller named them, so it can match them with its pairs
+        self.setResult(self._builder.target_joints())
+
+    def undoIt(self):
+        """
+        Unregisters the cleanup callbacks and removes the networks.
+        """
+        # Unregister first, so removing the nodes does not tear the networks down again
+        for _, target_joint, _ in self._builder.networks():
+            symmetry_callbacks.get_registry().unregister(target_joint)
+        self._builder.undoIt()
+        symmetry_index.get_index().invalidate()
+
+def initializePlugin(plugin):
+    """
+    Registers the command.
+    """
+    plugin_fn = om.MFnPlugin(plugin, "jointSymmetryTool", "1.0.0")
+    plugin_fn.registerCommand(COMMAND_NAME, JointSymmetryCommand.creator, JointSymmetryCommand.create_syntax)
+
+def uninitializePlugin(plugin):
+    """
+    Deregisters the command.
+    """
+    plugin_fn = om.MFnPlugin(plugin)
+    plugin_fn.deregisterCommand(COMMAND_NAME)
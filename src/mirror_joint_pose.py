@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+Mirrors or flips the current pose of a rig without building symmetry networks.
+
+The joints are paired the same way as for the symmetry networks. Every matrix and channel the pose
+depends on is read once before anything changes, then the mirrored channels are computed with
+symmetry_math one hierarchy level at a time, so each joint is mirrored under the mirrored pose of
+its parent. The channels are written with the executor of symmetry_plan, and execute() wraps the
+whole pose in a single undo chunk.
+
+Usage:
+    import mirror_joint_pose
+    mirror_joint_pose.execute(mode="flip")
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from collections import OrderedDict
+
+import maya.cmds as cmds
+
+import create_joint_symmetry as cjs
+import symmetry_index
+import symmetry_math
+import symmetry_plan
+
+# The pose modes. "mirror" copies the pose of each source joint onto its target joint, "flip"
+# swaps the poses of both sides and mirrors the joints lying on the plane of symmetry.
+POSE_MODES = ("mirror", "flip")
+
+def mirror_joint_pose(root_joint=None, pairs=None, axis="X", mode="mirror", joints=None, side_tokens=cjs.DEFAULT_SIDE_TOKENS, tolerance=cjs.DEFAULT_PAIRING_TOLERANCE, source_side=1):
+    """
+    Mirrors or flips the current pose of a rig.
+
+    Args:
+        root_joint (str): The root joint of the rig. The joints under it are paired with
+            create_joint_symmetry.auto_pair_joints.
+        pairs (list): A list of (source joint, target joint) tuples. Used instead of root_joint if given.
+        axis (str): The axis of symmetry. Can be "X", "Y", or "Z".
+        mode (str): The pose mode. See POSE_MODES.
+        joints (list): Only mirror the pairs of these joints, from these joints to their
+            counterparts, for example the selected side. Defaults to every pair.
+        side_tokens (tuple): The (source token, target token) pairs used to match joints by name.
+        tolerance (float): The distance within which a joint matches the mirrored position of another joint.
+        source_side (int): 1 if the source joints are on the positive side of the axis, -1 otherwise.
+
+    Returns:
+        list: The (source joint, target joint) tuples whose pose was mirrored. In the flip mode,
+            each pair is listed in both directions and each center joint onto itself.
+    """
+    plan = plan_joint_pose_mirror(root_joint, pairs, axis, mode, joints, side_tokens, tolerance, source_side)
+    failures = plan.execute()
+    for target_joint, exception in failures.items():
+        cmds.warning("Failed to mirror the pose of {}: {}".format(target_joint, str(exception)))
+    return [(source_joint, target_joint) for target_joint, source_joint in plan.owners.items() if target_joint not in failures]
+
+def plan_joint_pose_mirror(root_joint=None, pairs=None, axis="X", mode="mirror", joints=None, side_tokens=cjs.DEFAULT_SIDE_TOKENS, tolerance=cjs.DEFAULT_PAIRING_TOLERANCE, source_side=1):
+    """
+    Plans the channels mirror_joint_pose would set, without changing the scene.
+
+    Args:
+        See mirror_joint_pose.
+
+    Returns:
+        symmetry_plan.OperationPlan: The translate, rotate and scale values of every target joint.
+            Its owners map each target joint to its source joint. Print it as a dry run with its
+            format method.
+
+    Raises:
+        ValueError: If the mode is unknown, or if neither a root joint nor pairs are given.
+    """
+    if mode not in POSE_MODES:
+        raise ValueError("The mode must be one of {}, not {}.".format(", ".join(POSE_MODES), mode))
+
+    centers = []
+    if pairs is None:
+        if root_joint is None:
+            raise ValueError("Please specify a root joint or a list of joint pairs.")
+        result = cjs.auto_pair_joints(root_joint, axis=axis, tolerance=tolerance, side_tokens=side_tokens, source_side=source_side)
+        pairs, centers = result.pairs, result.centers
+
+    # The targets driven by a symmetry network follow their source joint already
+    index = symmetry_index.get_index()
+    moves = []
+    for source_joint, target_joint in _list_moves(pairs, centers, mode, joints):
+        if index.get(target_joint) is not None:
+            cmds.warning("Skipping {}: it is driven by its symmetry network.".format(target_joint))
+            continue
+        moves.append((source_joint, target_joint))
+
+    plan = symmetry_plan.OperationPlan()
+    if not moves:
+        return plan
+
+    # Sort the targets by depth, checking every one of them in one query, so parents come first
+    long_names = dict((long_name.split("|")[-1], long_name) for long_name in cmds.ls([target_joint for _, target_joint in moves], long=True) or [])
+    moves = [move for move in moves if move[1] in long_names]
+    levels = OrderedDict()
+    for move in sorted(moves, key=lambda move: long_names[move[1]].count("|")):
+        levels.setdefault(long_names[move[1]].count("|"), []).append(move)
+
+    plug_values = {}
+
+    def read(plug):
+        if plug not in plug_values:
+            plug_values[plug] = cmds.getAttr(plug)
+        return plug_values[plug]
+
+    # Read the pose of every source and target joint before anything changes
+    for source_joint, target_joint in moves:
+        for plug in [source_joint + ".worldMatrix[0]", source_joint + ".parentMatrix[0]", source_joint + ".translate", source_joint + ".jointOrient",
+                     target_joint + ".parentMatrix[0]", target_joint + ".translate", target_joint + ".jointOrient", target_joint + ".rotate", target_joint + ".rotateOrder"]:
+            read(plug)
+
+    # Mirror one level at a time, each target under the mirrored pose of its parent
+    mirrored_worlds = {}
+    for level in levels.values():
+        parent_matrices = [_mirrored_parent_matrix(long_names[target_joint], mirrored_worlds, read) for _, target_joint in level]
+        source_frames = [symmetry_math.rest_frame(read(source_joint + ".translate")[0], read(source_joint + ".jointOrient")[0], read(source_joint + ".parentMatrix[0]")) for source_joint, _ in level]
+        target_frames = [symmetry_math.rest_frame(read(target_joint + ".translate")[0], read(target_joint + ".jointOrient")[0], parent_matrix) for (_, target_joint), parent_matrix in zip(level, parent_matrices)]
+        world_matrices = symmetry_math.mirror_pose_matrices([read(source_joint + ".worldMatrix[0]") for source_joint, _ in level], source_frames, target_frames, axis)
+
+        for (source_joint, target_joint), world_matrix, parent_matrix in zip(level, world_matrices, parent_matrices):
+            mirrored_worlds[target_joint] = world_matrix
+            rotate_order = symmetry_math.ROTATE_ORDERS[read(target_joint + ".rotateOrder")]
+            transform = symmetry_math.local_transform(world_matrix, parent_matrix, list(read(target_joint + ".jointOrient")[0]), rotate_order, reference=list(read(target_joint + ".rotate")[0]))
+            plan.owners[target_joint] = source_joint
+            plan.set_attr(target_joint, target_joint + ".translate", *transform.translate, type="double3")
+            plan.set_attr(target_joint, target_joint + ".rotate", *transform.rotate, type="double3")
+            plan.set_attr(target_joint, target_joint + ".scale", *transform.scale, type="double3")
+
+    return plan
+
+def _list_moves(pairs, centers, mode, joints):
+    """
+    Lists the (source joint, target joint) moves of a pose mode.
+    """
+    if joints is not None:
+        # Mirror from the given joints, turning around the pairs whose target joint is given
+        joints = set(joints)
+        pairs = [(source_joint, target_joint) if source_joint in joints else (target_joint, source_joint) for source_joint, target_joint in pairs
+                 if source_joint in joints or target_joint in joints]
+        centers = [joint for joint in centers if joint in joints]
+    if mode == "flip":
+        return list(pairs) + [(target_joint, source_joint) for source_joint, target_joint in pairs] + [(joint, joint) for joint in centers]
+    return list(pairs)
+
+def _mirrored_parent_matrix(long_name, mirrored_worlds, read):
+    """
+    Returns the world matrix of the parent of a joint once its mirrored ancestors have moved.
+
+    Args:
+        long_name (str): The long name of the joint.
+        mirrored_worlds (dict): The mirrored world matrix of each target joint of the upper levels.
+        read (callable): Reads a plug once.
+
+    Returns:
+        list: The world matrix of the parent.
+    """
+    ancestors = long_name.split("|")[1:-1]
+    if not ancestors:
+        return list(symmetry_math.IDENTITY_MATRIX)
+    parent_matrix = read(ancestors[-1] + ".worldMatrix[0]")
+
+    # The parent keeps its matrix relative to its nearest mirrored ancestor
+    for ancestor in reversed(ancestors):
+        if ancestor in mirrored_worlds:
+            relative_matrix = symmetry_math.multiply_matrices(parent_matrix, symmetry_math.inverse_matrix(read(ancestor + ".worldMatrix[0]")))
+            return symmetry_math.multiply_matrices(relative_matrix, mirrored_worlds[ancestor])
+    return parent_matrix
+
+def execute(axis="X", mode="mirror", selected_side=False, dry_run=False):
+    """
+    Executes the pose mirror of the rig of the selected joint in a single undo chunk
+
+    Args:
+        axis: The axis to mirror the pose across
+        mode: "mirror" to copy the pose of each source joint onto its target, "flip" to swap both sides
+        selected_side: Whether to only mirror the selected joints onto their counterparts, instead
+            of the whole rig
+        dry_run: Whether to only print the channels that would be set
+    """
+    try:
+        # Open an undo chunk
+        cmds.undoInfo(openChunk=True)
+        selected_joints = cmds.ls(selection=True, type="joint")
+        if not selected_joints:
+            cmds.warning("Please select a joint of the rig to mirror.")
+            return
+        # Pair the whole rig from the top joint above the selection, stopping below any group
+        root_joint = cmds.ls(selected_joints[0], long=True)[0]
+        parents = cmds.listRelatives(root_joint, parent=True, fullPath=True)
+        while parents and cmds.nodeType(parents[0]) == "joint":
+            root_joint = parents[0]
+            parents = cmds.listRelatives(root_joint, parent=True, fullPath=True)
+        root_joint = cmds.ls(root_joint)[0]
+        joints = selected_joints if selected_side else None
+        if dry_run:
+            plan = plan_joint_pose_mirror(root_joint=root_joint, axis=axis, mode=mode, joints=joints)
+            if len(plan):
+                print(plan.format())
+            print("Planned the pose of {} joints.".format(len(plan.owners)))
+            return
+        moves = mirror_joint_pose(root_joint=root_joint, axis=axis, mode=mode, joints=joints)
+        print("Mirrored the pose of {} joints.".format(len(moves)))
+    except Exception as e:
+        # Print the error message
+        cmds.warning("An error occurred: {}".format(str(e)))
+    finally:
+        # Close the undo chunk
+        cmds.undoInfo(closeChunk=True)
+
+if __name__ == '__main__':
+    # Execute the script
+    execute()
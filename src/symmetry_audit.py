@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+Scene-wide audit, repair and teardown of the symmetry networks.
+
+audit_scene finds every symmetry network of the scene in one pass, from the network index and two
+ls queries for the network attributes of the joints, and reports what is left over from broken
+networks: nodes whose network was deleted, network attributes on joints without a network, script job IDs left by
+older versions of the tool, networks without message links and networks whose cleanup callbacks
+are not registered. repair_scene and teardown_scene plan the fixes as a list of actions that can be
+printed as a dry run, then apply them with one command per kind of action where Maya allows it.
+
+Usage:
+    import symmetry_audit
+    symmetry_audit.execute(repair=True, dry_run=True)
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from collections import OrderedDict, namedtuple
+
+import maya.cmds as cmds
+
+import create_joint_symmetry as cjs
+import symmetry_callbacks
+import symmetry_index
+
+# The network attributes whose names other tools may also use
+_GENERIC_ATTRIBUTES = ("offsetTranslate", "offsetRotate", "offsetScale")
+
+# The actions of a repair or teardown plan, in the order they are applied
+ACTIONS = ("delete_network", "delete_node", "kill_script_jobs", "delete_attribute", "link_network", "register_callbacks")
+
+class AuditReport(namedtuple("AuditReport", ["networks", "orphan_nodes", "leftover_attributes", "stale_script_jobs", "unlinked_networks", "unwatched_networks"])):
+    """
+    The symmetry networks of a scene and what is left over from broken ones. See audit_scene.
+
+    Attributes:
+        networks (list): The target joints of the valid networks.
+        orphan_nodes (list): The network nodes that belong to no valid network.
+        leftover_attributes (list): The network attribute plugs of joints that have no valid network.
+        stale_script_jobs (list): The joints still holding the script job IDs of older versions of
+            the tool.
+        unlinked_networks (list): The target joints of the networks without message links, built by
+            older versions of the tool.
+        unwatched_networks (list): The target joints of the networks whose cleanup callbacks are not
+            registered in this session. The native networks are never watched.
+    """
+    __slots__ = ()
+
+    def is_clean(self):
+        """
+        Returns whether nothing needs to be repaired.
+        """
+        return not any(self[1:])
+
+class AuditAction(namedtuple("AuditAction", ["action", "target"])):
+    """
+    An action of a repair or teardown plan.
+
+    Attributes:
+        action (str): The action. See ACTIONS.
+        target (str): The target joint, node or plug the action applies to.
+    """
+    __slots__ = ()
+
+def audit_scene():
+    """
+    Finds every symmetry network of the scene and what is left over from broken ones.
+
+    The network index is rebuilt from the scene first, so changes made behind its back are found.
+
+    Returns:
+        AuditReport: The report.
+    """
+    index = symmetry_index.get_index()
+    index.build()
+    networks = index.networks()
+    registry = symmetry_callbacks.get_registry()
+
+    # Find the network attributes of every node of the scene in one query, and keep the joints
+    plugs_by_node = OrderedDict()
+    for plug in cmds.ls(["*." + attribute for attribute in cjs.NETWORK_ATTRIBUTES], recursive=True) or []:
+        plugs_by_node.setdefault(plug.partition(".")[0], []).append(plug)
+    joints = set(cmds.ls(list(plugs_by_node), type="joint") or []) if plugs_by_node else set()
+
+    leftover_attributes = []
+    stale_script_jobs = []
+    for node, plugs in plugs_by_node.items():
+        if node not in joints:
+            continue
+        job_plug = node + ".symmetryConstraintScriptJobIDs"
+        if job_plug in plugs:
+            stale_script_jobs.append(node)
+        # The offset attributes have generic names, so they are only left over from a network if
+        # the joint also has an attribute only the tool adds
+        if index.get(node) is None and any(plug.partition(".")[2] not in _GENERIC_ATTRIBUTES for plug in plugs):
+            leftover_attributes += [plug for plug in plugs if plug != job_plug]
+
+    return AuditReport(
+        networks=[network.target_joint for network in networks],
+        orphan_nodes=index.orphan_nodes(),
+        leftover_attributes=leftover_attributes,
+        stale_script_jobs=stale_script_jobs,
+        unlinked_networks=[network.target_joint for network in networks if not network.linked],
+        unwatched_networks=[network.target_joint for network in networks
+                            if network.mode != "native" and network.target_handle.hashCode() not in registry.networks],
+    )
+
+def plan_repair(report):
+    """
+    Plans the actions repairing the leftovers of an audit, keeping the valid networks.
+
+    Args:
+        report (AuditReport): The audit report.
+
+    Returns:
+        list: The AuditActions, in the order they are applied.
+    """
+    actions = [AuditAction("delete_node", node) for node in report.orphan_nodes]
+    actions += [AuditAction("kill_script_jobs", target_joint) for target_joint in report.stale_script_jobs]
+    actions += [AuditAction("delete_attribute", plug) for plug in report.leftover_attributes]
+    actions += [AuditAction("link_network", target_joint) for target_joint in report.unlinked_networks]
+    actions += [AuditAction("register_callbacks", target_joint) for target_joint in report.unwatched_networks]
+    return actions
+
+def plan_teardown(report):
+    """
+    Plans the actions removing every network of an audit and its leftovers.
+
+    Args:
+        report (AuditReport): The audit report.
+
+    Returns:
+        list: The AuditActions, in the order they are applied.
+    """
+    # The script jobs of the networks are killed with their networks
+    networks = set(report.networks)
+    actions = [AuditAction("delete_network", target_joint) for target_joint in report.networks]
+    actions += [AuditAction("delete_node", node) for node in report.orphan_nodes]
+    actions += [AuditAction("kill_script_jobs", joint) for joint in report.stale_script_jobs if joint not in networks]
+    actions += [AuditAction("delete_attribute", plug) for plug in report.leftover_attributes]
+    return actions
+
+def apply_actions(actions):
+    """
+    Applies the actions of a plan, batching each kind of action.
+
+    Args:
+        actions (list): The AuditActions.
+    """
+    targets = OrderedDict((action, []) for action in ACTIONS)
+    for action in actions:
+        targets[action.action].append(action.target)
+
+    if targets["delete_network"]:
+        cjs.delete_symmetry_networks(targets["delete_network"])
+
+    # Delete every orphan node at once
+    orphan_nodes = cmds.ls(targets["delete_node"]) if targets["delete_node"] else []
+    if orphan_nodes:
+        cmds.delete(*orphan_nodes)
+
+    for target_joint in targets["kill_script_jobs"]:
+        _kill_script_jobs(target_joint)
+
+    for plug in targets["delete_attribute"]:
+        cmds.deleteAttr(plug)
+
+    if targets["link_network"]:
+        cjs.link_symmetry_networks(targets["link_network"])
+
+    if targets["register_callbacks"]:
+        target_joints = set(targets["register_callbacks"])
+        cjs.relink_symmetry_networks([network for network in cjs.list_symmetry_networks() if network.target_joint in target_joints])
+
+def _kill_script_jobs(target_joint):
+    """
+    Kills the script jobs of a target joint left by older versions of the tool and deletes their IDs.
+    """
+    plug = target_joint + ".symmetryConstraintScriptJobIDs"
+    for index in cmds.getAttr(plug, multiIndices=True) or []:
+        job_id = cmds.getAttr("{}[{}]".format(plug, index))
+        if cmds.scriptJob(exists=job_id):
+            cmds.scriptJob(kill=job_id, force=True)
+    cmds.deleteAttr(plug)
+
+def repair_scene(report=None, dry_run=False):
+    """
+    Repairs the leftovers of the broken symmetry networks of the scene, keeping the valid networks.
+
+    Args:
+        report (AuditReport): The audit of the scene. Audited again if not given.
+        dry_run (bool): Whether to only plan the repair without changing the scene.
+
+    Returns:
+        list: The AuditActions that were applied, or that would be applied in a dry run.
+    """
+    actions = plan_repair(report or audit_scene())
+    if not dry_run:
+        apply_actions(actions)
+    return actions
+
+def teardown_scene(report=None, dry_run=False):
+    """
+    Removes every symmetry network of the scene and the leftovers of the broken ones.
+
+    Args:
+        report (AuditReport): The audit of the scene. Audited again if not given.
+        dry_run (bool): Whether to only plan the teardown without changing the scene.
+
+    Returns:
+        list: The AuditActions that were applied, or that would be applied in a dry run.
+    """
+    actions = plan_teardown(report or audit_scene())
+    if not dry_run:
+        apply_actions(actions)
+    return actions
+
+def format_report(report):
+    """
+    Returns an audit report as printable text.
+
+    Args:
+        report (AuditReport): The audit report.
+
+    Returns:
+        str: The text.
+    """
+    lines = ["{} symmetry networks".format(len(report.networks))]
+    for label, items in [
+        ("orphan nodes", report.orphan_nodes),
+        ("leftover attributes", report.leftover_attributes),
+        ("stale script job IDs", report.stale_script_jobs),
+        ("unlinked networks", report.unlinked_networks),
+        ("unwatched networks", report.unwatched_networks),
+    ]:
+        lines.append("{} {}{}".format(len(items), label, ": " + ", ".join(items[:10]) + (", ..." if len(items) > 10 else "") if items else ""))
+    return "\n".join(lines)
+
+def format_actions(actions):
+    """
+    Returns the actions of a plan as printable text, one count per kind of action.
+
+    Args:
+        actions (list): The AuditActions.
+
+    Returns:
+        str: The text.
+    """
+    counts = OrderedDict((action, 0) for action in ACTIONS)
+    for action in actions:
+        counts[action.action] += 1
+    return "\n".join("{:<20} {:>8}".format(action, count) for action, count in counts.items() if count)
+
+def execute(repair=False, teardown=False, dry_run=False):
+    """
+    Executes the audit, and the repair or teardown of the scene in a single undo chunk
+
+    Args:
+        repair: Whether to repair the leftovers of the broken networks
+        teardown: Whether to remove every network and the leftovers of the broken ones
+        dry_run: Whether to only print the actions of the repair or teardown
+    """
+    try:
+        # Open an undo chunk
+        cmds.undoInfo(openChunk=True)
+        report = audit_scene()
+        print(format_report(report))
+        if teardown or repair:
+            actions = teardown_scene(report, dry_run) if teardown else repair_scene(report, dry_run)
+            print("{} actions{}".format(len(actions), " planned:" if dry_run else " applied:"))
+            print(format_actions(actions))
+    except Exception as e:
+        # Print the error message
+        cmds.warning("An error occurred: {}".format(str(e)))
+    finally:
+        # Close the undo chunk
+        cmds.undoInfo(closeChunk=True)
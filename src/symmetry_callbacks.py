@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+Process-wide registry of the symmetry networks that must be cleaned up when one of their nodes is
+deleted.
+
+Instead of registering script jobs for every pair, a single node-removed callback and a single
+scene event hook serve every network. Nodes are indexed by their MObjectHandle hash code, so each
+event costs one dictionary lookup no matter how many networks exist, and renaming a node does not
+break its registration.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import maya.api.OpenMaya as om
+import maya.utils
+
+# The scene messages after which the registered networks no longer exist
+_SCENE_RESET_MESSAGES = ("kBeforeNew", "kBeforeOpen")
+
+class SymmetryCallbackRegistry(object):
+    """
+    Indexes symmetry networks by their nodes and tears them down when one of the nodes is deleted.
+
+    Attributes:
+        networks (dict): The registered networks. Maps the hash code of each target joint to a
+            (target joint handle, target joint name, node hash codes, teardown function) tuple.
+        node_index (dict): Maps the hash code of each watched node to the hash codes of the target
+            joints of the networks it belongs to.
+    """
+    def __init__(self):
+        self.networks = {}
+        self.node_index = {}
+        self._callback_ids = []
+
+    def is_installed(self):
+        """
+        Returns whether the callbacks are installed.
+        """
+        return bool(self._callback_ids)
+
+    def install(self):
+        """
+        Installs the node-removed callback and the scene event hooks.
+        """
+        if self._callback_ids:
+            return
+        self._callback_ids.append(om.MDGMessage.addNodeRemovedCallback(self._on_node_removed, "dependNode"))
+        for message in _SCENE_RESET_MESSAGES:
+            self._callback_ids.append(om.MSceneMessage.addCallback(getattr(om.MSceneMessage, message), self._on_scene_reset))
+        self._callback_ids.append(om.MSceneMessage.addCallback(om.MSceneMessage.kMayaExiting, self._on_maya_exiting))
+
+    def uninstall(self):
+        """
+        Removes the callbacks.
+        """
+        if self._callback_ids:
+            om.MMessage.removeCallbacks(self._callback_ids)
+        self._callback_ids = []
+
+    def register(self, target_joint, nodes, teardown):
+        """
+        Registers a symmetry network.
+
+        Args:
+            target_joint (str): The target joint of the network.
+            nodes (list): The nodes whose deletion invalidates the network, including the joints.
+            teardown (callable): Called with the name of the target joint to delete the network.
+        """
+        self.install()
+        target_handle = _object_handle(target_joint)
+        target_hash = target_handle.hashCode()
+        self.unregister_hash(target_hash)
+
+        node_hashes = tuple(_object_handle(node).hashCode() for node in nodes)
+        self.networks[target_hash] = (target_handle, target_joint, node_hashes, teardown)
+        for node_hash in node_hashes:
+            self.node_index.setdefault(node_hash, set()).add(target_hash)
+
+    def unregister(self, target_joint):
+        """
+        Unregisters the symmetry network of a target joint without tearing it down.
+
+        Args:
+            target_joint (str): The target joint of the network.
+        """
+        if not _node_exists(target_joint):
+            # The joint is gone, so find its network by the name it was registered with
+            for target_hash, (_, name, _, _) in list(self.networks.items()):
+                if name == target_joint:
+                    self.unregister_hash(target_hash)
+            return
+        self.unregister_hash(_object_handle(target_joint).hashCode())
+
+    def unregister_hash(self, target_hash):
+        """
+        Unregisters a symmetry network by the hash code of its target joint.
+
+        Returns:
+            tuple: The removed (target joint handle, target joint name, node hash codes, teardown
+                function), or None.
+        """
+        network = self.networks.pop(target_hash, None)
+        if network is None:
+            return None
+        for node_hash in network[2]:
+            targets = self.node_index.get(node_hash)
+            if targets is not None:
+                targets.discard(target_hash)
+                if not targets:
+                    del self.node_index[node_hash]
+        return network
+
+    def clear(self):
+        """
+        Forgets every registered network.
+        """
+        self.networks.clear()
+        self.node_index.clear()
+
+    def _on_node_removed(self, node, client_data):
+        """
+        Tears down the networks the removed node belongs to.
+        """
+        targets = self.node_index.get(om.MObjectHandle(node).hashCode())
+        if not targets:
+            return
+        for target_hash in list(targets):
+            network = self.unregister_hash(target_hash)
+            if network is None:
+                continue
+            target_handle, target_joint, _, teardown = network
+            # Use the current name of the target joint in case it was renamed
+            if target_handle.isValid() and target_handle.object() != node:
+                target_joint = om.MFnDependencyNode(target_handle.object()).name()
+            # Nodes cannot be deleted from inside a node-removed callback
+            maya.utils.executeDeferred(teardown, target_joint)
+
+    def _on_scene_reset(self, client_data):
+        """
+        Forgets the networks of the scene being closed.
+        """
+        self.clear()
+
+    def _on_maya_exiting(self, client_data):
+        """
+        Removes the callbacks before Maya exits.
+        """
+        self.clear()
+        self.uninstall()
+
+def _object_handle(node):
+    """
+    Returns the MObjectHandle of a node.
+    """
+    selection = om.MSelectionList()
+    selection.add(node)
+    return om.MObjectHandle(selection.getDependNode(0))
+
+def _node_exists(node):
+    """
+    Returns whether a node exists.
+    """
+    selection = om.MSelectionList()
+    try:
+        selection.add(node)
+    except RuntimeError:
+        return False
+    return True
+
+# Keep the registry across module reloads, so its callbacks are never orphaned
+if "_registry" not in globals():
+    _registry = None
+
+def get_registry():
+    """
+    Returns the process-wide symmetry callback registry.
+
+    Returns:
+        SymmetryCallbackRegistry: The registry.
+    """
+    global _registry
+    if _registry is None:
+        _registry = SymmetryCallbackRegistry()
+    return _registry
@@ -0,0 +1,321 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+Static analysis of the evaluation cost of the symmetry networks.
+
+analyze_networks walks the nodes and connections of each network and reports, for each pair, the
+number of network nodes, the number of data connections, the dependency depth from the source
+joint to the target joint, whether Python cleanup callbacks watch it, and the constructs known to
+make the evaluation manager evaluate it serially. The message connections linking a network to its
+target joint carry no data and are ignored.
+
+The scene is read through a graph object: SceneGraph reads it with three maya.cmds queries for the
+whole scene, and StaticGraph serves a fixed list of nodes and connections, so the analysis can run
+without Maya.
+
+Usage:
+    import symmetry_evaluation
+    symmetry_evaluation.execute()
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from collections import OrderedDict, namedtuple
+
+import maya.cmds as cmds
+
+import symmetry_callbacks
+import symmetry_index
+
+# The constructs known to force serial evaluation, with a description of each one
+SERIAL_CONSTRUCTS = OrderedDict([
+    ("cycle", "The network reads the target joint it drives. The evaluation manager groups such node-level cycles into a cluster evaluated on one thread."),
+    ("expression", "An expression drives the network or its target joint. Expressions are evaluated one at a time."),
+    ("script_job", "The target joint holds the script jobs of an older version of the tool, which run Python when its attributes change."),
+])
+
+# The node types evaluated one at a time
+SERIAL_NODE_TYPES = ("expression",)
+
+# The attribute holding the script job IDs of older versions of the tool
+_SCRIPT_JOB_ATTRIBUTE = "symmetryConstraintScriptJobIDs"
+
+class SerialConstruct(namedtuple("SerialConstruct", ["kind", "node"])):
+    """
+    A construct forcing the serial evaluation of a network.
+
+    Attributes:
+        kind (str): The kind of construct. See SERIAL_CONSTRUCTS.
+        node (str): The node the construct was found on.
+    """
+    __slots__ = ()
+
+class PairReport(namedtuple("PairReport", ["source_joint", "target_joint", "mode", "nodes", "connections", "depth", "callbacks", "constructs"])):
+    """
+    The evaluation cost of the symmetry network of a pair. See analyze_networks.
+
+    Attributes:
+        source_joint (str): The source joint.
+        target_joint (str): The target joint.
+        mode (str): The network mode.
+        nodes (int): The number of network nodes.
+        connections (int): The number of data connections to and from the network nodes.
+        depth (int): The number of connections on the longest chain from the source joint to the
+            target joint, or 0 if the target joint is not driven by the source joint.
+        callbacks (bool): Whether cleanup callbacks watch the network. They run when its nodes are
+            deleted, outside of the evaluation.
+        constructs (list): The SerialConstructs found in the network.
+    """
+    __slots__ = ()
+
+    @property
+    def parallel(self):
+        """
+        Whether nothing in the network forces serial evaluation.
+        """
+        return not self.constructs
+
+class SceneGraph(object):
+    """
+    Reads the nodes and connections of the networks from the scene.
+    """
+    def incoming_connections(self, nodes):
+        """
+        Returns the connections into some nodes.
+
+        Args:
+            nodes (list): The node names.
+
+        Returns:
+            list: The (source plug, destination plug) tuples.
+        """
+        if not nodes:
+            return []
+        listed = cmds.listConnections(nodes, source=True, destination=False, connections=True, plugs=True) or []
+        return list(zip(listed[1::2], listed[0::2]))
+
+    def node_types(self, nodes):
+        """
+        Returns the types of some nodes.
+
+        Args:
+            nodes (list): The node names.
+
+        Returns:
+            dict: The type of each existing node, keyed by its name.
+        """
+        if not nodes:
+            return {}
+        listed = cmds.ls(nodes, showType=True) or []
+        return dict(zip(listed[0::2], listed[1::2]))
+
+    def existing_plugs(self, plugs):
+        """
+        Returns the plugs that exist among some plugs.
+
+        Args:
+            plugs (list): The plugs.
+
+        Returns:
+            set: The existing plugs.
+        """
+        if not plugs:
+            return set()
+        return set(cmds.ls(plugs) or [])
+
+class StaticGraph(object):
+    """
+    A fixed graph of nodes and connections, read like the scene by analyze_networks.
+
+    Attributes:
+        connections (list): The (source plug, destination plug) tuples of the graph.
+        types (dict): The type of each node, keyed by its name.
+        plugs (set): The dynamic plugs that exist, such as the script job IDs of older versions of the tool.
+    """
+    def __init__(self, connections, types=None, plugs=()):
+        self.connections = list(connections)
+        self.types = dict(types or {})
+        self.plugs = set(plugs)
+
+    def incoming_connections(self, nodes):
+        nodes = set(nodes)
+        return [connection for connection in self.connections if _node_name(connection[1]) in nodes]
+
+    def node_types(self, nodes):
+        return dict((node, self.types[node]) for node in nodes if node in self.types)
+
+    def existing_plugs(self, plugs):
+        return set(plug for plug in plugs if plug in self.plugs)
+
+def analyze_networks(networks, graph, watched_targets=()):
+    """
+    Reports the evaluation cost of symmetry networks.
+
+    The connections into every network node and target joint are read with one query, the types of
+    the nodes driving them with another one, and the script job IDs of every target joint with a
+    third one.
+
+    Args:
+        networks (list): The (source joint, target joint, mode, network nodes) tuples of the networks.
+        graph: The graph to read the networks from, a SceneGraph or a StaticGraph.
+        watched_targets (list): The target joints whose networks are watched by cleanup callbacks.
+
+    Returns:
+        list: A PairReport for each network, in the order of the networks.
+    """
+    networks = [(_node_name(source_joint), _node_name(target_joint), mode, [_node_name(node) for node in nodes]) for source_joint, target_joint, mode, nodes in networks]
+    watched_targets = set(_node_name(target_joint) for target_joint in watched_targets)
+
+    # Read the data connections into every network node and target joint at once
+    queried_nodes = list(OrderedDict.fromkeys(node for _, target_joint, _, nodes in networks for node in nodes + [target_joint]))
+    incoming = {}
+    for source_plug, destination_plug in graph.incoming_connections(queried_nodes):
+        if source_plug.partition(".")[2] != "message":
+            incoming.setdefault(_node_name(destination_plug), []).append(_node_name(source_plug))
+
+    # Read the types of the nodes driving them and the legacy script job IDs
+    driving_nodes = list(OrderedDict.fromkeys(node for sources in incoming.values() for node in sources))
+    node_types = graph.node_types(driving_nodes)
+    job_plugs = graph.existing_plugs([target_joint + "." + _SCRIPT_JOB_ATTRIBUTE for _, target_joint, _, _ in networks])
+
+    reports = []
+    for source_joint, target_joint, mode, nodes in networks:
+        network_nodes = set(nodes)
+
+        # The data connections into the network nodes, and from them into the target joint
+        edges = {}
+        connection_count = 0
+        for node in nodes + [target_joint]:
+            for source_node in incoming.get(node, []):
+                if node == target_joint and source_node not in network_nodes:
+                    continue
+                edges.setdefault(source_node, []).append(node)
+                connection_count += 1
+
+        constructs = []
+        if _reaches(target_joint, target_joint, edges, network_nodes):
+            constructs.append(SerialConstruct("cycle", target_joint))
+        for node in nodes + [target_joint]:
+            for source_node in OrderedDict.fromkeys(incoming.get(node, [])):
+                if node_types.get(source_node) in SERIAL_NODE_TYPES:
+                    constructs.append(SerialConstruct("expression", source_node))
+        if target_joint + "." + _SCRIPT_JOB_ATTRIBUTE in job_plugs:
+            constructs.append(SerialConstruct("script_job", target_joint))
+
+        reports.append(PairReport(
+            source_joint=source_joint,
+            target_joint=target_joint,
+            mode=mode,
+            nodes=len(nodes),
+            connections=connection_count,
+            depth=_chain_depth(source_joint, target_joint, edges),
+            callbacks=target_joint in watched_targets,
+            constructs=constructs,
+        ))
+    return reports
+
+def analyze_scene(graph=None):
+    """
+    Reports the evaluation cost of every symmetry network of the scene.
+
+    Args:
+        graph: The graph to read the networks from. Defaults to a SceneGraph.
+
+    Returns:
+        list: A PairReport for each network. See analyze_networks.
+    """
+    index = symmetry_index.get_index()
+    index.ensure_built()
+    networks = index.networks()
+    registry = symmetry_callbacks.get_registry()
+    watched_targets = [network.target_joint for network in networks if network.target_handle.hashCode() in registry.networks]
+    network_nodes = [(network.source_joint, network.target_joint, network.mode, list(network.nodes().values())) for network in networks]
+    return analyze_networks(network_nodes, graph or SceneGraph(), watched_targets)
+
+def _node_name(plug):
+    """
+    Returns the short name of the node of a plug or node name.
+    """
+    return plug.partition(".")[0].split("|")[-1]
+
+def _reaches(start, goal, edges, network_nodes):
+    """
+    Checks whether a node reaches another one through the network nodes.
+    """
+    stack = list(edges.get(start, []))
+    visited = set()
+    while stack:
+        node = stack.pop()
+        if node == goal:
+            return True
+        if node in visited or node not in network_nodes:
+            continue
+        visited.add(node)
+        stack += edges.get(node, [])
+    return False
+
+def _chain_depth(source_joint, target_joint, edges):
+    """
+    Returns the number of connections on the longest chain from the source joint to the target
+    joint, or 0 if there is none. The connections leaving the target joint are not followed.
+    """
+    depths = {}
+
+    def depth(node, visiting):
+        if node == target_joint:
+            return 0
+        if node in depths:
+            return depths[node]
+        best = None
+        for next_node in edges.get(node, []):
+            if next_node in visiting or next_node == source_joint:
+                continue
+            next_depth = depth(next_node, visiting | set([node]))
+            if next_depth is not None and (best is None or next_depth + 1 > best):
+                best = next_depth + 1
+        depths[node] = best
+        return best
+
+    return depth(source_joint, set()) or 0
+
+def format_report(reports):
+    """
+    Returns the reports of the networks as printable text, one line per pair and a summary.
+
+    Args:
+        reports (list): The PairReports.
+
+    Returns:
+        str: The text.
+    """
+    lines = ["{:<40} {:<10} {:>6} {:>12} {:>6} {:>10}  {}".format("target", "mode", "nodes", "connections", "depth", "callbacks", "serial constructs")]
+    for report in reports:
+        constructs = ", ".join("{} ({})".format(construct.kind, construct.node) for construct in report.constructs)
+        lines.append("{:<40} {:<10} {:>6} {:>12} {:>6} {:>10}  {}".format(
+            report.target_joint, report.mode, report.nodes, report.connections, report.depth, "yes" if report.callbacks else "no", constructs or "-"))
+
+    # Summarize the pairs and describe the constructs that were found
+    serial_count = len([report for report in reports if not report.parallel])
+    lines.append("")
+    lines.append("{} pairs, {} evaluated in parallel, {} forced into serial evaluation".format(len(reports), len(reports) - serial_count, serial_count))
+    for kind, description in SERIAL_CONSTRUCTS.items():
+        count = len([report for report in reports if kind in [construct.kind for construct in report.constructs]])
+        if count:
+            lines.append("{} {}: {}".format(count, kind, description))
+    return "\n".join(lines)
+
+def execute():
+    """
+    Executes the analysis of the symmetry networks of the scene and prints the report
+    """
+    try:
+        reports = analyze_scene()
+        print(format_report(reports))
+    except Exception as e:
+        # Print the error message
+        cmds.warning("An error occurred: {}".format(str(e)))
+
+if __name__ == '__main__':
+    # Execute the script
+    execute()
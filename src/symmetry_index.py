@@ -0,0 +1,405 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+In-memory index of the symmetry networks of the scene.
+
+Every network is tagged with message connections on its target joint: the message of the source
+joint is connected to symmetrySource, and the message of each network node is connected to an
+element of symmetryNetworkNodes, whose logical index is the position of the node suffix in
+NETWORK_NODE_SUFFIXES. The index is built from these links with one ls query by node type and two
+bulk listConnections queries, then kept up to date by the builders, so finding, listing and
+deleting networks no longer looks nodes up by name. Joints and nodes are indexed by their
+MObjectHandle, so renaming them or moving them into a namespace does not break their network.
+
+The index is rebuilt lazily after the scene is reset, after undo and redo, and after files or
+references are imported or loaded.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import maya.api.OpenMaya as om
+import maya.cmds as cmds
+
+# The suffixes of the nodes of a network. The position of a suffix is the logical index of the
+# symmetryNetworkNodes element the node is connected to.
+NETWORK_NODE_SUFFIXES = ("_symmetry_constraint", "_pma_translate", "_pma_rotate", "_pma_scale", "_symmetry_mult_matrix", "_symmetry_native_matrix")
+
+# The suffixes of the nodes driving the target joint, in the standard, compact and native modes
+DRIVER_SUFFIXES = ("_symmetry_constraint", "_symmetry_mult_matrix", "_symmetry_native_matrix")
+
+# The network mode of each driver suffix
+_DRIVER_MODES = {"_symmetry_constraint": "standard", "_symmetry_mult_matrix": "compact", "_symmetry_native_matrix": "native"}
+
+# The types of the network nodes
+NETWORK_NODE_TYPES = ("symmetryConstraint", "plusMinusAverage", "multiplyDivide", "multMatrix")
+
+# The message attribute of the target joint connected to the source joint
+SOURCE_ATTRIBUTE = "symmetrySource"
+
+# The multi message attribute of the target joint connected to the network nodes
+NODES_ATTRIBUTE = "symmetryNetworkNodes"
+
+# The plug of each driver node connected to the source joint, used to index the networks built
+# before the message links were added
+_LEGACY_SOURCE_PLUGS = {"_symmetry_constraint": ".targetWorldMatrix", "_symmetry_mult_matrix": ".matrixIn[2]", "_symmetry_native_matrix": ".matrixIn[2]"}
+
+# The scene messages after which the index must be rebuilt
+_SCENE_MESSAGES = ("kBeforeNew", "kBeforeOpen", "kAfterImport", "kAfterCreateReference", "kAfterLoadReference", "kAfterUnloadReference", "kAfterRemoveReference")
+
+# The events after which the index must be rebuilt
+_EVENTS = ("Undo", "Redo")
+
+class IndexedNetwork(object):
+    """
+    A symmetry network of the index.
+
+    Attributes:
+        source_handle (MObjectHandle): The handle of the source joint.
+        target_handle (MObjectHandle): The handle of the target joint.
+        node_handles (dict): The handle of each network node, keyed by its suffix.
+        linked (bool): Whether the network is tagged with message links. The networks built before
+            the links were added are indexed by the names of their nodes.
+    """
+    __slots__ = ("source_handle", "target_handle", "node_handles", "linked")
+
+    def __init__(self, source_handle, target_handle, node_handles, linked=True):
+        self.source_handle = source_handle
+        self.target_handle = target_handle
+        self.node_handles = node_handles
+        self.linked = linked
+
+    @property
+    def source_joint(self):
+        """
+        The current name of the source joint.
+        """
+        return _handle_name(self.source_handle)
+
+    @property
+    def target_joint(self):
+        """
+        The current name of the target joint.
+        """
+        return _handle_name(self.target_handle)
+
+    @property
+    def mode(self):
+        """
+        The network mode, "standard", "compact" or "native".
+        """
+        for suffix in DRIVER_SUFFIXES[1:]:
+            if suffix in self.node_handles:
+                return _DRIVER_MODES[suffix]
+        return "standard"
+
+    @property
+    def driver(self):
+        """
+        The current name of the node driving the target joint, or None if it no longer exists.
+        """
+        for suffix in DRIVER_SUFFIXES:
+            handle = self.node_handles.get(suffix)
+            if handle is not None and handle.isValid():
+                return _handle_name(handle)
+        return None
+
+    def nodes(self):
+        """
+        Returns the network nodes that exist.
+
+        Returns:
+            dict: The current name of each node, keyed by its suffix.
+        """
+        return dict((suffix, _handle_name(handle)) for suffix, handle in self.node_handles.items() if handle.isValid())
+
+    def is_valid(self):
+        """
+        Returns whether the joints and the driver node of the network exist.
+        """
+        return self.source_handle.isValid() and self.target_handle.isValid() and self.driver is not None
+
+class SymmetryNetworkIndex(object):
+    """
+    Maps the target and source joints of the symmetry networks to their nodes.
+    """
+    def __init__(self):
+        self._networks = {}
+        self._sources = {}
+        self._unindexed = []
+        self._built = False
+        self._callback_ids = []
+
+    def install(self):
+        """
+        Installs the callbacks invalidating the index.
+        """
+        if self._callback_ids:
+            return
+        for message in _SCENE_MESSAGES:
+            self._callback_ids.append(om.MSceneMessage.addCallback(getattr(om.MSceneMessage, message), self._on_scene_changed))
+        for event in _EVENTS:
+            self._callback_ids.append(om.MEventMessage.addEventCallback(event, self._on_scene_changed))
+
+    def uninstall(self):
+        """
+        Removes the callbacks.
+        """
+        if self._callback_ids:
+            om.MMessage.removeCallbacks(self._callback_ids)
+        self._callback_ids = []
+
+    def invalidate(self):
+        """
+        Forgets the indexed networks, so the index is rebuilt on its next query.
+        """
+        self._networks = {}
+        self._sources = {}
+        self._unindexed = []
+        self._built = False
+
+    def build(self):
+        """
+        Rebuilds the index from the message links of the scene.
+        """
+        self.invalidate()
+        self._built = True
+        self.install()
+
+        nodes = cmds.ls(type=list(NETWORK_NODE_TYPES)) or []
+        if not nodes:
+            return
+
+        # Find the network nodes and their target joints from the message links of every node at once
+        node_names = {}
+        links = cmds.listConnections([node + ".message" for node in nodes], source=False, destination=True, connections=True, plugs=True) or []
+        for node_plug, target_plug in zip(links[0::2], links[1::2]):
+            target_joint, _, attribute = target_plug.partition(".")
+            if not attribute.startswith(NODES_ATTRIBUTE + "["):
+                continue
+            index = int(attribute[len(NODES_ATTRIBUTE) + 1:-1])
+            if index < len(NETWORK_NODE_SUFFIXES):
+                node_names.setdefault(target_joint, {})[NETWORK_NODE_SUFFIXES[index]] = node_plug.partition(".")[0]
+
+        # Find the source joints of the linked networks at once
+        source_joints = {}
+        if node_names:
+            links = cmds.listConnections([target_joint + "." + SOURCE_ATTRIBUTE for target_joint in node_names], source=True, destination=False, connections=True) or []
+            for target_plug, source_joint in zip(links[0::2], links[1::2]):
+                source_joints[target_plug.partition(".")[0]] = source_joint
+
+        # Index the networks built before the message links by the names of their nodes
+        node_set = set(nodes)
+        legacy_plugs = []
+        legacy_targets = set()
+        for node in nodes:
+            for suffix in DRIVER_SUFFIXES:
+                target_joint = node[:-len(suffix)]
+                if node.endswith(suffix) and target_joint not in node_names and _find_handle(target_joint) is not None:
+                    legacy_plugs.append(node + _LEGACY_SOURCE_PLUGS[suffix])
+        if legacy_plugs:
+            links = cmds.listConnections(legacy_plugs, source=True, destination=False, connections=True) or []
+            for driver_plug, source_joint in zip(links[0::2], links[1::2]):
+                driver = driver_plug.partition(".")[0]
+                suffix = [suffix for suffix in DRIVER_SUFFIXES if driver.endswith(suffix)][0]
+                target_joint = driver[:-len(suffix)]
+                node_names[target_joint] = dict((suffix, target_joint + suffix) for suffix in NETWORK_NODE_SUFFIXES if target_joint + suffix in node_set)
+                source_joints[target_joint] = source_joint
+                legacy_targets.add(target_joint)
+
+        indexed_nodes = set()
+        for target_joint, names in node_names.items():
+            if target_joint in source_joints and self._add(source_joints[target_joint], target_joint, names, linked=target_joint not in legacy_targets):
+                indexed_nodes.update(names.values())
+
+        # Keep the network nodes that belong to no network, linked or named after one
+        linked_nodes = set(name for names in node_names.values() for name in names.values())
+        for node in nodes:
+            if node not in indexed_nodes and (node in linked_nodes or node.endswith(NETWORK_NODE_SUFFIXES)):
+                self._unindexed.append(_find_handle(node))
+
+    def ensure_built(self):
+        """
+        Builds the index if it was invalidated.
+        """
+        if not self._built:
+            self.build()
+
+    def _add(self, source_joint, target_joint, nodes, linked=True):
+        source_handle = _find_handle(source_joint)
+        target_handle = _find_handle(target_joint)
+        if source_handle is None or target_handle is None:
+            return None
+        node_handles = {}
+        for suffix, node in nodes.items():
+            handle = _find_handle(node)
+            if handle is not None:
+                node_handles[suffix] = handle
+        network = IndexedNetwork(source_handle, target_handle, node_handles, linked)
+        self._networks[target_handle.hashCode()] = network
+        self._sources[source_handle.hashCode()] = target_handle.hashCode()
+        return network
+
+    def add(self, source_joint, target_joint, nodes):
+        """
+        Indexes a network that was just built.
+
+        Args:
+            source_joint (str): The source joint.
+            target_joint (str): The target joint.
+            nodes (dict): The name of each network node, keyed by its suffix.
+        """
+        self.ensure_built()
+        self.remove(target_joint)
+        self._add(source_joint, target_joint, nodes)
+
+    def remove(self, target_joint):
+        """
+        Forgets the network of a target joint.
+
+        Args:
+            target_joint (str): The target joint. If it no longer exists, every network whose target
+                joint was deleted is forgotten.
+
+        Returns:
+            list: The forgotten IndexedNetworks.
+        """
+        self.ensure_built()
+        handle = _find_handle(target_joint)
+        if handle is None:
+            target_hashes = [target_hash for target_hash, network in self._networks.items() if not network.target_handle.isValid()]
+        else:
+            target_hashes = [handle.hashCode()]
+        return [network for network in [self._forget(target_hash) for target_hash in target_hashes] if network is not None]
+
+    def _forget(self, target_hash):
+        network = self._networks.pop(target_hash, None)
+        if network is not None and self._sources.get(network.source_handle.hashCode()) == target_hash:
+            del self._sources[network.source_handle.hashCode()]
+        return network
+
+    def entry(self, target_joint):
+        """
+        Returns the indexed network of a target joint, even if some of its nodes were deleted.
+
+        Args:
+            target_joint (str): The target joint.
+
+        Returns:
+            IndexedNetwork: The network, or None.
+        """
+        self.ensure_built()
+        handle = _find_handle(target_joint)
+        if handle is None:
+            return None
+        return self._networks.get(handle.hashCode())
+
+    def get(self, target_joint):
+        """
+        Returns the valid network driving a target joint.
+
+        Args:
+            target_joint (str): The target joint.
+
+        Returns:
+            IndexedNetwork: The network, or None.
+        """
+        network = self.entry(target_joint)
+        return network if network is not None and network.is_valid() else None
+
+    def find(self, joint):
+        """
+        Returns the valid network a joint is the target or the source of.
+
+        Args:
+            joint (str): The joint.
+
+        Returns:
+            IndexedNetwork: The network, or None.
+        """
+        self.ensure_built()
+        handle = _find_handle(joint)
+        if handle is None:
+            return None
+        joint_hash = handle.hashCode()
+        for target_hash in [joint_hash, self._sources.get(joint_hash)]:
+            network = self._networks.get(target_hash)
+            if network is not None and network.is_valid():
+                return network
+        return None
+
+    def networks(self):
+        """
+        Returns every valid network.
+
+        Returns:
+            list: The IndexedNetworks.
+        """
+        self.ensure_built()
+        return [network for network in self._networks.values() if network.is_valid()]
+
+    def entries(self):
+        """
+        Returns every indexed network, including the ones whose joints or driver node were deleted.
+
+        Returns:
+            list: The IndexedNetworks.
+        """
+        self.ensure_built()
+        return list(self._networks.values())
+
+    def orphan_nodes(self):
+        """
+        Returns the network nodes that do not belong to a valid network.
+
+        These are the nodes of the indexed networks whose joints or driver node were deleted, and the
+        nodes linked to or named after a network that could not be indexed when the index was built.
+
+        Returns:
+            list: The names of the orphan nodes.
+        """
+        self.ensure_built()
+        nodes = [_handle_name(handle) for handle in self._unindexed if handle.isValid()]
+        for network in self._networks.values():
+            if not network.is_valid():
+                nodes += list(network.nodes().values())
+        return nodes
+
+    def _on_scene_changed(self, *args):
+        """
+        Invalidates the index once the networks of the scene may have changed behind its back.
+        """
+        self.invalidate()
+
+def _find_handle(node):
+    """
+    Returns the MObjectHandle of a node, or None if it does not exist.
+    """
+    selection = om.MSelectionList()
+    try:
+        selection.add(node)
+    except RuntimeError:
+        return None
+    return om.MObjectHandle(selection.getDependNode(0))
+
+def _handle_name(handle):
+    """
+    Returns the current name of the node of a handle.
+    """
+    return om.MFnDependencyNode(handle.object()).name()
+
+# Keep the index across module reloads, so its callbacks are never orphaned
+if "_index" not in globals():
+    _index = None
+
+def get_index():
+    """
+    Returns the process-wide symmetry network index.
+
+    Returns:
+        SymmetryNetworkIndex: The index.
+    """
+    global _index
+    if _index is None:
+        _index = SymmetryNetworkIndex()
+    return _index
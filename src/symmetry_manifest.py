@@ -0,0 +1,341 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+Persistent manifest of the symmetry networks of a scene.
+
+The pair definitions, offsets and rest poses of every network are serialized as JSON, either to the
+jointSymmetryManifest node of the scene or to a file. The manifest node is written before the scene
+is saved, and when the scene is opened again the networks it lists are relinked to their cleanup
+callbacks in bulk, and the missing ones are rebuilt. Exported manifests can be imported on other
+characters sharing the same skeleton topology, renaming their joints on the way.
+
+Call install() once per session, for example from userSetup.py, to keep the manifest of every
+saved scene up to date and restore it on open.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import json
+from collections import OrderedDict
+
+import maya.api.OpenMaya as om
+import maya.cmds as cmds
+import maya.utils
+
+import create_joint_symmetry as cjs
+import symmetry_math
+
+# The name of the scene node holding the manifest
+MANIFEST_NODE_NAME = "jointSymmetryManifest"
+
+# The string attribute of the manifest node holding the JSON manifest
+MANIFEST_ATTRIBUTE = "symmetryManifest"
+
+# The version of the manifest format, increased whenever the format changes
+MANIFEST_VERSION = 1
+
+def build_manifest(networks=None):
+    """
+    Builds the manifest of symmetry networks from the scene.
+
+    Args:
+        networks (list): The SymmetryNetworks to serialize. Defaults to every network in the scene.
+
+    Returns:
+        dict: The manifest, with its "version" and its "networks", a list of dicts with the
+            "source", "target", "axis", "mode", "offset", "rest_matrix" and "rest_hash" of each
+            network. The offset holds the translate, rotate and scale offsets in the standard mode,
+            or the offset matrix in the compact and native modes.
+    """
+    if networks is None:
+        networks = cjs.list_symmetry_networks()
+
+    entries = []
+    for network in networks:
+        target_joint = network.target_joint
+        if network.mode in cjs.MATRIX_MODES:
+            offset = list(cmds.getAttr(target_joint + ".symmetryOffsetMatrix"))
+        else:
+            offset = []
+            for attribute in ["offsetTranslate", "offsetRotate", "offsetScale"]:
+                offset += list(cmds.getAttr(target_joint + "." + attribute)[0])
+
+        # Networks built before the rest pose was stored are saved at their current pose
+        if cmds.objExists(target_joint + ".symmetryRestMatrix"):
+            rest_matrix = list(cmds.getAttr(target_joint + ".symmetryRestMatrix"))
+            rest_hash = cmds.getAttr(target_joint + ".symmetryRestHash") or ""
+        else:
+            rest_matrix = list(cmds.getAttr(target_joint + ".worldMatrix[0]"))
+            rest_hash = ""
+
+        entries.append(OrderedDict([
+            ("source", network.source_joint),
+            ("target", target_joint),
+            ("axis", network.axis),
+            ("mode", network.mode),
+            ("offset", offset),
+            ("rest_matrix", rest_matrix),
+            ("rest_hash", rest_hash),
+        ]))
+
+    return OrderedDict([("version", MANIFEST_VERSION), ("networks", entries)])
+
+def write_scene_manifest(manifest=None):
+    """
+    Writes a manifest to the manifest node of the scene, creating the node if needed.
+
+    The node is deleted when the manifest lists no network, so scenes without symmetry stay clean.
+
+    Args:
+        manifest (dict): The manifest to write. Defaults to the manifest of the current scene.
+
+    Returns:
+        str: The manifest node, or None if it was deleted.
+    """
+    if manifest is None:
+        manifest = build_manifest()
+
+    exists = cmds.objExists(MANIFEST_NODE_NAME)
+    if not manifest["networks"]:
+        if exists:
+            cmds.delete(MANIFEST_NODE_NAME)
+        return None
+
+    if not exists:
+        cmds.createNode("network", name=MANIFEST_NODE_NAME)
+        cmds.addAttr(MANIFEST_NODE_NAME, longName=MANIFEST_ATTRIBUTE, dataType="string")
+    cmds.setAttr(MANIFEST_NODE_NAME + "." + MANIFEST_ATTRIBUTE, json.dumps(manifest, separators=(",", ":")), type="string")
+    return MANIFEST_NODE_NAME
+
+def read_scene_manifests():
+    """
+    Reads the manifests of the scene, including the ones of referenced scenes.
+
+    The joints of a manifest found in a namespace are renamed into that namespace.
+
+    Returns:
+        list: The manifests.
+    """
+    manifests = []
+    for node in cmds.ls(MANIFEST_NODE_NAME, recursive=True, type="network") or []:
+        if not cmds.objExists(node + "." + MANIFEST_ATTRIBUTE):
+            continue
+        manifest = _parse_manifest(cmds.getAttr(node + "." + MANIFEST_ATTRIBUTE) or "{}")
+        namespace = node.rpartition(":")[0]
+        if namespace:
+            manifest = remap_manifest(manifest, namespace=namespace)
+        manifests.append(manifest)
+    return manifests
+
+def export_manifest(file_path, manifest=None):
+    """
+    Exports a manifest to a JSON file.
+
+    Args:
+        file_path (str): The file to write.
+        manifest (dict): The manifest to export. Defaults to the manifest of the current scene.
+
+    Returns:
+        dict: The exported manifest.
+    """
+    if manifest is None:
+        manifest = build_manifest()
+    with open(file_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def load_manifest(file_path):
+    """
+    Loads a manifest from a JSON file.
+
+    Args:
+        file_path (str): The file to read.
+
+    Returns:
+        dict: The manifest.
+    """
+    with open(file_path, "r") as f:
+        return _parse_manifest(f.read())
+
+def _parse_manifest(text):
+    """
+    Parses a JSON manifest, checking its version.
+    """
+    manifest = json.loads(text, object_pairs_hook=OrderedDict)
+    version = manifest.get("version", MANIFEST_VERSION)
+    if version > MANIFEST_VERSION:
+        raise ValueError("The manifest version {} is newer than the supported version {}.".format(version, MANIFEST_VERSION))
+    manifest.setdefault("networks", [])
+    return manifest
+
+def remap_manifest(manifest, replacements=None, namespace=None):
+    """
+    Renames the joints of a manifest, for example to reuse it on another character.
+
+    Args:
+        manifest (dict): The manifest.
+        replacements (list): The (old, new) substrings replaced in every joint name, in order.
+        namespace (str): A namespace added to every joint name after the replacements.
+
+    Returns:
+        dict: The renamed manifest.
+    """
+    def rename(name):
+        for old, new in replacements or []:
+            name = name.replace(old, new)
+        if namespace:
+            name = "|".join(namespace + ":" + part if part else part for part in name.split("|"))
+        return name
+
+    entries = []
+    for entry in manifest["networks"]:
+        entry = OrderedDict(entry)
+        entry["source"] = rename(entry["source"])
+        entry["target"] = rename(entry["target"])
+        entries.append(entry)
+    remapped = OrderedDict(manifest)
+    remapped["networks"] = entries
+    return remapped
+
+def restore_manifest(manifest, rebuild_missing=True, use_stored_offsets=True):
+    """
+    Restores the symmetry networks listed in a manifest.
+
+    The networks that exist are relinked to their cleanup callbacks. The missing ones whose joints
+    exist are rebuilt in one batch per axis and mode.
+
+    Args:
+        manifest (dict): The manifest.
+        rebuild_missing (bool): Whether to rebuild the missing networks.
+        use_stored_offsets (bool): Whether to rebuild with the offsets and rest poses of the
+            manifest, or to solve them from the current pose, for example on another character.
+
+    Returns:
+        dict: The "relinked" target joints, the "rebuilt" (source joint, target joint) tuples and
+            the "skipped" (source joint, target joint) tuples whose joints do not exist.
+    """
+    entries = manifest["networks"]
+    existing_networks = dict((network.target_joint, network) for network in cjs.list_symmetry_networks())
+
+    # Relink the existing networks in one pass
+    relinked = cjs.relink_symmetry_networks([existing_networks[entry["target"]] for entry in entries if entry["target"] in existing_networks])
+
+    # Group the missing networks by axis and mode, checking every joint in one query
+    missing = [entry for entry in entries if entry["target"] not in existing_networks]
+    existing_joints = set(cmds.ls([joint for entry in missing for joint in (entry["source"], entry["target"])], type="joint") or []) if missing else set()
+    groups = OrderedDict()
+    skipped = []
+    for entry in missing:
+        pair = (entry["source"], entry["target"])
+        if pair[0] in existing_joints and pair[1] in existing_joints:
+            groups.setdefault((entry["axis"], entry["mode"]), []).append(entry)
+        else:
+            skipped.append(pair)
+
+    rebuilt = []
+    if rebuild_missing:
+        for (axis, mode), group in groups.items():
+            pairs = [(entry["source"], entry["target"]) for entry in group]
+            rest_states = dict(zip(pairs, [_rest_state(entry) for entry in group])) if use_stored_offsets else None
+            rebuilt += cjs.create_joint_symmetry_batch(pairs=pairs, axis=axis, mode=mode, rest_states=rest_states)
+
+    return {
+        "relinked": [network.target_joint for network in relinked],
+        "rebuilt": rebuilt,
+        "skipped": skipped,
+    }
+
+def _rest_state(entry):
+    """
+    Returns the RestState stored in a manifest entry.
+    """
+    offset = entry["offset"]
+    if entry["mode"] not in cjs.MATRIX_MODES:
+        offset = symmetry_math.Transform(offset[0:3], offset[3:6], offset[6:9])
+    return cjs.RestState(offset, entry["rest_matrix"], entry["rest_hash"])
+
+def restore_scene_networks(rebuild_missing=True):
+    """
+    Restores the symmetry networks listed in the manifests of the scene.
+
+    Args:
+        rebuild_missing (bool): Whether to rebuild the missing networks.
+
+    Returns:
+        dict: The merged restore report. See restore_manifest.
+    """
+    report = {"relinked": [], "rebuilt": [], "skipped": []}
+    for manifest in read_scene_manifests():
+        for key, values in restore_manifest(manifest, rebuild_missing).items():
+            report[key] += values
+    return report
+
+def import_manifest(file_path, replacements=None, use_stored_offsets=False):
+    """
+    Imports a manifest file and builds its networks in the current scene.
+
+    Args:
+        file_path (str): The manifest file.
+        replacements (list): The (old, new) substrings replaced in every joint name, in order.
+        use_stored_offsets (bool): Whether to build with the offsets of the manifest, or to solve
+            them from the current pose of the joints.
+
+    Returns:
+        dict: The restore report. See restore_manifest.
+    """
+    manifest = remap_manifest(load_manifest(file_path), replacements)
+    return restore_manifest(manifest, rebuild_missing=True, use_stored_offsets=use_stored_offsets)
+
+def _on_before_save(client_data):
+    """
+    Writes the manifest of the scene before it is saved.
+    """
+    try:
+        write_scene_manifest()
+    except Exception as e:
+        cmds.warning("An error occurred: {}".format(str(e)))
+
+def _on_after_open(client_data):
+    """
+    Restores the networks of the scene once it is opened.
+    """
+    # The scene is not fully loaded until the open callbacks return
+    maya.utils.executeDeferred(_restore_opened_scene)
+
+def _restore_opened_scene():
+    """
+    Restores the networks of the opened scene and reports them.
+    """
+    try:
+        report = restore_scene_networks()
+    except Exception as e:
+        cmds.warning("An error occurred: {}".format(str(e)))
+        return
+    if any(report.values()):
+        print("Restored symmetry networks: {} relinked, {} rebuilt, {} skipped.".format(len(report["relinked"]), len(report["rebuilt"]), len(report["skipped"])))
+
+# Keep the callbacks across module reloads, so they are never installed twice
+if "_callback_ids" not in globals():
+    _callback_ids = []
+
+def install():
+    """
+    Writes the manifest before each save and restores the networks after each open.
+
+    Returns:
+        bool: True if the callbacks were installed, False if they already were.
+    """
+    if _callback_ids:
+        return False
+    _callback_ids.append(om.MSceneMessage.addCallback(om.MSceneMessage.kBeforeSave, _on_before_save))
+    _callback_ids.append(om.MSceneMessage.addCallback(om.MSceneMessage.kAfterOpen, _on_after_open))
+    return True
+
+def uninstall():
+    """
+    Removes the callbacks.
+    """
+    if _callback_ids:
+        om.MMessage.removeCallbacks(list(_callback_ids))
+    del _callback_ids[:]
@@ -0,0 +1,479 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+Pure Python math for the joint symmetry tool.
+
+The functions in this module work on batches of 4x4 matrices stored as flat lists of 16 floats in
+Maya's row-major, row-vector layout (the layout returned by `cmds.xform(query=True, matrix=True)`
+and `cmds.getAttr(".worldMatrix[0]")`), so they can run and be tested without Maya.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import hashlib
+import math
+from collections import namedtuple
+
+# The rotate orders in the order of Maya's rotateOrder enum
+ROTATE_ORDERS = ("xyz", "yzx", "zxy", "xzy", "yxz", "zyx")
+
+# The axis indices of each rotate order
+_ROTATE_ORDER_AXES = {
+    "xyz": (0, 1, 2),
+    "yzx": (1, 2, 0),
+    "zxy": (2, 0, 1),
+    "xzy": (0, 2, 1),
+    "yxz": (1, 0, 2),
+    "zyx": (2, 1, 0),
+}
+
+# The rotate orders that are an even permutation of xyz
+_EVEN_ROTATE_ORDERS = ("xyz", "yzx", "zxy")
+
+# The tolerance below which a matrix is treated as being in gimbal lock
+_GIMBAL_EPSILON = 1e-9
+
+# The number of decimals kept when hashing values, so float noise does not change the hash
+_HASH_DECIMALS = 6
+
+IDENTITY_MATRIX = (
+    1.0, 0.0, 0.0, 0.0,
+    0.0, 1.0, 0.0, 0.0,
+    0.0, 0.0, 1.0, 0.0,
+    0.0, 0.0, 0.0, 1.0,
+)
+
+class Transform(namedtuple("Transform", ["translate", "rotate", "scale"])):
+    """
+    The translate, rotate (euler angles in degrees) and scale channels of a transform.
+    """
+    __slots__ = ()
+
+def mirror_matrix(axis="X"):
+    """
+    Returns the reflection matrix across the plane perpendicular to an axis.
+
+    Args:
+        axis (str): The axis of symmetry. Can be "X", "Y", or "Z".
+
+    Returns:
+        list: The reflection matrix.
+    """
+    index = "XYZ".index(axis.upper())
+    matrix = list(IDENTITY_MATRIX)
+    matrix[index * 5] = -1.0
+    return matrix
+
+def multiply_matrices(a, b):
+    """
+    Multiplies two matrices.
+
+    Args:
+        a (list): The left matrix.
+        b (list): The right matrix.
+
+    Returns:
+        list: The product a * b.
+    """
+    result = [0.0] * 16
+    for row in range(4):
+        a0, a1, a2, a3 = a[row * 4:row * 4 + 4]
+        for column in range(4):
+            result[row * 4 + column] = a0 * b[column] + a1 * b[4 + column] + a2 * b[8 + column] + a3 * b[12 + column]
+    return result
+
+def inverse_matrix(matrix):
+    """
+    Inverts an affine transformation matrix.
+
+    Args:
+        matrix (list): The matrix to invert. The last column must be (0, 0, 0, 1).
+
+    Returns:
+        list: The inverse matrix.
+
+    Raises:
+        ValueError: If the matrix is singular.
+    """
+    m = matrix
+    # Invert the upper 3x3 part with its adjugate
+    c00 = m[5] * m[10] - m[6] * m[9]
+    c01 = m[2] * m[9] - m[1] * m[10]
+    c02 = m[1] * m[6] - m[2] * m[5]
+    c10 = m[6] * m[8] - m[4] * m[10]
+    c11 = m[0] * m[10] - m[2] * m[8]
+    c12 = m[2] * m[4] - m[0] * m[6]
+    c20 = m[4] * m[9] - m[5] * m[8]
+    c21 = m[1] * m[8] - m[0] * m[9]
+    c22 = m[0] * m[5] - m[1] * m[4]
+    determinant = m[0] * c00 + m[1] * c10 + m[2] * c20
+    if abs(determinant) < 1e-12:
+        raise ValueError("The matrix is singular and cannot be inverted.")
+    inv = 1.0 / determinant
+    r00, r01, r02 = c00 * inv, c01 * inv, c02 * inv
+    r10, r11, r12 = c10 * inv, c11 * inv, c12 * inv
+    r20, r21, r22 = c20 * inv, c21 * inv, c22 * inv
+    # The inverse translation is -t * R^-1 for row vectors
+    tx, ty, tz = m[12], m[13], m[14]
+    return [
+        r00, r01, r02, 0.0,
+        r10, r11, r12, 0.0,
+        r20, r21, r22, 0.0,
+        -(tx * r00 + ty * r10 + tz * r20), -(tx * r01 + ty * r11 + tz * r21), -(tx * r02 + ty * r12 + tz * r22), 1.0,
+    ]
+
+def mirror_matrices(matrices, axis="X"):
+    """
+    Mirrors world matrices across the plane perpendicular to an axis.
+
+    The mirrored matrix is R * M * R, where R is the reflection matrix. The position is reflected
+    and the orientation is mirrored the way a symmetry constraint mirrors joints, so the result is
+    still a proper (non-reflected) transform.
+
+    Args:
+        matrices (list): The matrices to mirror.
+        axis (str): The axis of symmetry. Can be "X", "Y", or "Z".
+
+    Returns:
+        list: The mirrored matrices.
+    """
+    index = "XYZ".index(axis.upper())
+    mirrored = []
+    for matrix in matrices:
+        result = list(matrix)
+        # R * M * R only flips the signs of the row and the column of the axis, except their crossing
+        for i in range(4):
+            if i != index:
+                result[index * 4 + i] = -result[index * 4 + i]
+                result[i * 4 + index] = -result[i * 4 + index]
+        mirrored.append(result)
+    return mirrored
+
+def euler_to_matrix(rotation, rotate_order="xyz"):
+    """
+    Builds a rotation matrix from euler angles.
+
+    Args:
+        rotation (list): The euler angles in degrees.
+        rotate_order (str): The rotate order. See ROTATE_ORDERS.
+
+    Returns:
+        list: The rotation matrix.
+    """
+    result = list(IDENTITY_MATRIX)
+    for axis_index in _ROTATE_ORDER_AXES[rotate_order]:
+        result = multiply_matrices(result, _axis_rotation_matrix(axis_index, rotation[axis_index]))
+    return result
+
+def _axis_rotation_matrix(axis_index, angle):
+    """
+    Builds the rotation matrix around a single axis.
+    """
+    radians = math.radians(angle)
+    c = math.cos(radians)
+    s = math.sin(radians)
+    matrix = list(IDENTITY_MATRIX)
+    j = (axis_index + 1) % 3
+    k = (axis_index + 2) % 3
+    matrix[j * 4 + j] = c
+    matrix[j * 4 + k] = s
+    matrix[k * 4 + j] = -s
+    matrix[k * 4 + k] = c
+    return matrix
+
+def matrix_to_euler(matrix, rotate_order="xyz", reference=None):
+    """
+    Extracts euler angles from a rotation matrix.
+
+    Args:
+        matrix (list): The matrix. Its upper 3x3 part must be a pure rotation.
+        rotate_order (str): The rotate order. See ROTATE_ORDERS.
+        reference (list): Euler angles in degrees. If given, the equivalent euler angles closest to
+            them are returned, which keeps the result stable across gimbal flips.
+
+    Returns:
+        list: The euler angles in degrees.
+    """
+    i, j, k = _ROTATE_ORDER_AXES[rotate_order]
+    sign = 1.0 if rotate_order in _EVEN_ROTATE_ORDERS else -1.0
+
+    def m(row, column):
+        return matrix[row * 4 + column]
+
+    sin_b = max(-1.0, min(1.0, -sign * m(i, k)))
+    b = math.asin(sin_b)
+    if abs(math.cos(b)) > _GIMBAL_EPSILON:
+        a = math.atan2(sign * m(j, k), m(k, k))
+        c = math.atan2(sign * m(i, j), m(i, i))
+    else:
+        # In gimbal lock, only a + c or a - c is defined, so put everything on the first axis
+        a = math.atan2(-sign * m(k, j), m(j, j))
+        c = 0.0
+
+    rotation = [0.0, 0.0, 0.0]
+    rotation[i] = math.degrees(a)
+    rotation[j] = math.degrees(b)
+    rotation[k] = math.degrees(c)
+
+    if reference is not None:
+        rotation = closest_euler(rotation, reference, rotate_order)
+    return rotation
+
+def closest_euler(rotation, reference, rotate_order="xyz"):
+    """
+    Returns the euler angles equivalent to a rotation that are closest to a reference.
+
+    Args:
+        rotation (list): The euler angles in degrees.
+        reference (list): The reference euler angles in degrees.
+        rotate_order (str): The rotate order. See ROTATE_ORDERS.
+
+    Returns:
+        list: The equivalent euler angles closest to the reference.
+    """
+    i, j, k = _ROTATE_ORDER_AXES[rotate_order]
+    # Every rotation has two euler solutions, (a, b, c) and (a + 180, 180 - b, c + 180)
+    alternative = list(rotation)
+    alternative[i] += 180.0
+    alternative[j] = 180.0 - alternative[j]
+    alternative[k] += 180.0
+
+    candidates = []
+    for candidate in (rotation, alternative):
+        # Move each angle by multiples of 360 degrees towards the reference
+        unwrapped = [value + 360.0 * round((target - value) / 360.0) for value, target in zip(candidate, reference)]
+        distance = sum((value - target) ** 2 for value, target in zip(unwrapped, reference))
+        candidates.append((distance, unwrapped))
+    return min(candidates, key=lambda candidate: candidate[0])[1]
+
+def decompose_matrix(matrix, rotate_order="xyz", reference=None):
+    """
+    Decomposes a matrix into translate, rotate and scale channels.
+
+    Args:
+        matrix (list): The matrix to decompose. Shear is ignored.
+        rotate_order (str): The rotate order. See ROTATE_ORDERS.
+        reference (list): Euler angles in degrees to keep the rotation close to. See matrix_to_euler.
+
+    Returns:
+        Transform: The channels of the matrix.
+    """
+    scale = [math.sqrt(matrix[row * 4] ** 2 + matrix[row * 4 + 1] ** 2 + matrix[row * 4 + 2] ** 2) for row in range(3)]
+    # Flip one axis of a reflected matrix so the remaining rotation is proper
+    if _determinant3(matrix) < 0.0:
+        scale[0] = -scale[0]
+    rotation_matrix = list(IDENTITY_MATRIX)
+    for row in range(3):
+        factor = 1.0 / scale[row] if scale[row] else 0.0
+        for column in range(3):
+            rotation_matrix[row * 4 + column] = matrix[row * 4 + column] * factor
+    rotate = matrix_to_euler(rotation_matrix, rotate_order, reference)
+    return Transform(list(matrix[12:15]), rotate, scale)
+
+def compose_matrix(transform, rotate_order="xyz", joint_orient=None):
+    """
+    Composes a matrix from translate, rotate and scale channels.
+
+    Args:
+        transform (Transform): The channels of the matrix.
+        rotate_order (str): The rotate order. See ROTATE_ORDERS.
+        joint_orient (list): The joint orient in degrees, applied after the rotation as Maya joints do.
+
+    Returns:
+        list: The composed matrix.
+    """
+    rotation = euler_to_matrix(transform.rotate, rotate_order)
+    if joint_orient is not None:
+        rotation = multiply_matrices(rotation, euler_to_matrix(joint_orient))
+    matrix = list(rotation)
+    for row in range(3):
+        for column in range(3):
+            matrix[row * 4 + column] *= transform.scale[row]
+    matrix[12:15] = [float(value) for value in transform.translate]
+    return matrix
+
+def _determinant3(matrix):
+    """
+    Returns the determinant of the upper 3x3 part of a matrix.
+    """
+    m = matrix
+    return (m[0] * (m[5] * m[10] - m[6] * m[9])
+            - m[1] * (m[4] * m[10] - m[6] * m[8])
+            + m[2] * (m[4] * m[9] - m[5] * m[8]))
+
+def local_transform(world_matrix, parent_world_matrix, joint_orient=None, rotate_order="xyz", reference=None):
+    """
+    Returns the local channels that give a world matrix under a parent.
+
+    Args:
+        world_matrix (list): The desired world matrix.
+        parent_world_matrix (list): The world matrix of the parent.
+        joint_orient (list): The joint orient in degrees. The returned rotation excludes it.
+        rotate_order (str): The rotate order. See ROTATE_ORDERS.
+        reference (list): Euler angles in degrees to keep the rotation close to. See matrix_to_euler.
+
+    Returns:
+        Transform: The local channels.
+    """
+    local_matrix = multiply_matrices(world_matrix, inverse_matrix(parent_world_matrix))
+    if joint_orient is not None and any(joint_orient):
+        # Remove the joint orient, keeping the scale on the rows and the translation untouched
+        transform = decompose_matrix(local_matrix, rotate_order)
+        scale_free = compose_matrix(Transform(transform.translate, transform.rotate, [1.0, 1.0, 1.0]), rotate_order)
+        rotation = multiply_matrices(scale_free, inverse_matrix(euler_to_matrix(joint_orient)))
+        rotate = matrix_to_euler(rotation, rotate_order, reference)
+        return Transform(transform.translate, rotate, transform.scale)
+    return decompose_matrix(local_matrix, rotate_order, reference)
+
+def compute_constraint_transforms(source_world_matrices, target_parent_matrices, axis="X", joint_orients=None, rotate_orders=None):
+    """
+    Computes the transforms a symmetry constraint drives its targets to.
+
+    Args:
+        source_world_matrices (list): The world matrices of the source joints.
+        target_parent_matrices (list): The parent world matrices of the target joints.
+        axis (str): The axis of symmetry. Can be "X", "Y", or "Z".
+        joint_orients (list): The joint orients of the source joints, which the constraint passes on
+            to the target joints. Defaults to zero.
+        rotate_orders (list): The rotate orders of the source joints. Defaults to "xyz".
+
+    Returns:
+        list: The Transform of each target joint in the space of its parent.
+    """
+    count = len(source_world_matrices)
+    joint_orients = joint_orients or [None] * count
+    rotate_orders = rotate_orders or ["xyz"] * count
+    mirrored_matrices = mirror_matrices(source_world_matrices, axis)
+    return [
+        local_transform(mirrored, parent, joint_orient, rotate_order)
+        for mirrored, parent, joint_orient, rotate_order in zip(mirrored_matrices, target_parent_matrices, joint_orients, rotate_orders)
+    ]
+
+def compute_offsets(source_world_matrices, target_world_matrices, target_parent_matrices, axis="X", joint_orients=None, rotate_orders=None):
+    """
+    Computes the offsets that keep target joints at their current pose once they are constrained.
+
+    The offsets are the values of the offsetTranslate, offsetRotate and offsetScale attributes of
+    the symmetry network: the target is driven to constraint translate + offsetTranslate,
+    constraint rotate + offsetRotate and constraint scale * offsetScale. The target rotation is
+    taken as the euler solution closest to the constraint rotation, so the offsets stay small
+    across gimbal flips.
+
+    Args:
+        source_world_matrices (list): The world matrices of the source joints.
+        target_world_matrices (list): The world matrices of the target joints.
+        target_parent_matrices (list): The parent world matrices of the target joints.
+        axis (str): The axis of symmetry. Can be "X", "Y", or "Z".
+        joint_orients (list): The joint orients of the source joints. Defaults to zero.
+        rotate_orders (list): The rotate orders of the source joints. Defaults to "xyz".
+
+    Returns:
+        list: A Transform of offsets for each pair.
+    """
+    count = len(source_world_matrices)
+    joint_orients = joint_orients or [None] * count
+    rotate_orders = rotate_orders or ["xyz"] * count
+    constraint_transforms = compute_constraint_transforms(source_world_matrices, target_parent_matrices, axis, joint_orients, rotate_orders)
+
+    offsets = []
+    for constrained, target, parent, joint_orient, rotate_order in zip(constraint_transforms, target_world_matrices, target_parent_matrices, joint_orients, rotate_orders):
+        current = local_transform(target, parent, joint_orient, rotate_order, reference=constrained.rotate)
+        offsets.append(Transform(
+            [current.translate[i] - constrained.translate[i] for i in range(3)],
+            [current.rotate[i] - constrained.rotate[i] for i in range(3)],
+            [current.scale[i] / constrained.scale[i] if constrained.scale[i] else 1.0 for i in range(3)],
+        ))
+    return offsets
+
+def compute_offset_matrices(source_world_matrices, target_world_matrices, axis="X"):
+    """
+    Computes the offset matrices that keep target joints at their current pose in the compact network.
+
+    The compact network drives each target to offset matrix * mirrored source world matrix, so the
+    offset matrix is the target world matrix relative to the mirrored source.
+
+    Args:
+        source_world_matrices (list): The world matrices of the source joints.
+        target_world_matrices (list): The world matrices of the target joints.
+        axis (str): The axis of symmetry. Can be "X", "Y", or "Z".
+
+    Returns:
+        list: The offset matrix of each pair.
+    """
+    return [
+        multiply_matrices(target, inverse_matrix(mirrored))
+        for target, mirrored in zip(target_world_matrices, mirror_matrices(source_world_matrices, axis))
+    ]
+
+def rest_frame(translate, joint_orient, parent_world_matrix):
+    """
+    Returns the rest frame of a joint: its world matrix with zero rotation and unit scale, under a parent.
+
+    Args:
+        translate (list): The translate channels of the joint.
+        joint_orient (list): The joint orient in degrees.
+        parent_world_matrix (list): The world matrix of the parent.
+
+    Returns:
+        list: The world matrix of the rest frame.
+    """
+    local_matrix = compose_matrix(Transform(translate, [0.0, 0.0, 0.0], [1.0, 1.0, 1.0]), joint_orient=joint_orient)
+    return multiply_matrices(local_matrix, parent_world_matrix)
+
+def mirror_pose_matrices(source_world_matrices, source_frames, target_frames, axis="X"):
+    """
+    Computes the world matrices that mirror the pose of source joints onto target joints.
+
+    The pose is mirrored relative to the rest frames of both joints (see rest_frame): each target
+    world matrix is target frame * inverse(mirrored source frame) * mirrored source world matrix.
+    Joints mirrored by behavior or by orientation keep their convention, and a target whose rest
+    frame is not the exact mirror of its source keeps that difference.
+
+    Args:
+        source_world_matrices (list): The world matrices of the source joints.
+        source_frames (list): The rest frames of the source joints.
+        target_frames (list): The rest frames of the target joints, under the mirrored pose of their parents.
+        axis (str): The axis of symmetry. Can be "X", "Y", or "Z".
+
+    Returns:
+        list: The mirrored world matrix of each target joint.
+    """
+    return [
+        multiply_matrices(multiply_matrices(target_frame, inverse_matrix(mirrored_frame)), mirrored_world)
+        for target_frame, mirrored_frame, mirrored_world in zip(target_frames, mirror_matrices(source_frames, axis), mirror_matrices(source_world_matrices, axis))
+    ]
+
+def apply_offsets(constraint_transforms, offsets):
+    """
+    Applies offsets to constraint transforms the way the symmetry network does.
+
+    Args:
+        constraint_transforms (list): The Transforms computed by compute_constraint_transforms.
+        offsets (list): The Transforms computed by compute_offsets.
+
+    Returns:
+        list: The Transform the network drives each target joint to.
+    """
+    return [
+        Transform(
+            [constrained.translate[i] + offset.translate[i] for i in range(3)],
+            [constrained.rotate[i] + offset.rotate[i] for i in range(3)],
+            [constrained.scale[i] * offset.scale[i] for i in range(3)],
+        )
+        for constrained, offset in zip(constraint_transforms, offsets)
+    ]
+
+def hash_values(values):
+    """
+    Hashes a list of floats, ignoring differences below the hashing precision.
+
+    Args:
+        values (list): The values to hash.
+
+    Returns:
+        str: The hexadecimal digest of the values.
+    """
+    # Adding 0.0 turns -0.0 into 0.0, so both round to the same text
+    text = " ".join("{:.{}f}".format(round(value, _HASH_DECIMALS) + 0.0, _HASH_DECIMALS) for value in values)
+    return hashlib.md5(text.encode("ascii")).hexdigest()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+Builds the symmetry networks of a batch of pairs with OpenMaya modifiers instead of maya.cmds.
+
+Every node, dynamic attribute, value and connection of the batch is queued on a modifier, so the
+whole batch is applied, undone and redone by a few doIt/undoIt calls instead of hundreds of
+commands. The networks are the same as the ones built by create_joint_symmetry.
+
+The dynamic attributes have no plugs until they are added, and DAG nodes need an MDagModifier, so
+the batch is applied by three modifiers in a row: one for the dynamic attributes, one for the
+symmetry constraints and one for the utility nodes, values and connections.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import maya.api.OpenMaya as om
+
+import symmetry_index
+import symmetry_math
+
+# The offset attributes of the standard network and their default value
+_OFFSET_ATTRIBUTES = (("offsetTranslate", 0.0), ("offsetRotate", 0.0), ("offsetScale", 1.0))
+
+# The network modes driving the target joint through an offset matrix
+_MATRIX_MODES = ("compact", "native")
+
+# The utility nodes of the standard network
+_UTILITY_NODES = (("_pma_translate", "plusMinusAverage"), ("_pma_rotate", "plusMinusAverage"), ("_pma_scale", "multiplyDivide"))
+
+class SymmetryModifierBuilder(object):
+    """
+    Builds, undoes and redoes the symmetry networks of a batch of pairs.
+    """
+    def __init__(self, pairs, rest_states, axis="X", mode="standard"):
+        """
+        Args:
+            pairs (list): A list of (source joint, target joint) tuples.
+            rest_states (list): The create_joint_symmetry.RestState of each pair.
+            axis (str): The axis of symmetry. Can be "X", "Y", or "Z".
+            mode (str): The network mode, "standard", "compact" or "native".
+        """
+        self._networks = []
+        self._pairs = []
+        self._names = []
+        self._axis = axis
+        self._mode = mode
+        self._modifiers = []
+        self._constraints = []
+        self._links = []
+        self._index = symmetry_index.get_index()
+
+        # Skip the pairs that already have a network, including the ones built earlier in the batch
+        constrained_joints = set()
+        for (source_joint, target_joint), rest_state in zip(pairs, rest_states):
+            for joint in [source_joint, target_joint]:
+                if joint in constrained_joints or self._index.find(joint) is not None:
+                    om.MGlobal.displayWarning("{} already has a symmetry constraint. Please delete it before running this script.".format(joint))
+                    break
+            else:
+                constrained_joints.update([source_joint, target_joint])
+                self._pairs.append((_find_node(source_joint), _find_node(target_joint), rest_state))
+                self._names.append((source_joint, target_joint))
+
+    def doIt(self):
+        """
+        Builds the networks the first time, then redoes them.
+
+        If a modifier fails, the modifiers already applied are undone before the error is raised.
+        """
+        applied = []
+        try:
+            for index, queue in enumerate([self._add_attributes, self._create_constraints, self._connect]):
+                # Each modifier is queued once the previous one is applied, as it needs its result
+                if index == len(self._modifiers):
+                    self._modifiers.append(queue())
+                self._modifiers[index].doIt()
+                applied.append(self._modifiers[index])
+        except Exception:
+            for modifier in reversed(applied):
+                modifier.undoIt()
+            raise
+
+    def networks(self):
+        """
+        Returns the networks that were built.
+
+        Returns:
+            list: The (source joint, target joint, network node) tuples of the built networks. The
+                network node is the symmetry constraint or the mult matrix node. The joints are
+                named by their shortest unique paths.
+        """
+        return [tuple(_node_name(node) for node in network) for network in self._networks]
+
+    def target_joints(self):
+        """
+        Returns the target joints of the networks that were built, as they were named in the pairs.
+
+        Returns:
+            list: The target joints, in the order of the pairs.
+        """
+        return [target_joint for _, target_joint in self._names[:len(self._networks)]]
+
+    def undoIt(self):
+        """
+        Removes the networks.
+        """
+        for modifier in reversed(self._modifiers):
+            modifier.undoIt()
+
+    def _add_attributes(self):
+        """
+        Queues the dynamic attributes of the target joints, replacing the stale ones.
+        """
+        modifier = om.MDGModifier()
+        for _, target, _ in self._pairs:
+            target_fn = om.MFnDependencyNode(target)
+
+            # Replace the attributes storing the rest pose the offsets are solved from and the network links
+            for attribute in ["symmetryRestMatrix", "symmetryRestHash", symmetry_index.SOURCE_ATTRIBUTE, symmetry_index.NODES_ATTRIBUTE]:
+                if target_fn.hasAttribute(attribute):
+                    modifier.removeAttribute(target, target_fn.attribute(attribute))
+            modifier.addAttribute(target, om.MFnMatrixAttribute().create("symmetryRestMatrix", "symmetryRestMatrix", om.MFnMatrixAttribute.kDouble))
+            modifier.addAttribute(target, om.MFnTypedAttribute().create("symmetryRestHash", "symmetryRestHash", om.MFnData.kString))
+            modifier.addAttribute(target, _create_message_attribute(symmetry_index.SOURCE_ATTRIBUTE))
+            modifier.addAttribute(target, _create_message_attribute(symmetry_index.NODES_ATTRIBUTE, multi=True))
+
+            # Delete the stale nodes linked to the target joint, whatever the mode of their network
+            network = self._index.entry(target_fn.name())
+            for handle in (network.node_handles.values() if network is not None else []):
+                if handle.isValid():
+                    modifier.deleteNode(handle.object())
+
+            if self._mode in _MATRIX_MODES:
+                # Delete the stale offset attribute, then add the offset matrix attribute
+                if target_fn.hasAttribute("symmetryOffsetMatrix"):
+                    modifier.removeAttribute(target, target_fn.attribute("symmetryOffsetMatrix"))
+                modifier.addAttribute(target, om.MFnMatrixAttribute().create("symmetryOffsetMatrix", "symmetryOffsetMatrix", om.MFnMatrixAttribute.kDouble))
+                continue
+
+            # Delete the stale offset attributes, then add the offset attributes
+            for attribute, default in _OFFSET_ATTRIBUTES:
+                if target_fn.hasAttribute(attribute):
+                    modifier.removeAttribute(target, target_fn.attribute(attribute))
+            for attribute, default in _OFFSET_ATTRIBUTES:
+                modifier.addAttribute(target, _create_double3_attribute(attribute, default))
+        return modifier
+
+    def _create_constraints(self):
+        """
+        Queues the symmetry constraints under the target joints.
+        """
+        modifier = om.MDagModifier()
+        self._constraints = []
+        if self._mode == "standard":
+            for _, target, _ in self._pairs:
+                constraint = modifier.createNode("symmetryConstraint", target)
+                modifier.renameNode(constraint, om.MFnDependencyNode(target).name() + "_symmetry_constraint")
+                self._constraints.append(constraint)
+        return modifier
+
+    def _connect(self):
+        """
+        Queues the utility nodes, the values and the connections of the networks.
+        """
+        modifier = om.MDGModifier()
+        self._networks = []
+        self._links = []
+        if self._mode in _MATRIX_MODES:
+            mirror = om.MMatrix(symmetry_math.mirror_matrix(self._axis))
+            for source, target, rest_state in self._pairs:
+                self._networks.append(self._connect_compact(modifier, source, target, rest_state.offset, mirror, self._mode == "native"))
+        else:
+            for (source, target, rest_state), constraint in zip(self._pairs, self._constraints):
+                self._networks.append(self._connect_standard(modifier, source, target, rest_state.offset, constraint))
+
+        # Store the rest pose the offsets are solved from
+        for _, target, rest_state in self._pairs:
+            modifier.newPlugValue(_plug(target, "symmetryRestMatrix"), om.MFnMatrixData().create(om.MMatrix(rest_state.rest_matrix)))
+            modifier.newPlugValueString(_plug(target, "symmetryRestHash"), rest_state.rest_hash)
+
+        # Link the source joints and the network nodes to the target joints
+        for source, target, nodes in self._links:
+            modifier.connect(_plug(source, "message"), _plug(target, symmetry_index.SOURCE_ATTRIBUTE))
+            for suffix, node in nodes:
+                modifier.connect(_plug(node, "message"), _plug(target, symmetry_index.NODES_ATTRIBUTE, symmetry_index.NETWORK_NODE_SUFFIXES.index(suffix)))
+        return modifier
+
+    def _connect_standard(self, modifier, source, target, offset, constraint):
+        """
+        Queues the utility nodes, the values and the connections of a standard network.
+        """
+        target_name = om.MFnDependencyNode(target).name()
+
+        # Create the utility nodes offsetting the target joint
+        utility_nodes = []
+        for suffix, node_type in _UTILITY_NODES:
+            node = modifier.createNode(node_type)
+            modifier.renameNode(node, target_name + suffix)
+            utility_nodes.append(node)
+        pma_node_trans, pma_node_rot, pma_node_scale = utility_nodes
+        self._links.append((source, target, list(zip(symmetry_index.NETWORK_NODE_SUFFIXES[:4], [constraint] + utility_nodes))))
+
+        # Set the axis attributes of the symmetry constraint
+        for axis_name in ["X", "Y", "Z"]:
+            modifier.newPlugValueBool(_plug(constraint, axis_name.lower() + "Axis"), axis_name == self._axis)
+
+        # Set the offset values on the target joint
+        for (attribute, _), values in zip(_OFFSET_ATTRIBUTES, [offset.translate, offset.rotate, offset.scale]):
+            plug = _plug(target, attribute)
+            for index, value in enumerate(values):
+                modifier.newPlugValueDouble(plug.child(index), value)
+
+        # Connect the attributes between the source and target joints
+        connections = [
+            (_plug(source, "translate"), _plug(constraint, "targetTranslate")),
+            (_plug(source, "rotate"), _plug(constraint, "targetRotate")),
+            (_plug(source, "scale"), _plug(constraint, "targetScale")),
+            (_plug(source, "parentMatrix", 0), _plug(constraint, "targetParentMatrix")),
+            (_plug(source, "worldMatrix", 0), _plug(constraint, "targetWorldMatrix")),
+            (_plug(source, "rotateOrder"), _plug(constraint, "targetRotateOrder")),
+            (_plug(source, "jointOrient"), _plug(constraint, "targetJointOrient")),
+            (_plug(constraint, "constraintTranslate"), _plug(pma_node_trans, "input3D", 0)),
+            (_plug(constraint, "constraintRotate"), _plug(pma_node_rot, "input3D", 0)),
+            (_plug(constraint, "constraintScale"), _plug(pma_node_scale, "input1")),
+            (_plug(constraint, "constraintRotateOrder"), _plug(target, "rotateOrder")),
+            (_plug(constraint, "targetJointOrient"), _plug(target, "jointOrient")),
+            (_plug(target, "parentInverseMatrix", 0), _plug(constraint, "constraintInverseParentWorldMatrix")),
+            (_plug(target, "offsetTranslate"), _plug(pma_node_trans, "input3D", 1)),
+            (_plug(target, "offsetRotate"), _plug(pma_node_rot, "input3D", 1)),
+            (_plug(target, "offsetScale"), _plug(pma_node_scale, "input2")),
+            (_plug(pma_node_trans, "output3D"), _plug(target, "translate")),
+            (_plug(pma_node_rot, "output3D"), _plug(target, "rotate")),
+            (_plug(pma_node_scale, "output"), _plug(target, "scale")),
+        ]
+        for source_plug, destination_plug in connections:
+            modifier.connect(source_plug, destination_plug)
+
+        return (source, target, constraint)
+
+    def _connect_compact(self, modifier, source, target, offset_matrix, mirror, native=False):
+        """
+        Queues the mult matrix node, the values and the connections of a compact or native network.
+        """
+        target_name = om.MFnDependencyNode(target).name()
+        suffix = "_symmetry_native_matrix" if native else "_symmetry_mult_matrix"
+
+        # Create the mult matrix node and set the constant mirror matrices
+        mult_node = modifier.createNode("multMatrix")
+        modifier.renameNode(mult_node, target_name + suffix)
+        self._links.append((source, target, [(suffix, mult_node)]))
+        modifier.newPlugValue(_plug(mult_node, "matrixIn", 1), om.MFnMatrixData().create(mirror))
+        modifier.newPlugValue(_plug(mult_node, "matrixIn", 3), om.MFnMatrixData().create(mirror))
+        modifier.newPlugValue(_plug(target, "symmetryOffsetMatrix"), om.MFnMatrixData().create(om.MMatrix(offset_matrix)))
+
+        # Reset the local channels of the target joint, the offset matrix holds its pose
+        for attribute, value in [("translate", 0.0), ("rotate", 0.0), ("jointOrient", 0.0), ("scale", 1.0)]:
+            plug = _plug(target, attribute)
+            for index in range(3):
+                modifier.newPlugValueDouble(plug.child(index), value)
+
+        if native:
+            # The native network never reads the target joint: the offset matrix is set on the
+            # node and the parent of the target joint gives the parent inverse matrix
+            modifier.newPlugValue(_plug(mult_node, "matrixIn", 0), om.MFnMatrixData().create(om.MMatrix(offset_matrix)))
+            parent = om.MFnDagNode(target).parent(0)
+            if not parent.hasFn(om.MFn.kWorld):
+                modifier.connect(_plug(parent, "worldInverseMatrix", 0), _plug(mult_node, "matrixIn", 4))
+        else:
+            modifier.connect(_plug(target, "symmetryOffsetMatrix"), _plug(mult_node, "matrixIn", 0))
+            modifier.connect(_plug(target, "parentInverseMatrix", 0), _plug(mult_node, "matrixIn", 4))
+
+        # Connect the matrices
+        modifier.connect(_plug(source, "worldMatrix", 0), _plug(mult_node, "matrixIn", 2))
+        modifier.connect(_plug(mult_node, "matrixSum"), _plug(target, "offsetParentMatrix"))
+
+        return (source, target, mult_node)
+
+def _create_double3_attribute(name, default):
+    """
+    Creates a keyable double3 attribute with X, Y and Z children.
+    """
+    numeric_fn = om.MFnNumericAttribute()
+    children = []
+    for axis_name in ["X", "Y", "Z"]:
+        children.append(numeric_fn.create(name + axis_name, name + axis_name, om.MFnNumericData.kDouble, default))
+        numeric_fn.keyable = True
+    attribute = numeric_fn.create(name, name, children[0], children[1], children[2])
+    numeric_fn.keyable = True
+    return attribute
+
+def _create_message_attribute(name, multi=False):
+    """
+    Creates a message attribute, or a multi message attribute.
+    """
+    message_fn = om.MFnMessageAttribute()
+    attribute = message_fn.create(name, name)
+    message_fn.array = multi
+    return attribute
+
+def _find_node(name):
+    """
+    Returns the MObject of a node, or None if it does not exist.
+    """
+    selection = om.MSelectionList()
+    try:
+        selection.add(name)
+    except RuntimeError:
+        return None
+    return selection.getDependNode(0)
+
+def _node_name(node):
+    """
+    Returns the shortest unique path of a DAG node, or the name of a DG node.
+    """
+    if node.hasFn(om.MFn.kDagNode):
+        return om.MFnDagNode(node).partialPathName()
+    return om.MFnDependencyNode(node).name()
+
+def _plug(node, attribute, index=None):
+    """
+    Returns the plug of an attribute of a node, or of one of its elements.
+    """
+    plug = om.MFnDependencyNode(node).findPlug(attribute, False)
+    if index is not None:
+        plug = plug.elementByLogicalIndex(index)
+    return plug
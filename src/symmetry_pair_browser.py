@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+A model/view browser of the symmetry pairs of the scene.
+
+SymmetryPairModel lists the networks of the symmetry index in a table. It only holds the indexed
+networks: the names of their joints are read from their handles when a row is shown, and the rows
+are fetched in batches as the view scrolls, so the browser opens at once with thousands of pairs.
+Filtering reads the names of every network once per refresh and matches them in Python, without
+querying the scene.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import maya.cmds as cmds
+
+from PySide2 import QtCore, QtWidgets
+
+import create_joint_symmetry as cjs
+import symmetry_index
+
+# The number of rows the model adds each time the view scrolls to its end
+FETCH_BATCH_SIZE = 200
+
+# The columns of the table
+COLUMNS = ("Source Joint", "Target Joint", "Mode")
+
+class SymmetryPairModel(QtCore.QAbstractTableModel):
+    """
+    A table of the symmetry networks of the scene, one row per pair, fetched in batches.
+    """
+    def __init__(self, parent=None):
+        super(SymmetryPairModel, self).__init__(parent)
+        self._all_networks = []
+        self._search_names = None
+        self._networks = []
+        self._fetched = 0
+        self._filter_text = ""
+
+    def refresh(self):
+        """
+        Lists the valid networks of the symmetry index again.
+        """
+        self.beginResetModel()
+        self._all_networks = symmetry_index.get_index().networks()
+        self._search_names = None
+        self._apply_filter()
+        self.endResetModel()
+
+    def set_filter(self, text):
+        """
+        Only lists the pairs whose source or target joint name contains a text, ignoring the case.
+
+        Args:
+            text (str): The text, or an empty string to list every pair.
+        """
+        self.beginResetModel()
+        self._filter_text = text.strip().lower()
+        self._apply_filter()
+        self.endResetModel()
+
+    def _apply_filter(self):
+        """
+        Filters the networks and forgets the fetched rows.
+        """
+        if self._filter_text:
+            # Read the names of the joints once, the first time the networks are filtered
+            if self._search_names is None:
+                self._search_names = [(network.source_joint + "|" + network.target_joint).lower() if network.is_valid() else "" for network in self._all_networks]
+            self._networks = [network for network, names in zip(self._all_networks, self._search_names) if self._filter_text in names]
+        else:
+            self._networks = list(self._all_networks)
+        self._fetched = min(FETCH_BATCH_SIZE, len(self._networks))
+
+    def pair_count(self):
+        """
+        Returns the number of listed pairs, including the rows that were not fetched yet.
+        """
+        return len(self._networks)
+
+    def networks(self, rows=None):
+        """
+        Returns the networks of some rows that still exist.
+
+        Args:
+            rows (list): The row numbers. Defaults to every listed pair, including the rows that
+                were not fetched yet.
+
+        Returns:
+            list: The symmetry_index.IndexedNetworks.
+        """
+        networks = self._networks if rows is None else [self._networks[row] for row in sorted(rows)]
+        return [network for network in networks if network.is_valid()]
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else self._fetched
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self._fetched < len(self._networks)
+
+    def fetchMore(self, parent):
+        if parent.isValid():
+            return
+        count = min(FETCH_BATCH_SIZE, len(self._networks) - self._fetched)
+        if count <= 0:
+            return
+        self.beginInsertRows(QtCore.QModelIndex(), self._fetched, self._fetched + count - 1)
+        self._fetched += count
+        self.endInsertRows()
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or role != QtCore.Qt.DisplayRole:
+            return None
+        network = self._networks[index.row()]
+        # The joints of the network may have been deleted since the list was refreshed
+        if not network.is_valid():
+            return "(deleted)" if index.column() == 0 else ""
+        if index.column() == 0:
+            return network.source_joint
+        if index.column() == 1:
+            return network.target_joint
+        return network.mode
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return COLUMNS[section]
+        return None
+
+class SymmetryPairBrowser(QtWidgets.QWidget):
+    def __init__(self, parent=None):
+        """
+        Initializes the class.
+
+        Attributes:
+            model (SymmetryPairModel): The model of the symmetry pairs.
+            filter_edit (QtWidgets.QLineEdit): A line edit to filter the pairs by joint name.
+            count_label (QtWidgets.QLabel): A label for the number of listed pairs.
+            table_view (QtWidgets.QTableView): A table of the symmetry pairs.
+            refresh_button (QtWidgets.QPushButton): A button to list the pairs of the scene again.
+            select_button (QtWidgets.QPushButton): A button to select the joints of the pairs.
+            resync_button (QtWidgets.QPushButton): A button to resync the offsets of the pairs.
+            delete_button (QtWidgets.QPushButton): A button to delete the networks of the pairs.
+            filter_layout (QtWidgets.QHBoxLayout): A layout for the filter.
+            button_layout (QtWidgets.QHBoxLayout): A layout for the buttons.
+            main_layout (QtWidgets.QVBoxLayout): A main layout for the browser.
+        """
+        super(SymmetryPairBrowser, self).__init__(parent)
+
+        # Create the model of the symmetry pairs
+        self.model = SymmetryPairModel(self)
+
+        # Create a line edit to filter the pairs by joint name
+        self.filter_edit = QtWidgets.QLineEdit()
+        self.filter_edit.setPlaceholderText("Filter by joint name")
+        self.filter_edit.textChanged.connect(self.filter_pairs)
+
+        # Create a label for the number of listed pairs
+        self.count_label = QtWidgets.QLabel()
+
+        # Create a table of the symmetry pairs. Fixed row heights let the view skip measuring rows.
+        self.table_view = QtWidgets.QTableView()
+        self.table_view.setModel(self.model)
+        self.table_view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.table_view.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.table_view.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self.table_view.verticalHeader().setDefaultSectionSize(self.table_view.fontMetrics().height() + 6)
+        self.table_view.verticalHeader().setVisible(False)
+        self.table_view.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Stretch)
+
+        # Create the buttons acting on the selected pairs, or on every listed pair if none is selected
+        self.refresh_button = QtWidgets.QPushButton("Refresh")
+        self.refresh_button.clicked.connect(self.refresh)
+        self.select_button = QtWidgets.QPushButton("Select Joints")
+        self.select_button.clicked.connect(self.select_joints)
+        self.resync_button = QtWidgets.QPushButton("Resync")
+        self.resync_button.clicked.connect(self.resync_pairs)
+        self.delete_button = QtWidgets.QPushButton("Delete")
+        self.delete_button.clicked.connect(self.delete_pairs)
+
+        # Create a layout for the filter
+        self.filter_layout = QtWidgets.QHBoxLayout()
+        self.filter_layout.addWidget(self.filter_edit)
+        self.filter_layout.addWidget(self.count_label)
+
+        # Create a layout for the buttons
+        self.button_layout = QtWidgets.QHBoxLayout()
+        self.button_layout.addWidget(self.refresh_button)
+        self.button_layout.addWidget(self.select_button)
+        self.button_layout.addWidget(self.resync_button)
+        self.button_layout.addWidget(self.delete_button)
+
+        # Create a main layout for the browser
+        self.main_layout = QtWidgets.QVBoxLayout()
+        self.main_layout.setContentsMargins(0, 0, 0, 0)
+        self.main_layout.addLayout(self.filter_layout)
+        self.main_layout.addWidget(self.table_view)
+        self.main_layout.addLayout(self.button_layout)
+        self.setLayout(self.main_layout)
+
+    def refresh(self):
+        """
+        Lists the symmetry pairs of the scene again.
+        """
+        self.model.refresh()
+        self.update_count()
+
+    def filter_pairs(self, text):
+        """
+        Only lists the pairs whose joint names contain a text.
+        """
+        self.model.set_filter(text)
+        self.update_count()
+
+    def update_count(self):
+        """
+        Shows the number of listed pairs.
+        """
+        self.count_label.setText("{} pairs".format(self.model.pair_count()))
+
+    def selected_networks(self):
+        """
+        Returns the networks of the selected rows, or every listed network if no row is selected.
+
+        Returns:
+            list: The symmetry_index.IndexedNetworks.
+        """
+        rows = [index.row() for index in self.table_view.selectionModel().selectedRows()]
+        return self.model.networks(rows or None)
+
+    def select_joints(self):
+        """
+        Selects the source and target joints of the pairs in Maya.
+        """
+        joints = [joint for network in self.selected_networks() for joint in (network.source_joint, network.target_joint)]
+        if joints:
+            cmds.select(joints, replace=True)
+        else:
+            cmds.select(clear=True)
+
+    def resync_pairs(self):
+        """
+        Resyncs the offsets of the pairs whose rest pose changed.
+        """
+        target_joints = [network.target_joint for network in self.selected_networks()]
+        if target_joints:
+            cjs.execute_resync(target_joints)
+
+    def delete_pairs(self):
+        """
+        Deletes the networks of the pairs once the deletion is confirmed.
+        """
+        target_joints = [network.target_joint for network in self.selected_networks()]
+        if not target_joints:
+            return
+        answer = QtWidgets.QMessageBox.question(self, "Delete Symmetry Networks", "Delete the symmetry networks of {} pairs?".format(len(target_joints)))
+        if answer != QtWidgets.QMessageBox.Yes:
+            return
+        cjs.execute_delete(target_joints)
+        self.refresh()
@@ -0,0 +1,390 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+Operation plans of the symmetry networks.
+
+The builder does not change the scene while it checks it. It first plans the nodes, attributes,
+values and connections of every requested network as a list of operations, which can be printed as
+a dry run, diffed against the scene to drop what already exists, and executed by a batching executor
+applying all the operations of one kind before the next kind. Re-running the builder on a partly
+rigged character therefore only applies the missing operations.
+
+Usage:
+    plan = OperationPlan()
+    plan.create_node("R_arm", "R_arm_pma_translate", "plusMinusAverage")
+    plan.connect("R_arm", "R_arm_pma_translate.output3D", "R_arm.translate")
+    missing = plan.diff()
+    print(missing.format())
+    failures = missing.execute()
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from collections import OrderedDict, namedtuple
+
+import maya.cmds as cmds
+
+import symmetry_profiler
+
+# The kinds of operations, in the order the executor applies them
+OPERATION_KINDS = ("delete_node", "create_node", "add_attr", "set_attr", "connect")
+
+# The profiler phase of each kind of operation
+OPERATION_PHASES = {
+    "delete_node": "delete_nodes",
+    "create_node": "create_nodes",
+    "add_attr": "add_attributes",
+    "set_attr": "set_values",
+    "connect": "connect",
+}
+
+# The difference within which a numeric value already in the scene matches a planned one
+VALUE_TOLERANCE = 1e-6
+
+_profiler = symmetry_profiler.get_profiler()
+
+class Operation(namedtuple("Operation", ["kind", "owner", "node", "attribute", "args", "kwargs"])):
+    """
+    An operation of a plan.
+
+    Attributes:
+        kind (str): The kind of operation. See OPERATION_KINDS.
+        owner (str): The target joint of the network the operation builds. When an operation fails,
+            the remaining operations of its owner are skipped.
+        node (str): The node the operation deletes, creates or changes, or the node of the
+            destination plug of a connection.
+        attribute (str): The attribute the operation adds, sets or connects to, or None for a node.
+        args (tuple): The node type of a created node, the values of an attribute, or the source
+            plug of a connection.
+        kwargs (dict): The flags of the Maya command.
+    """
+    __slots__ = ()
+
+    @property
+    def plug(self):
+        """
+        The plug the operation adds, sets or connects to, or the node it creates.
+        """
+        return self.node + "." + self.attribute if self.attribute else self.node
+
+    def key(self):
+        """
+        Returns the key of the operation. A plan holds one operation per key.
+        """
+        return (self.kind, self.node, self.attribute)
+
+class OperationPlan(object):
+    """
+    An ordered list of operations, without duplicates.
+
+    Attributes:
+        owners (OrderedDict): The data the planner attached to each owner, for example the nodes of
+            its network, kept through diffs.
+    """
+    def __init__(self):
+        self._operations = OrderedDict()
+        self._names = {}
+        self.owners = OrderedDict()
+
+    def __len__(self):
+        return len(self._operations)
+
+    def __iter__(self):
+        return iter(self._operations.values())
+
+    def add(self, operation):
+        """
+        Adds an operation, replacing the operation with the same key.
+
+        Args:
+            operation (Operation): The operation.
+        """
+        self._operations[operation.key()] = operation
+
+    def delete_node(self, owner, name):
+        """
+        Plans the deletion of a node, for example a node left over from a previous network.
+        """
+        self.add(Operation("delete_node", owner, name, None, (), {}))
+
+    def create_node(self, owner, name, node_type, parent=None):
+        """
+        Plans the creation of a node.
+        """
+        self.add(Operation("create_node", owner, name, None, (node_type,), {"parent": parent} if parent else {}))
+
+    def add_attr(self, owner, node, long_name, **kwargs):
+        """
+        Plans the addition of a dynamic attribute, with the flags of cmds.addAttr.
+        """
+        self.add(Operation("add_attr", owner, node, long_name, (), kwargs))
+
+    def set_attr(self, owner, plug, *values, **kwargs):
+        """
+        Plans the value of a plug, with the flags of cmds.setAttr.
+        """
+        node, _, attribute = plug.partition(".")
+        self.add(Operation("set_attr", owner, node, attribute, values, kwargs))
+
+    def connect(self, owner, source, destination):
+        """
+        Plans a connection. A destination plug has a single source, so a later connection to the
+        same destination replaces an earlier one.
+        """
+        node, _, attribute = destination.partition(".")
+        self.add(Operation("connect", owner, node, attribute, (source,), {}))
+
+    def operations(self, kind=None):
+        """
+        Returns the operations of the plan.
+
+        Args:
+            kind (str): Only return the operations of this kind. See OPERATION_KINDS.
+
+        Returns:
+            list: The Operations, in the order they were planned.
+        """
+        return [operation for operation in self._operations.values() if kind is None or operation.kind == kind]
+
+    def summary(self):
+        """
+        Counts the operations of each kind.
+
+        Returns:
+            OrderedDict: The number of operations, keyed by kind in execution order.
+        """
+        counts = OrderedDict((kind, 0) for kind in OPERATION_KINDS)
+        for operation in self._operations.values():
+            counts[operation.kind] += 1
+        return counts
+
+    def format(self):
+        """
+        Returns the plan as printable text, one Maya command per operation, in execution order.
+
+        Returns:
+            str: The text.
+        """
+        return "\n".join(_format_operation(operation) for kind in OPERATION_KINDS for operation in self.operations(kind))
+
+    def diff(self):
+        """
+        Compares the plan with the scene and returns the operations that are missing from it.
+
+        The existing nodes and attributes are found with one query each. The values and connections
+        are only checked for the owners that already have some of their planned nodes or
+        attributes, on the plugs that already exist: the values with one read per plug and the
+        connections with one query. The values and connections of the other owners are applied in
+        any case.
+
+        Returns:
+            OperationPlan: A plan holding the missing operations, with the same owners.
+        """
+        missing = OperationPlan()
+        missing.owners = OrderedDict(self.owners)
+        satisfied = set()
+        existing_owners = set()
+
+        # Check every node of the plan, with its type, in one query
+        node_operations = self.operations("create_node")
+        delete_operations = self.operations("delete_node")
+        if node_operations or delete_operations:
+            listed = cmds.ls([operation.node for operation in node_operations + delete_operations], showType=True) or []
+            node_types = dict(zip(listed[0::2], listed[1::2]))
+            for operation in node_operations:
+                if node_types.get(operation.node) == operation.args[0]:
+                    satisfied.add(operation.key())
+                    existing_owners.add(operation.owner)
+            for operation in delete_operations:
+                if operation.node not in node_types:
+                    satisfied.add(operation.key())
+
+        # Check every attribute of the plan in one query
+        attribute_operations = self.operations("add_attr")
+        if attribute_operations:
+            existing_plugs = set(cmds.ls([operation.plug for operation in attribute_operations]) or [])
+            for operation in attribute_operations:
+                if operation.plug in existing_plugs:
+                    satisfied.add(operation.key())
+                    existing_owners.add(operation.owner)
+
+        # Read the values whose plugs already exist on the existing owners
+        planned_nodes = set(operation.node for operation in node_operations if operation.key() not in satisfied)
+        planned_attributes = set((operation.node, operation.attribute) for operation in attribute_operations if operation.key() not in satisfied)
+
+        def exists(operation):
+            return operation.node not in planned_nodes and (operation.node, operation.attribute.split("[")[0]) not in planned_attributes
+
+        for operation in self.operations("set_attr"):
+            if operation.owner in existing_owners and exists(operation) and _values_match(cmds.getAttr(operation.plug), operation.args):
+                satisfied.add(operation.key())
+
+        # Check the source of every existing destination of the existing owners in one query
+        connect_operations = [operation for operation in self.operations("connect") if operation.owner in existing_owners and exists(operation)]
+        if connect_operations:
+            listed = cmds.listConnections([operation.plug for operation in connect_operations], source=True, destination=False, connections=True, plugs=True) or []
+            sources = dict((_normalize_plug(destination), _normalize_plug(source)) for destination, source in zip(listed[0::2], listed[1::2]))
+            for operation in connect_operations:
+                if sources.get(_normalize_plug(operation.plug)) == _normalize_plug(operation.args[0]):
+                    satisfied.add(operation.key())
+
+        for operation in self._operations.values():
+            if operation.key() not in satisfied:
+                missing.add(operation)
+        return missing
+
+    def split(self, chunk_size):
+        """
+        Splits the plan into smaller plans by owner, to execute them one chunk at a time.
+
+        Args:
+            chunk_size (int): The largest number of owners of a chunk.
+
+        Returns:
+            list: The OperationPlans, each holding the owners of its chunk and their operations,
+                in the order the owners were planned.
+        """
+        # The owners without attached data follow the others, in the order of their operations
+        owners = OrderedDict((owner, None) for owner in self.owners)
+        for operation in self._operations.values():
+            owners.setdefault(operation.owner, None)
+        owners = list(owners)
+
+        chunk_size = max(chunk_size, 1)
+        chunks = []
+        chunk_by_owner = {}
+        for start in range(0, len(owners), chunk_size):
+            chunk = OperationPlan()
+            for owner in owners[start:start + chunk_size]:
+                if owner in self.owners:
+                    chunk.owners[owner] = self.owners[owner]
+                chunk_by_owner[owner] = chunk
+            chunks.append(chunk)
+        for operation in self._operations.values():
+            chunk_by_owner[operation.owner].add(operation)
+        return chunks
+
+    def execute(self):
+        """
+        Applies the operations to the scene, all the operations of one kind before the next kind.
+
+        The nodes to delete are deleted with one command. The nodes Maya renames on creation are
+        renamed in the operations that follow. When an operation fails, the remaining operations of
+        its owner are skipped and the other owners carry on.
+
+        Returns:
+            OrderedDict: The exception raised for each owner that failed.
+        """
+        failures = OrderedDict()
+        for kind in OPERATION_KINDS:
+            operations = self.operations(kind)
+            if not operations:
+                continue
+            with _profiler.phase(OPERATION_PHASES[kind]):
+                if kind == "delete_node":
+                    cmds.delete(*[operation.node for operation in operations])
+                    continue
+                for operation in operations:
+                    if operation.owner in failures:
+                        continue
+                    try:
+                        self._apply(operation)
+                    except Exception as e:
+                        failures[operation.owner] = e
+        return failures
+
+    def resolve(self, name):
+        """
+        Returns the name a planned node was created with, or the name itself if it was not renamed.
+
+        Args:
+            name (str): The planned node name, or a plug of the node.
+
+        Returns:
+            str: The node name or plug.
+        """
+        node, separator, attribute = name.partition(".")
+        return self._names.get(node, node) + separator + attribute
+
+    def _apply(self, operation):
+        """
+        Applies one operation with its Maya command.
+        """
+        node = self.resolve(operation.node)
+        if operation.kind == "create_node":
+            kwargs = dict(operation.kwargs)
+            if "parent" in kwargs:
+                kwargs["parent"] = self.resolve(kwargs["parent"])
+            created = cmds.createNode(operation.args[0], name=operation.node, **kwargs)
+            if created != operation.node:
+                self._names[operation.node] = created
+        elif operation.kind == "add_attr":
+            cmds.addAttr(node, longName=operation.attribute, **operation.kwargs)
+        elif operation.kind == "set_attr":
+            cmds.setAttr(node + "." + operation.attribute, *operation.args, **operation.kwargs)
+        else:
+            cmds.connectAttr(self.resolve(operation.args[0]), node + "." + operation.attribute)
+
+def _values_match(current, values):
+    """
+    Checks whether the value of a plug read with cmds.getAttr matches the values of a set_attr.
+    """
+    current = _flatten(current)
+    values = _flatten(values)
+    if len(current) != len(values):
+        return False
+    for current_value, value in zip(current, values):
+        if isinstance(value, (int, float)) and isinstance(current_value, (int, float)):
+            if abs(current_value - value) > VALUE_TOLERANCE:
+                return False
+        elif current_value != value:
+            return False
+    return True
+
+def _flatten(value):
+    """
+    Flattens the nested lists and tuples cmds.getAttr returns for compound and matrix plugs.
+    """
+    if not isinstance(value, (list, tuple)):
+        return [value]
+    flat = []
+    for item in value:
+        flat += _flatten(item)
+    return flat
+
+def _normalize_plug(plug):
+    """
+    Normalizes a plug for comparison: the short name of its node, without the [0] Maya drops from
+    the first element of some array plugs.
+    """
+    node, separator, attribute = plug.partition(".")
+    if attribute.endswith("[0]"):
+        attribute = attribute[:-3]
+    return node.split("|")[-1] + separator + attribute
+
+def _format_operation(operation):
+    """
+    Returns an operation as the Maya command applying it.
+    """
+    if operation.kind == "delete_node":
+        return "delete {}".format(operation.node)
+    if operation.kind == "create_node":
+        flags = " -parent {}".format(operation.kwargs["parent"]) if "parent" in operation.kwargs else ""
+        return "createNode {} -name {}{}".format(operation.args[0], operation.node, flags)
+    if operation.kind == "add_attr":
+        flags = "".join(" -{} {}".format(flag, value) for flag, value in sorted(operation.kwargs.items()))
+        return "addAttr -longName {}{} {}".format(operation.attribute, flags, operation.node)
+    if operation.kind == "set_attr":
+        values = " ".join(_format_value(value) for value in operation.args)
+        flags = " -type {}".format(operation.kwargs["type"]) if "type" in operation.kwargs else ""
+        return "setAttr {}{} {}".format(operation.plug, flags, values)
+    return "connectAttr {} {}".format(operation.args[0], operation.plug)
+
+def _format_value(value):
+    """
+    Returns a value of a set_attr as text, quoting strings.
+    """
+    if isinstance(value, (int, float)):
+        return "{:g}".format(value)
+    return '"{}"'.format(value)
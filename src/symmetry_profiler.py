@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+Opt-in per-phase profiling of the symmetry builder.
+
+Set the JOINT_SYMMETRY_PROFILE environment variable to 1, or pass profile=True to the batch entry
+points, to time each phase of the network construction and count the Maya commands it issues.
+When profiling is disabled, entering a phase returns a shared no-op context manager.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import time
+from collections import Counter, OrderedDict
+
+# The environment variable enabling the profiler
+ENVIRONMENT_VARIABLE = "JOINT_SYMMETRY_PROFILE"
+
+# The phase the commands issued outside any phase are counted in
+UNPHASED = "other"
+
+class _NullContext(object):
+    """
+    A context manager doing nothing.
+    """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_NULL_CONTEXT = _NullContext()
+
+class _PhaseRecord(object):
+    """
+    The measurements of one phase, aggregated across every time it was entered.
+
+    Attributes:
+        seconds (float): The total wall time spent in the phase.
+        count (int): The number of times the phase was entered.
+        calls (Counter): The number of calls to each Maya command issued in the phase.
+    """
+    def __init__(self):
+        self.seconds = 0.0
+        self.count = 0
+        self.calls = Counter()
+
+class _Phase(object):
+    """
+    A context manager timing one run of a phase.
+    """
+    def __init__(self, profiler, name):
+        self._profiler = profiler
+        self._name = name
+        self._start_time = 0.0
+
+    def __enter__(self):
+        self._profiler._stack.append(self._profiler._record(self._name))
+        self._start_time = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        record = self._profiler._stack.pop()
+        record.seconds += time.time() - self._start_time
+        record.count += 1
+        return False
+
+class _CountingCmds(object):
+    """
+    Wraps maya.cmds to count the commands issued in the current phase.
+    """
+    def __init__(self, cmds, profiler):
+        self._cmds = cmds
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        command = getattr(self._cmds, name)
+        if not callable(command):
+            return command
+        profiler = self._profiler
+
+        def counted(*args, **kwargs):
+            stack = profiler._stack
+            record = stack[-1] if stack else profiler._record(UNPHASED)
+            record.calls[name] += 1
+            return command(*args, **kwargs)
+        return counted
+
+class SymmetryProfiler(object):
+    """
+    Times the phases of the symmetry builder and counts their Maya commands.
+
+    Attributes:
+        enabled (bool): Whether the profiler records anything.
+    """
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._phases = OrderedDict()
+        self._stack = []
+        self._pairs = 0
+
+    def reset(self):
+        """
+        Clears the recorded measurements.
+        """
+        self._phases = OrderedDict()
+        self._stack = []
+        self._pairs = 0
+
+    def _record(self, name):
+        record = self._phases.get(name)
+        if record is None:
+            record = self._phases[name] = _PhaseRecord()
+        return record
+
+    def phase(self, name):
+        """
+        Returns a context manager timing a phase.
+
+        Args:
+            name (str): The phase name.
+
+        Returns:
+            A context manager, a shared no-op one when the profiler is disabled.
+        """
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return _Phase(self, name)
+
+    def count_pairs(self, count):
+        """
+        Records the number of pairs processed, used to average the measurements per pair.
+        """
+        if self.enabled:
+            self._pairs += count
+
+    def session(self, modules):
+        """
+        Returns a context manager counting the Maya commands issued by modules.
+
+        While the session is active, the `cmds` global of each module is wrapped so each command is
+        counted in the current phase.
+
+        Args:
+            modules (list): The modules whose `cmds` global to wrap.
+
+        Returns:
+            A context manager, a shared no-op one when the profiler is disabled.
+        """
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return _Session(self, modules)
+
+    def report(self):
+        """
+        Returns the measurements as a structured report.
+
+        Returns:
+            dict: The number of "pairs", the total "seconds" and "calls", and the "phases", a list
+                of dicts with the "name", "seconds", "count", "calls", "calls_by_command" and
+                "seconds_per_pair" of each phase.
+        """
+        phases = []
+        for name, record in self._phases.items():
+            calls = sum(record.calls.values())
+            phases.append({
+                "name": name,
+                "seconds": record.seconds,
+                "count": record.count,
+                "calls": calls,
+                "calls_by_command": dict(record.calls),
+                "seconds_per_pair": record.seconds / self._pairs if self._pairs else None,
+            })
+        return {
+            "pairs": self._pairs,
+            "seconds": sum(phase["seconds"] for phase in phases),
+            "calls": sum(phase["calls"] for phase in phases),
+            "phases": phases,
+        }
+
+    def format_report(self):
+        """
+        Returns the measurements as a printable table.
+        """
+        report = self.report()
+        lines = ["{:<20} {:>10} {:>8} {:>8} {:>12}".format("phase", "seconds", "count", "calls", "calls/pair")]
+        for phase in report["phases"]:
+            calls_per_pair = phase["calls"] / report["pairs"] if report["pairs"] else 0.0
+            lines.append("{:<20} {:>10.4f} {:>8} {:>8} {:>12.2f}".format(phase["name"], phase["seconds"], phase["count"], phase["calls"], calls_per_pair))
+        lines.append("{} pairs, {:.4f} seconds, {} Maya commands".format(report["pairs"], report["seconds"], report["calls"]))
+        return "\n".join(lines)
+
+class _Session(object):
+    """
+    A context manager wrapping the `cmds` global of modules with a counting proxy.
+    """
+    def __init__(self, profiler, modules):
+        self._profiler = profiler
+        self._modules = modules
+        self._originals = []
+
+    def __enter__(self):
+        for module in self._modules:
+            # A nested session leaves the modules wrapped by the outer one
+            if isinstance(module.cmds, _CountingCmds):
+                continue
+            self._originals.append((module, module.cmds))
+            module.cmds = _CountingCmds(module.cmds, self._profiler)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for module, cmds in self._originals:
+            module.cmds = cmds
+        self._originals = []
+        return False
+
+# Keep the profiler across module reloads
+if "_profiler" not in globals():
+    _profiler = SymmetryProfiler(enabled=os.environ.get(ENVIRONMENT_VARIABLE, "") not in ("", "0"))
+
+def get_profiler():
+    """
+    Returns the process-wide profiler.
+
+    Returns:
+        SymmetryProfiler: The profiler.
+    """
+    return _profiler
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""
+Progress reporting and cancellation of the long symmetry operations.
+
+A ProgressReporter drives the main progress bar of Maya and an optional callback, for example a
+progress bar of the tool window, and tells the builders whether the user cancelled with Esc or with
+the tool window. The builders check it between chunks of work, so a cancelled build stops on a chunk
+boundary and can be undone as a whole. suspend_refresh stops the viewport from refreshing, and from
+pulling the evaluation of the graph, while the networks are built.
+
+Usage:
+    progress = ProgressReporter("Mirroring joints")
+    with suspend_refresh():
+        create_joint_symmetry.create_joint_symmetry_batch(root_joint="root", chunk_size=100, progress=progress)
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import contextlib
+
+import maya.cmds as cmds
+
+class BuildCancelled(Exception):
+    """
+    Raised when the user cancels a chunked build between two chunks.
+
+    Attributes:
+        pairs (list): The (source joint, target joint) tuples whose networks were built or completed
+            before the build was cancelled.
+    """
+    def __init__(self, pairs):
+        super(BuildCancelled, self).__init__("The build was cancelled after {} joint pairs.".format(len(pairs)))
+        self.pairs = pairs
+
+class ProgressReporter(object):
+    """
+    Reports the progress of a chunked operation and tells whether it was cancelled.
+
+    Attributes:
+        status (str): The status shown next to the progress bar.
+        callback (callable): Called with the number of completed items and the total number of
+            items whenever the progress changes, or None. The tool window keeps itself responsive
+            from it.
+        main_progress_bar (bool): Whether to drive the main progress bar of Maya. It is never used
+            in batch mode.
+        done (int): The number of completed items.
+        total (int): The total number of items.
+    """
+    def __init__(self, status, callback=None, main_progress_bar=True):
+        self.status = status
+        self.callback = callback
+        self.main_progress_bar = main_progress_bar
+        self.done = 0
+        self.total = 0
+        self._cancelled = False
+        self._progress_bar = None
+
+    def start(self, total):
+        """
+        Starts reporting an operation.
+
+        Args:
+            total (int): The total number of items.
+        """
+        self.done = 0
+        self.total = total
+        self._cancelled = False
+        if self.main_progress_bar and not cmds.about(batch=True):
+            import maya.mel as mel
+            self._progress_bar = mel.eval("$tmp = $gMainProgressBar")
+            cmds.progressBar(self._progress_bar, edit=True, beginProgress=True, isInterruptable=True, status=self.status, maxValue=max(total, 1))
+        self._notify()
+
+    def advance(self, count):
+        """
+        Reports completed items.
+
+        Args:
+            count (int): The number of items completed since the last report.
+        """
+        self.done += count
+        if self._progress_bar is not None:
+            cmds.progressBar(self._progress_bar, edit=True, step=count)
+        self._notify()
+
+    def cancel(self):
+        """
+        Cancels the operation once the current chunk is completed.
+        """
+        self._cancelled = True
+
+    def is_cancelled(self):
+        """
+        Returns whether the operation was cancelled, from the tool or with Esc on the main progress bar.
+        """
+        if not self._cancelled and self._progress_bar is not None:
+            self._cancelled = bool(cmds.progressBar(self._progress_bar, query=True, isCancelled=True))
+        return self._cancelled
+
+    def end(self):
+        """
+        Stops reporting the operation and releases the main progress bar.
+        """
+        if self._progress_bar is not None:
+            cmds.progressBar(self._progress_bar, edit=True, endProgress=True)
+            self._progress_bar = None
+
+    def _notify(self):
+        """
+        Passes the progress to the callback.
+        """
+        if self.callback is not None:
+            self.callback(self.done, self.total)
+
+@contextlib.contextmanager
+def suspend_refresh(enabled=True):
+    """
+    Suspends the refresh of the viewports, and with it the evaluation they pull after every change
+    of the graph, until the block is left.
+
+    Args:
+        enabled (bool): Whether to suspend the refresh. The block runs unchanged otherwise.
+    """
+    if not enabled:
+        yield
+        return
+    cmds.refresh(suspend=True)
+    try:
+        yield
+    finally:
+        cmds.refresh(suspend=False)
+        cmds.refresh()